@@ -0,0 +1,25 @@
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from app.core.config import get_settings
+from app.services.drainer import drainer
+
+settings = get_settings()
+router = APIRouter()
+
+@router.post("/admin/drain", status_code=status.HTTP_202_ACCEPTED, include_in_schema=False)
+async def start_drain(x_drain_token: Optional[str] = Header(None)):
+    """
+    이 노드의 drain을 시작합니다. (배포 도구용)
+    새 접속 거절 -> 영속화 큐 비우기 -> 소켓을 나눠서 닫기 순서로 진행되며 진행 상황을 돌려줍니다.
+    """
+    if not settings.DRAIN_TOKEN or not x_drain_token or not secrets.compare_digest(x_drain_token, settings.DRAIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid drain token.")
+    return drainer.start()
+
+@router.get("/admin/drain", include_in_schema=False)
+async def get_drain_progress():
+    """drain 진행 상황을 조회합니다. 시작하지 않았으면 404."""
+    if drainer.progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Drain has not been started.")
+    return drainer.progress
@@ -5,13 +5,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.crud import users as crud_users # users.py에 create_user, get_user_by_username, authenticate_user 함수가 있다고 가정
 from app.schemas.user import UserCreate, Token, UserInDB, UserLogin # 스키마 가져오기
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import get_password_hash, verify_password, create_access_token, PasswordHashPoolBusy
 from datetime import timedelta
 from app.core.config import get_settings
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 settings = get_settings()
 
+def password_pool_busy_exception() -> HTTPException:
+    """bcrypt 스레드 풀이 포화 상태일 때 돌려줄 응답"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="요청이 많아 잠시 후 다시 시도해 주세요.",
+        headers={"Retry-After": "1"},
+    )
+
 # --- 사용자 회원가입 (register) 엔드포인트 ---
 # 이 라우트는 이제 유일합니다.
 @router.post("/register", response_model=UserInDB, status_code=status.HTTP_201_CREATED)
@@ -27,8 +36,11 @@ async def register_user(
             detail="이미 존재하는 사용자 이름입니다."
         )
 
-    # 2. 받은 평문 비밀번호를 해시
-    hashed_password = get_password_hash(user_data.password)
+    # 2. 받은 평문 비밀번호를 해시 (이벤트 루프를 막지 않도록 스레드 풀에서 실행)
+    try:
+        hashed_password = await get_password_hash(user_data.password)
+    except PasswordHashPoolBusy:
+        raise password_pool_busy_exception()
 
     # 3. 데이터베이스에 저장할 사용자 생성
     # crud_users.create_user 함수가 username과 hashed_password를 직접 받도록 가정합니다.
@@ -39,6 +51,7 @@ async def register_user(
         username=user_data.username,
         hashed_password=hashed_password
     )
+    principal_cache.invalidate_user(created_user.username)
     # create_user 함수가 UserInDB 객체를 반환한다고 가정합니다.
 
     return created_user
@@ -55,7 +68,11 @@ async def login_for_access_token(
 
     # 2. 사용자 존재 여부 및 비밀번호 확인
     # verify_password 함수가 평문 비밀번호(user_data.password)와 DB에 저장된 해시된 비밀번호(user.password_hash)를 비교
-    if not user or not verify_password(user_data.password, user.password_hash):
+    try:
+        password_ok = bool(user) and await verify_password(user_data.password, user.password_hash)
+    except PasswordHashPoolBusy:
+        raise password_pool_busy_exception()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="아이디 또는 비밀번호가 잘못되었습니다.",
@@ -65,7 +82,7 @@ async def login_for_access_token(
     # 3. 액세스 토큰 생성
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,169 @@
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db, ReadSessionLocal
+from app.db.models import User
+from app.crud import messages as crud_messages
+from app.crud import rooms as crud_rooms
+from app.core.config import get_settings
+from app.core.dependencies import get_current_user
+from app.core.serialization import dumps, loads
+from app.services.history_cache import history_cache
+from app.services.id_allocator import IdsUnavailable, message_id_allocator
+from app.services.principal_cache import principal_cache
+
+settings = get_settings()
+router = APIRouter()
+
+async def export_lines(room_id: int) -> AsyncIterator[bytes]:
+    """
+    방의 메시지를 NDJSON 한 줄씩 만듭니다.
+    응답을 보내는 동안 세션이 살아 있어야 하므로 의존성 세션 대신 여기서 직접 엽니다.
+    """
+    async with ReadSessionLocal() as db:
+        async for message in crud_messages.stream_messages_for_room(db, room_id, chunk_size=settings.EXPORT_CHUNK_SIZE):
+            if isinstance(message["timestamp"], datetime): # 보관 세그먼트의 행은 이미 문자열
+                message["timestamp"] = message["timestamp"].isoformat()
+            yield (dumps(message) + "\n").encode()
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """청크를 받는 대로 gzip으로 압축해서 내보냅니다."""
+    compressor = zlib.compressobj(wbits=31) # 31 = gzip 헤더 포함
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+async def gunzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(wbits=47) # 47 = gzip/zlib 헤더 자동 감지
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    yield decompressor.flush()
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    yield buffer
+
+def parse_import_line(line: bytes, room_id: int, now: datetime | None = None) -> dict:
+    """
+    내보내기 형식의 한 줄을 저장할 행으로 바꿉니다. id와 room_id는 무시합니다.
+    timestamp는 UTC 오프셋이 있어야 하며 UTC로 맞춰 저장합니다. 없으면 지금 시각입니다.
+    미래 시각은 거절합니다. (미래 월이 DEFAULT 파티션에 들어가면 그 달의 파티션을 만들 수 없게 됩니다)
+    """
+    message = loads(line)
+    if not isinstance(message, dict) or not isinstance(message.get("sender_id"), int) or not isinstance(message.get("content"), str):
+        raise ValueError("each line needs an integer sender_id and a string content")
+    now = now or datetime.now(timezone.utc)
+    timestamp = message.get("timestamp")
+    if timestamp is None:
+        parsed = now
+    else:
+        parsed = datetime.fromisoformat(timestamp)
+        if parsed.tzinfo is None:
+            raise ValueError("timestamp needs a UTC offset")
+        parsed = parsed.astimezone(timezone.utc)
+        if parsed > now:
+            raise ValueError("timestamp is in the future")
+    return {"room_id": room_id, "sender_id": message["sender_id"], "content": message["content"], "timestamp": parsed.isoformat()}
+
+@router.get("/rooms/{room_id}/export")
+async def export_room_messages(
+    room_id: int,
+    compress: bool = Query(False, description="true면 gzip으로 압축해서 보냅니다."),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    방의 전체 메시지를 id 순서(발행 순서)대로 NDJSON 스트림으로 내보냅니다.
+    서버 측 커서로 조금씩 읽어 바로 보내므로 방 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    room = await principal_cache.get_room(db, room_id=room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="채팅방을 찾을 수 없습니다.")
+
+    body = export_lines(room_id)
+    filename = f"room-{room_id}-messages.ndjson"
+    media_type = "application/x-ndjson"
+    if compress:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@router.post("/rooms/{room_id}/import")
+async def import_room_messages(
+    room_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    내보내기 형식(NDJSON, Content-Encoding: gzip 가능)의 메시지를 방에 가져옵니다.
+    - 방의 생성자만 가져올 수 있습니다.
+    - 본문을 스트림으로 읽으며 IMPORT_BATCH_SIZE개씩 bulk INSERT(executemany) 후 커밋합니다.
+    - 메시지는 파일 순서대로 새 id를 받습니다. (sender_id, content, timestamp만 사용)
+    - timestamp는 UTC 오프셋이 있는 현재 이전 시각이어야 합니다.
+    - 중간에 잘못된 줄이 있으면 그 앞 배치까지는 저장된 상태로 400을 돌려줍니다.
+    """
+    room = await crud_rooms.get_room_by_id(db, room_id)
+    if not room:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat room not found.")
+    if room.created_by != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to import into this chat room.")
+
+    chunks = request.stream()
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        chunks = gunzip_stream(chunks)
+
+    imported = 0
+    batch: list[dict] = []
+
+    async def flush():
+        nonlocal imported
+        ids = await message_id_allocator.next_ids(len(batch))
+        for message_id, row in zip(ids, batch):
+            row["id"] = message_id
+        await crud_messages.bulk_create_chat_messages(db, batch)
+        imported += len(batch)
+        batch.clear()
+
+    line_number = 0
+    try:
+        async for line in read_lines(chunks):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                batch.append(parse_import_line(line, room_id))
+            except (ValueError, TypeError) as e:
+                raise HTTPException(status_code=400, detail=f"line {line_number}: {e} (imported {imported})")
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await flush()
+        if batch:
+            await flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Unknown sender_id near line {line_number} (imported {imported})")
+    except DataError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid value near line {line_number}: {e.orig} (imported {imported})")
+    except zlib.error:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip body (imported {imported})")
+    except IdsUnavailable:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Message ids are unavailable while Redis is down (imported {imported})")
+    finally:
+        if imported:
+            await history_cache.invalidate(room_id)
+    return {"room_id": room_id, "imported": imported}
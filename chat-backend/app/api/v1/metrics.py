@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import registry
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus가 수집하는 계측 값을 텍스트 포맷으로 돌려줍니다."""
+    return PlainTextResponse(await registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,21 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from app.db.database import get_db
+from typing import List, Optional
+from app.db.database import get_db, get_read_db
 from app.db.models import User # current_user의 타입 힌트를 위해
 from app.crud import rooms as crud_rooms
 from app.crud import messages as crud_messages # 메시지 CRUD가 있다면
-from app.schemas.room import RoomCreate, RoomDisplay
+from app.schemas.room import RoomCreate, RoomDisplay, RoomPresence
 from app.schemas.message import MessageDisplay # 메시지 스키마가 있다면
 from app.core.dependencies import get_current_user # 올바른 경로로 수정
+from app.services.history_cache import history_cache
+from app.services.principal_cache import principal_cache
+from app.services.presence import presence
+from app.services.room_list_cache import room_list_cache
+from app.services.room_hub import room_hub
+from app.services.room_purger import room_purger
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 
 router = APIRouter()
 
 @router.get("/rooms", response_model=List[RoomDisplay])
-async def get_all_chat_rooms(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """모든 채팅방 목록을 조회합니다."""
-    rooms = await crud_rooms.get_all_rooms(db)
-    return rooms
+async def get_all_chat_rooms(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 페이지의 X-Next-Cursor 값"),
+    prefix: Optional[str] = Query(None, min_length=1, max_length=100, description="방 이름 접두어 검색"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    채팅방 목록을 현재 접속자 수와 함께 조회합니다.
+    prefix가 없으면 id순, 있으면 이름순으로 정렬되며,
+    페이지가 가득 차면 다음 페이지 커서를 X-Next-Cursor 헤더로 돌려줍니다.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and not isinstance(after, str if prefix else int):
+            raise ValueError("room cursor does not match the sort order")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+
+    rooms, next_cursor = await room_list_cache.get_page(db, limit=limit, after=after, name_prefix=prefix)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(next_cursor)
+    # 접속자 수는 캐시하지 않고 매번 presence 레지스트리에서 가져옵니다.
+    counts = await presence.online_counts(room.id for room in rooms)
+    return [room.model_copy(update={"online_count": counts.get(room.id, 0)}) for room in rooms]
 
 @router.post("/rooms", response_model=RoomDisplay, status_code=status.HTTP_201_CREATED)
 async def create_new_chat_room(room: RoomCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -26,19 +55,64 @@ async def create_new_chat_room(room: RoomCreate, db: AsyncSession = Depends(get_
         raise HTTPException(status_code=400, detail="동일한 이름의 채팅방이 이미 존재합니다.")
 
     # 2. 새로운 방 생성: user_id 대신 creator_id로 current_user.id 전달
-    return await crud_rooms.create_chat_room(db, room=room, creator_id=current_user.id)
+    created_room = await crud_rooms.create_chat_room(db, room=room, creator_id=current_user.id)
+    room_list_cache.invalidate()
+    return created_room
 
 @router.get("/rooms/{room_id}/messages", response_model=List[MessageDisplay])
-async def get_room_messages(room_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """특정 채팅방의 메시지 목록을 조회합니다."""
-    # 룸 ID로 조회: get_room_by_id 함수 사용
-    room = await crud_rooms.get_room_by_id(db, room_id=room_id)
+async def get_room_messages(
+    room_id: int,
+    response: Response,
+    before: Optional[str] = Query(None, description="이 커서보다 오래된 메시지를 조회합니다."),
+    after: Optional[str] = Query(None, description="이 커서보다 새로운 메시지를 조회합니다."),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    특정 채팅방의 메시지 목록을 최신순으로 조회합니다.
+    페이지가 가득 차면 같은 방향의 다음 페이지 커서를 X-Next-Cursor 헤더로 돌려줍니다.
+    방 존재 확인은 기본 DB에서 하고(복제 지연으로 방금 만든 방이 404가 되지 않도록), 메시지 조회는 복제본에서 합니다.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="before와 after는 함께 사용할 수 없습니다.")
+    try:
+        before_id = decode_cursor(before) if before else None
+        after_id = decode_cursor(after) if after else None
+        if not all(isinstance(v, int) for v in (before_id, after_id) if v is not None):
+            raise ValueError("message cursor must be an id")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+
+    # 룸 존재 여부 확인 (캐시에 있으면 DB 조회 없음)
+    room = await principal_cache.get_room(db, room_id=room_id)
     if not room:
         raise HTTPException(status_code=404, detail="채팅방을 찾을 수 없습니다.")
-    messages = await crud_messages.get_messages_for_room(db, room_id=room_id) # crud_messages도 확인 필요
+    if before_id is None and after_id is None and limit <= history_cache.size:
+        # 첫 페이지는 최근 메시지 캐시에서 응답하고, 비어 있으면 DB에서 채웁니다.
+        messages = await history_cache.get(room_id, limit)
+        if messages is None:
+            recent = await crud_messages.get_messages_for_room(read_db, room_id=room_id, limit=history_cache.size)
+            await history_cache.fill(room_id, recent)
+            messages = recent[:limit]
+    else:
+        messages = await crud_messages.get_messages_for_room(
+            read_db, room_id=room_id, before=before_id, after=after_id, limit=limit
+        )
+    if len(messages) == limit:
+        # after 방향이면 가장 새로운 id, 아니면 가장 오래된 id가 다음 커서입니다.
+        next_id = messages[0]["id"] if after_id is not None else messages[-1]["id"]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(next_id)
     return messages
 
-@router.delete("/rooms/{room_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.get("/rooms/{room_id}/presence", response_model=RoomPresence)
+async def get_room_presence(room_id: int, current_user: User = Depends(get_current_user)):
+    """특정 채팅방에 현재 접속해 있는 사용자 목록을 조회합니다. (DB 조회 없음)"""
+    users = await presence.online_users(room_id)
+    return {"room_id": room_id, "online_count": len(users), "users": users}
+
+@router.delete("/rooms/{room_id}", status_code=status.HTTP_202_ACCEPTED)
 async def delete_chatroom(
     room_id: int,
     db: AsyncSession = Depends(get_db),
@@ -47,7 +121,8 @@ async def delete_chatroom(
     """
     특정 ID의 대화방을 삭제합니다.
     - 대화방의 생성자만 삭제할 수 있습니다.
-    - CASCADE 설정에 따라 대화방의 모든 메시지도 함께 삭제됩니다.
+    - 방은 즉시 삭제 상태가 되어 조회에서 빠지고, 접속 중인 소켓은 알림(room_deleted)을 받은 뒤 끊깁니다.
+    - 메시지는 백그라운드 작업이 나눠서 지우며, 진행 상황은 GET /rooms/{room_id}/deletion으로 확인합니다.
     """
     # 1. 대화방 조회
     room = await crud_rooms.get_room_by_id(db, room_id)
@@ -66,14 +141,27 @@ async def delete_chatroom(
             detail="You do not have permission to delete this chat room."
         )
 
-    # 4. 대화방 삭제 및 커밋
+    # 4. 삭제 표시 및 커밋
     try:
-        await crud_rooms.delete_room(db, room)
+        await crud_rooms.soft_delete_room(db, room_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while deleting the chat room: {str(e)}"
         )
-    
-    return {"message": "Chat room deleted successfully."}
+    principal_cache.invalidate_room(room_id)
+    room_list_cache.invalidate()
+    await history_cache.invalidate(room_id)
+
+    # 5. 접속 중인 소켓에 알리고 끊은 뒤, 메시지 정리를 백그라운드로 넘깁니다.
+    await room_hub.publish_tombstone(room_id)
+    return room_purger.schedule(room_id)
+
+@router.get("/rooms/{room_id}/deletion")
+async def get_room_deletion_progress(room_id: int, current_user: User = Depends(get_current_user)):
+    """진행 중이거나 최근에 끝난 방 삭제 작업의 진행 상황을 조회합니다. (정리하는 노드가 Redis에 남긴 기록)"""
+    progress = await room_purger.get_progress(room_id)
+    if progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No deletion job for this chat room.")
+    return progress
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.db.database import get_db, get_read_db
+from app.db.models import User
+from app.crud import search as crud_search
+from app.schemas.message import MessageDisplay
+from app.core.dependencies import get_current_user
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from app.services.principal_cache import principal_cache
+
+router = APIRouter()
+
+def parse_search_cursor(cursor: Optional[str]) -> Optional[crud_search.SearchCursor]:
+    if not cursor:
+        return None
+    try:
+        score, message_id = decode_cursor(cursor)
+        if not isinstance(score, (int, float)) or not isinstance(message_id, int):
+            raise ValueError("search cursor must be [score, id]")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
+    return float(score), message_id
+
+async def run_search(response: Response, db: AsyncSession, q: str, room_id: Optional[int], cursor: Optional[str], limit: int):
+    after = parse_search_cursor(cursor)
+    messages, next_cursor = await crud_search.search_messages(db, q, room_id=room_id, after=after, limit=limit)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(list(next_cursor))
+    return messages
+
+@router.get("/rooms/{room_id}/search", response_model=List[MessageDisplay])
+async def search_room_messages(
+    room_id: int,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="검색어"),
+    cursor: Optional[str] = Query(None, description="이전 페이지의 X-Next-Cursor 값"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """특정 채팅방의 메시지를 관련도순으로 검색합니다. (방 존재 확인은 기본 DB, 검색은 복제본)"""
+    room = await principal_cache.get_room(db, room_id=room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="채팅방을 찾을 수 없습니다.")
+    return await run_search(response, read_db, q, room_id, cursor, limit)
+
+@router.get("/search", response_model=List[MessageDisplay])
+async def search_all_messages(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="검색어"),
+    cursor: Optional[str] = Query(None, description="이전 페이지의 X-Next-Cursor 값"),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """모든 채팅방의 메시지를 관련도순으로 검색합니다."""
+    return await run_search(response, db, q, None, cursor, limit)
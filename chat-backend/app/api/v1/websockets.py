@@ -3,115 +3,343 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
-from app.crud import users as crud_users
-from app.crud import rooms as crud_rooms # rooms CRUD 모듈 임포트 확인
-from app.services.redis_manager import redis_manager
-from app.services.message_queue import message_queue
+from app.services.principal_cache import principal_cache
+from app.services.room_hub import room_hub
+from app.services.connection import Connection, encode_frame
+from app.services.history_cache import history_cache
+from app.services.presence import presence
+from app.services.admission import admission
+from app.services.rate_limiter import user_message_limiter, room_message_limiter
+from app.core import metrics
+from app.services.message_publisher import message_publisher, message_frame
+from app.services.id_allocator import IdsUnavailable
+from app.crud import messages as crud_messages
+from app.core.config import get_settings
 from app.core.security import decode_access_token
-from app.db.models import User
-import json
-import asyncio
+from app.schemas.user import UserInDB
+from app.core.serialization import WIRE_FORMATS, dumps, loads, msgpack_loads
+from typing import Optional
+import logging
 
+settings = get_settings()
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-active_connections: dict[int, list[WebSocket]] = {}
+class FrameTooLarge(Exception):
+    pass
 
-@router.websocket("/ws/chat/{room_id}")
-async def websocket_endpoint(
-    websocket: WebSocket,
-    room_id: int,
-    token: str = Query(...),
-    db: AsyncSession = Depends(get_db)
-):
-    # 1. JWT 인증 및 사용자 정보 조회
+async def receive_payload(websocket: WebSocket, binary: bool = False, max_bytes: int = settings.MAX_FRAME_BYTES) -> dict:
+    """
+    텍스트(JSON) 또는 바이너리(MessagePack) 프레임을 받아 dict로 디코딩합니다.
+    max_bytes보다 큰 프레임은 디코딩하지 않고 FrameTooLarge를 던집니다.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+    data = message["bytes"] if message.get("bytes") is not None else message["text"]
+    # 텍스트는 글자 수가 바이트 수 이하이므로, 글자 수로 먼저 걸러 인코딩 비용을 아낍니다.
+    if max_bytes > 0 and len(data) > max_bytes and (isinstance(data, bytes) or len(data.encode()) > max_bytes):
+        raise FrameTooLarge(len(data))
+    if isinstance(data, bytes):
+        return msgpack_loads(data) if binary else loads(data)
+    return loads(data)
+
+async def check_rate_limits(user_id: int, room_id: int) -> float:
+    """
+    사용자/방 토큰 버킷을 차례로 확인합니다. 통과하면 0, 아니면 재시도까지의 시간(초).
+    방 버킷에 걸리면 보내지 않은 메시지이므로 사용자 버킷에서 쓴 토큰을 돌려줍니다.
+    """
+    wait = await user_message_limiter.hit(user_id)
+    if wait:
+        metrics.MESSAGES_RATE_LIMITED.inc(scope="user")
+        return wait
+    wait = await room_message_limiter.hit(room_id)
+    if wait:
+        metrics.MESSAGES_RATE_LIMITED.inc(scope="room")
+        await user_message_limiter.refund(user_id)
+    return wait
+
+async def catch_up(connection: Connection, db: AsyncSession, room_id: int, since: int) -> Optional[int]:
+    """
+    since 이후 놓친 메시지를 최근 메시지 캐시(없으면 DB)에서 찾아 순서대로 보냅니다.
+    연결은 이미 허브에 등록되어 실시간 프레임이 큐에 쌓이고 있으므로 빈틈이 없고,
+    보낸 마지막 id를 돌려주면 큐의 중복 프레임은 writer가 건너뜁니다.
+    놓친 메시지가 너무 많으면 resync 프레임만 보내고 클라이언트가 히스토리를 다시 조회하게 합니다.
+    """
+    limit = settings.CATCHUP_MAX_MESSAGES
+    missed = await history_cache.get_since(room_id, since)
+    if missed is None:
+        # 캐시 범위보다 오래된 지점: DB에서 읽고, 아직 저장되지 않은 최근 메시지는 캐시에서 합칩니다.
+        rows = await crud_messages.get_messages_for_room(db, room_id=room_id, after=since, limit=limit + 1)
+        merged = {message["id"]: message for message in rows}
+        for message in await history_cache.recent(room_id):
+            if message["id"] > since:
+                merged.setdefault(message["id"], message)
+        missed = sorted(merged.values(), key=lambda m: m["id"])
+    if len(missed) > limit:
+        await connection.send(encode_frame(connection, {"type": "resync", "room_id": room_id}))
+        return None
+    for message in missed:
+        await connection.send(encode_frame(connection, message_frame(message)))
+    return missed[-1]["id"] if missed else since
+
+async def reject_if_overloaded(websocket: WebSocket) -> bool:
+    """
+    과부하 상태면 인증/DB 조회 전에 재시도 힌트와 함께 거절하고 True를 돌려줍니다.
+    close reason이 클라이언트에 전달되도록 accept 후 닫습니다.
+    """
+    rejection = admission.check()
+    if not rejection:
+        return False
+    await websocket.accept()
+    await websocket.send_text(dumps({"type": "overloaded", "reason": rejection.reason, "retry_after": rejection.retry_after}))
+    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=f"retry_after={rejection.retry_after}")
+    return True
+
+async def authenticate(websocket: WebSocket, token: str, db: AsyncSession) -> Optional[UserInDB]:
+    """JWT를 검증하고 사용자를 찾습니다. 실패하면 소켓을 닫고 None을 돌려줍니다."""
     payload = decode_access_token(token)
     if not payload:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid authentication token")
-        return
+        return None
 
     username = payload.get("sub")
     if not username:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token does not contain username")
+        return None
+
+    current_user: UserInDB = await principal_cache.get_user(db, username=username)
+    if not current_user or payload.get("uid", current_user.id) != current_user.id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="User not found")
+        return None
+    return current_user
+
+async def send_chat_message(connection: Connection, user: UserInDB, room_id: int, content: str):
+    """클라이언트가 보낸 메시지를 레이트 리밋을 거쳐 발행합니다. (영속화 큐 추가 포함)"""
+    # 제한에 걸린 메시지는 발행/저장하지 않고 보낸 사람에게만 알립니다.
+    wait = await check_rate_limits(user.id, room_id)
+    if wait:
+        connection.enqueue(encode_frame(connection, {"type": "rate_limited", "room_id": room_id, "retry_after": round(wait, 3)}))
+        return
+    # 저장은 나중에 배치로 이루어지므로 id와 시각은 지금 정합니다.
+    # id 발급, 최근 메시지 캐시 추가, 발행, 영속화 큐 추가가 Redis 왕복 한 번으로 처리되며 브로드캐스트 프레임은 한 번만 인코딩됩니다.
+    # id와 timestamp가 함께 가므로 클라이언트는 따로 히스토리를 다시 조회할 필요가 없습니다.
+    try:
+        await message_publisher.publish(room_id, user.id, user.username, content)
+    except IdsUnavailable:
+        # Redis가 끊긴 동안에는 다른 노드와 id가 겹치지 않도록 보내지 않고 보낸 사람에게 알립니다.
+        connection.enqueue(encode_frame(connection, {"type": "unavailable", "room_id": room_id, "retry_after": settings.ADMISSION_RETRY_AFTER_SECONDS}))
+
+@router.websocket("/ws/chat/{room_id}")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    room_id: int,
+    token: str = Query(...),
+    wire_format: str = Query("json", alias="format"), # "json" 또는 "msgpack" (바이너리 프레임)
+    since: Optional[int] = Query(None), # 재접속 시 마지막으로 받은 메시지 id
+    db: AsyncSession = Depends(get_db)
+):
+    # 0. 과부하 상태면 바로 거절
+    if await reject_if_overloaded(websocket):
         return
 
-    current_user: User = await crud_users.get_user_by_username(db, username=username)
+    # 1. JWT 인증 및 사용자 정보 조회
+    current_user = await authenticate(websocket, token, db)
     if not current_user:
-        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="User not found")
         return
+    username = current_user.username
 
     # 2. 채팅방 유효성 검사
-    # 이 줄을 변경합니다: crud_rooms.get_room 대신 crud_rooms.get_room_by_id 사용
-    room = await crud_rooms.get_room_by_id(db, room_id=room_id) # <-- 여기! get_room에서 get_room_by_id로 변경
+    room = await principal_cache.get_room(db, room_id=room_id) # 캐시에 있으면 DB 조회 없음
     if not room:
         await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="Chat room not found")
         return
 
+    if wire_format not in WIRE_FORMATS:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=f"Unsupported format: {wire_format}")
+        return
+
     await websocket.accept()
-    print(f"WebSocket accepted for room {room_id} and user {username}")
+    logger.debug("WebSocket accepted room_id=%s user=%s", room_id, username)
+
+    # 3. 방 허브에 등록 (방마다 Redis 구독은 프로세스당 하나만 유지됩니다)
+    connection = Connection(websocket, binary=wire_format == "msgpack", paused=since is not None)
+    if not await room_hub.join(room_id, connection):
+        await connection.close(code=status.WS_1011_INTERNAL_ERROR, reason="Failed to subscribe to room")
+        return
+    if since is not None:
+        # 구독을 먼저 건 뒤 놓친 메시지를 보내고, 그 다음부터 실시간 전달을 시작합니다.
+        try:
+            connection.go_live(room_id, await catch_up(connection, db, room_id, since))
+        except Exception as e:
+            logger.warning("Catch-up failed room_id=%s user=%s: %s", room_id, username, e)
+            await room_hub.leave(room_id, connection)
+            await connection.close(code=status.WS_1011_INTERNAL_ERROR, reason="Catch-up failed")
+            return
+    await presence.join(room_id, current_user.id, current_user.username)
+    admission.opened()
 
-    # 3. Redis pub/sub 구독
-    pubsub = await redis_manager.subscribe(f"chat_{room_id}")
-    if not pubsub:
-        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Failed to connect to Redis")
+    try:
+        # 메시지 수신 (클라이언트 -> 서버). Redis -> 클라이언트 전달은 room_hub가 담당합니다.
+        while True:
+            message_data = await receive_payload(websocket, binary=connection.binary)
+            content = message_data.get("message") if isinstance(message_data, dict) else None
+            if isinstance(content, str) and content:
+                await send_chat_message(connection, current_user, room_id, content)
+
+    except FrameTooLarge as e:
+        logger.info("Frame too large room_id=%s user=%s: %s bytes", room_id, username, e)
+        await connection.close(code=status.WS_1009_MESSAGE_TOO_BIG, reason="Frame too large")
+    except WebSocketDisconnect:
+        logger.debug("WebSocket disconnected room_id=%s user=%s", room_id, username)
+    except RuntimeError as e: # WebSocket closed
+        logger.info("WebSocket closed room_id=%s user=%s: %s", room_id, username, e)
+    except Exception as e:
+        logger.exception("An unexpected error occurred room_id=%s user=%s: %s", room_id, username, e)
+    finally:
+        # 연결 종료 시 허브에서 제거 (마지막 소켓이면 구독도 해제됩니다)
+        admission.closed()
+        await room_hub.leave(room_id, connection)
+        await connection.close()
+        await presence.leave(room_id, current_user.id, current_user.username)
+        logger.debug("Connection closed and cleaned up room_id=%s user=%s", room_id, username)
+
+async def subscribe(connection: Connection, db: AsyncSession, user: UserInDB, room_id: int, since: Optional[int]) -> Optional[str]:
+    """
+    멀티플렉스 연결을 방에 구독시킵니다. 실패하면 에러 코드를 돌려줍니다.
+    since가 있으면 구독하는 동안 writer를 멈추고 놓친 메시지를 먼저 보냅니다. (다른 방 프레임은 잠시 큐에서 대기)
+    """
+    room = await principal_cache.get_room(db, room_id=room_id)
+    if not room:
+        return "room_not_found"
+    if since is not None:
+        connection.pause()
+    if not await room_hub.join(room_id, connection):
+        connection.go_live()
+        return "subscribe_failed"
+    if since is not None:
+        try:
+            connection.go_live(room_id, await catch_up(connection, db, room_id, since))
+        except Exception as e:
+            logger.warning("Catch-up failed room_id=%s user=%s: %s", room_id, user.username, e)
+            connection.go_live()
+            await room_hub.leave(room_id, connection)
+            return "catch_up_failed"
+    await presence.join(room_id, user.id, user.username)
+    return None
+
+async def handle_multiplex_frame(connection: Connection, db: AsyncSession, user: UserInDB, subscribed: set[int], frame):
+    """
+    멀티플렉스 연결의 클라이언트 프레임 하나를 처리합니다.
+    잘못된 프레임에는 error 프레임으로 답하고 연결은 유지합니다. (같은 소켓의 다른 방 구독까지 끊지 않도록)
+    subscribed: presence에 등록한 방 (삭제된 방은 connection.rooms에서 먼저 빠질 수 있음)
+    """
+    def reply(frame: dict):
+        connection.enqueue(encode_frame(connection, frame))
+
+    if not isinstance(frame, dict):
+        reply({"type": "error", "room_id": None, "error": "invalid_frame"})
+        return
+    kind = frame.get("type")
+    room_id = frame.get("room_id")
+    if not isinstance(room_id, int) or isinstance(room_id, bool):
+        reply({"type": "error", "room_id": None, "error": "invalid_room_id"})
         return
 
-    # 4. 활성 연결 추가
-    if room_id not in active_connections:
-        active_connections[room_id] = []
-    active_connections[room_id].append(websocket)
+    if kind == "subscribe":
+        if room_id in subscribed:
+            # 구독 중에 방이 삭제됐다면 허브에서는 이미 빠져 있습니다.
+            if room_id in connection.rooms:
+                reply({"type": "subscribed", "room_id": room_id})
+            else:
+                reply({"type": "error", "room_id": room_id, "error": "room_not_found"})
+            return
+        since = frame.get("since")
+        if since is not None and (not isinstance(since, int) or isinstance(since, bool)):
+            reply({"type": "error", "room_id": room_id, "error": "invalid_since"})
+            return
+        if len(subscribed) >= settings.MULTIPLEX_MAX_ROOMS:
+            reply({"type": "error", "room_id": room_id, "error": "too_many_rooms"})
+            return
+        error = await subscribe(connection, db, user, room_id, since)
+        if error:
+            reply({"type": "error", "room_id": room_id, "error": error})
+            return
+        subscribed.add(room_id)
+        reply({"type": "subscribed", "room_id": room_id})
+    elif kind == "unsubscribe":
+        if room_id in subscribed:
+            subscribed.discard(room_id)
+            await room_hub.leave(room_id, connection)
+            await presence.leave(room_id, user.id, user.username)
+        reply({"type": "unsubscribed", "room_id": room_id})
+    elif kind == "send":
+        content = frame.get("message")
+        if room_id not in connection.rooms:
+            reply({"type": "error", "room_id": room_id, "error": "not_subscribed"})
+        elif not isinstance(content, str) or not content:
+            reply({"type": "error", "room_id": room_id, "error": "invalid_message"})
+        else:
+            await send_chat_message(connection, user, room_id, content)
+    else:
+        reply({"type": "error", "room_id": room_id, "error": "unknown_type"})
+
+@router.websocket("/ws")
+async def multiplex_endpoint(
+    websocket: WebSocket,
+    token: str = Query(...),
+    wire_format: str = Query("json", alias="format"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    소켓 하나로 여러 방을 다루는 엔드포인트입니다. 인증은 접속할 때 한 번만 합니다.
+    클라이언트 프레임:
+    - {"type": "subscribe", "room_id": 1, "since": 123}  (since는 선택)
+    - {"type": "unsubscribe", "room_id": 1}
+    - {"type": "send", "room_id": 1, "message": "..."}
+    서버 프레임은 모두 room_id를 포함합니다. (message, subscribed, unsubscribed, error, ...)
+    """
+    if await reject_if_overloaded(websocket):
+        return
+
+    current_user = await authenticate(websocket, token, db)
+    if not current_user:
+        return
+    username = current_user.username
+
+    if wire_format not in WIRE_FORMATS:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason=f"Unsupported format: {wire_format}")
+        return
+
+    await websocket.accept()
+    logger.debug("Multiplexed WebSocket accepted user=%s", username)
+
+    connection = Connection(websocket, binary=wire_format == "msgpack", multiplexed=True)
+    subscribed: set[int] = set() # presence에 등록한 방 (삭제된 방은 connection.rooms에서 먼저 빠질 수 있음)
+    admission.opened()
 
     try:
-        # 비동기로 메시지 수신 (클라이언트 -> 서버)
-        async def receive_messages():
-            while True:
-                data = await websocket.receive_text()
-                message_data = json.loads(data)
-                content = message_data.get("message")
-                if content:
-                    message_to_publish = {
-                        "username": current_user.username,
-                        "message": content
-                    }
-                    await redis_manager.publish(f"chat_{room_id}", json.dumps(message_to_publish))
-
-                    await message_queue.add_message({
-                        "room_id": room_id,
-                        "sender_id": current_user.id,
-                        "content": content
-                    })
-
-        # 비동기로 메시지 구독 (Redis -> 서버 -> 클라이언트)
-        async def listen_to_redis():
-            while True:
-                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
-                if message and message["type"] == "message":
-                    decoded_message = message["data"]
-                    # 현재 방의 모든 연결된 클라이언트에게 메시지 전송
-                    for connection in active_connections[room_id]:
-                        try:
-                            await connection.send_text(decoded_message)
-                        except RuntimeError as e: # WebSocket 연결이 이미 닫혔을 경우
-                            print(f"Failed to send to a client, connection likely closed: {e}")
-                            # 연결이 끊어진 경우 active_connections에서 제거하는 로직 필요
-                            # 이 부분은 좀 더 견고한 처리가 필요할 수 있습니다.
-                            pass
-                await asyncio.sleep(0.01) # CPU 과부하 방지
-
-        # 두 개의 비동기 태스크를 동시에 실행
-        await asyncio.gather(receive_messages(), listen_to_redis())
+        while True:
+            try:
+                frame = await receive_payload(websocket, binary=connection.binary)
+            except ValueError: # JSON/MessagePack으로 디코딩할 수 없는 프레임
+                frame = None
+            await handle_multiplex_frame(connection, db, current_user, subscribed, frame)
 
+    except FrameTooLarge as e:
+        logger.info("Frame too large user=%s: %s bytes", username, e)
+        await connection.close(code=status.WS_1009_MESSAGE_TOO_BIG, reason="Frame too large")
     except WebSocketDisconnect:
-        print(f"WebSocket disconnected for room {room_id} and user {username}")
+        logger.debug("Multiplexed WebSocket disconnected user=%s", username)
     except RuntimeError as e: # WebSocket closed
-        print(f"RuntimeError: {e}")
+        logger.info("Multiplexed WebSocket closed user=%s: %s", username, e)
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.exception("An unexpected error occurred user=%s: %s", username, e)
     finally:
-        # 연결 종료 시 활성 연결에서 제거
-        if websocket in active_connections.get(room_id, []):
-            active_connections[room_id].remove(websocket)
-            if not active_connections[room_id]: # 방에 아무도 없으면 방 제거
-                del active_connections[room_id]
-        await redis_manager.unsubscribe(pubsub, f"chat_{room_id}")
-        await pubsub.close()
-        print(f"Connection closed and cleaned up for room {room_id} and user {username}")
\ No newline at end of file
+        admission.closed()
+        for room_id in subscribed:
+            await room_hub.leave(room_id, connection)
+        await connection.close()
+        for room_id in subscribed:
+            await presence.leave(room_id, current_user.id, username)
+        logger.debug("Multiplexed connection closed and cleaned up user=%s rooms=%s", username, len(subscribed))
@@ -1,5 +1,9 @@
+import os
+import socket
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     SECRET_KEY: str
@@ -7,6 +11,118 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     DATABASE_URL: str
     REDIS_URL: str
+    LOG_LEVEL: str = "INFO"
+    # 이 프로세스(노드)를 구분하는 이름. 기본값은 호스트명-PID
+    NODE_ID: str = Field(default_factory=lambda: f"{socket.gethostname()}-{os.getpid()}")
+
+    # Redis 커넥션 풀 / 재연결
+    REDIS_MAX_CONNECTIONS: int = 100
+    REDIS_SOCKET_TIMEOUT: Optional[float] = None # 구독 연결은 메시지를 무한정 기다리므로 기본은 제한 없음
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5
+    REDIS_HEALTH_CHECK_INTERVAL: int = 15 # 이 간격으로 PING해서 끊긴 연결을 찾아냅니다
+    REDIS_RECONNECT_MAX_BACKOFF_SECONDS: float = 30
+
+    # 방 채널 pub/sub 브로커: "redis" (여러 노드), "memory" (단일 노드/테스트), "auto" (Redis가 없으면 memory)
+    BROKER_BACKEND: str = "redis"
+
+    # DB 엔진 / 커넥션 풀
+    DATABASE_ECHO: bool = False # True면 모든 SQL을 로그로 출력합니다 (개발용)
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100 # asyncpg prepared statement 캐시 (pgbouncer 사용 시 0)
+    PERSISTENCE_POOL_SIZE: int = 2 # 영속화 워커 전용 풀
+    PERSISTENCE_MAX_OVERFLOW: int = 2
+    DATABASE_REPLICA_URL: Optional[str] = None # 히스토리/방 목록 조회용 읽기 복제본
+
+    # 메시지 영속화(write-behind) 파이프라인 설정
+    MESSAGE_QUEUE_BATCH_SIZE: int = 500 # 한 번에 INSERT 할 최대 행 수
+    MESSAGE_QUEUE_BATCH_INTERVAL_MS: int = 50 # 배치를 모으기 위해 기다리는 최대 시간
+    MESSAGE_QUEUE_WORKERS: int = 1 # 동시에 DB에 쓰는 워커 수
+    MESSAGE_QUEUE_HIGH_WATER: int = 10000 # 이 이상 쌓이면 add_message가 대기합니다 (backpressure)
+    MESSAGE_QUEUE_BACKEND: str = "memory" # "memory" (개발용) 또는 "redis_stream"
+    MESSAGE_QUEUE_CONSUMER: bool = True # False면 이 노드는 발행만 하고 DB 저장은 persister가 담당합니다
+    MESSAGE_QUEUE_STREAM: str = "chat_messages"
+    MESSAGE_QUEUE_GROUP: str = "persisters"
+    MESSAGE_QUEUE_CLAIM_IDLE_MS: int = 60000 # 이 시간 이상 ack되지 않은 항목은 다른 consumer가 회수합니다
+    MESSAGE_QUEUE_MAX_DELIVERIES: int = 10 # 이보다 많이 전달된 항목은 회수하지 않고 "{stream}:dead"로 옮깁니다 (0이면 무제한)
+
+    # 방별 최근 메시지 캐시 (첫 히스토리 페이지를 DB 없이 응답)
+    HISTORY_CACHE_SIZE: int = 100
+    HISTORY_CACHE_TTL_SECONDS: int = 86400
+
+    # 인증된 사용자 / 채팅방 조회 캐시 (프로세스 내)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # GET /rooms 페이지 캐시 (프로세스 내, 방 생성/삭제 시 비움)
+    ROOM_LIST_CACHE_SIZE: int = 1000
+    ROOM_LIST_CACHE_TTL_SECONDS: int = 5
+
+    # 삭제된 방의 메시지를 백그라운드에서 나눠 지우는 작업
+    ROOM_PURGE_BATCH_SIZE: int = 5000 # 트랜잭션 하나에서 지우는 메시지 수
+    ROOM_PURGE_PAUSE_MS: int = 50 # 배치 사이 대기 (다른 쓰기에 잠금을 양보)
+    ROOM_PURGE_PROGRESS_TTL_SECONDS: int = 3600 # 끝난 삭제 작업의 진행 상황을 보관하는 시간
+    ROOM_PURGE_GRACE_SECONDS: int = 5 # 삭제 표시 전에 영속화 배치에 들어간 메시지가 커밋되도록 기다리는 시간
+
+    # 재접속 시 ?since= 이후 놓친 메시지를 다시 보내는 최대 개수 (넘으면 resync 프레임으로 히스토리 재조회 요청)
+    CATCHUP_MAX_MESSAGES: int = 500
+
+    # 방 히스토리 NDJSON 내보내기 / 가져오기
+    EXPORT_CHUNK_SIZE: int = 1000 # 서버 측 커서에서 한 번에 가져오는 행 수
+    IMPORT_BATCH_SIZE: int = 1000 # 가져오기 시 INSERT 한 번에 넣는 행 수
+
+    # 메시지 월별 파티션(PostgreSQL)과 콜드 보관
+    MESSAGE_PARTITION_MONTHS_AHEAD: int = 2 # 미리 만들어 둘 다음 달 파티션 수
+    MESSAGE_RETENTION_DAYS: int = 0 # 이보다 오래된 메시지는 세그먼트 파일로 옮깁니다 (0이면 보관 처리 안 함)
+    MESSAGE_ARCHIVE_DIR: str = "archive" # 여러 노드로 운영하면 모든 노드가 마운트한 공유 저장소(NFS 등)여야 합니다
+    MESSAGE_ARCHIVE_SEGMENT_SIZE: int = 5000 # 세그먼트 파일 하나에 담는 메시지 수
+    MESSAGE_ARCHIVE_INTERVAL_SECONDS: int = 3600 # 파티션 유지보수 / 보관 작업 주기
+    MESSAGE_ARCHIVE_CACHE_SEGMENTS: int = 8 # 메모리에 풀어 둘 최근 세그먼트 수
+
+    # 전문 검색 (PostgreSQL 텍스트 검색 설정. 한국어는 형태소 분석기가 없으므로 simple)
+    SEARCH_TS_CONFIG: str = "simple"
+
+    # bcrypt 해시/검증 스레드 풀
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 100 # 대기열이 이 이상이면 503으로 거절합니다
+
+    # 웹소켓 소켓별 전송 큐
+    SEND_QUEUE_SIZE: int = 256
+    SLOW_CONSUMER_POLICY: str = "disconnect" # "disconnect", "drop_oldest", "drop_newest"
+
+    # 웹소켓 수신 제한 (0이면 제한 없음)
+    MAX_FRAME_BYTES: int = 16384 # 이보다 큰 프레임을 보내면 연결을 끊습니다
+    RATE_LIMIT_USER_PER_SECOND: float = 5 # 사용자별 메시지 토큰 버킷
+    RATE_LIMIT_USER_BURST: int = 20
+    RATE_LIMIT_ROOM_PER_SECOND: float = 100 # 방 전체 메시지 토큰 버킷
+    RATE_LIMIT_ROOM_BURST: int = 300
+    RATE_LIMIT_GLOBAL: bool = False # True면 Redis에 버킷을 두고 모든 노드가 같이 셉니다
+    RATE_LIMIT_MAX_KEYS: int = 100000 # 프로세스 내 버킷 최대 개수
+
+    MULTIPLEX_MAX_ROOMS: int = 100 # /ws 연결 하나가 구독할 수 있는 최대 방 수
+
+    # 새 접속 admission control / load shedding (0이면 해당 검사 안 함)
+    MAX_CONNECTIONS_PER_NODE: int = 10000
+    ADMISSION_MAX_QUEUE_DEPTH: int = 8000 # 영속화 큐가 이만큼 밀려 있으면 새 접속 거절
+    ADMISSION_MAX_LOOP_LAG_MS: int = 200 # 이벤트 루프 지연이 이 이상이면 새 접속 거절
+    ADMISSION_SAMPLE_INTERVAL_SECONDS: float = 0.5
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5 # 거절할 때 클라이언트에 주는 재시도 힌트
+
+    # 배포 전 drain (POST /admin/drain 또는 DRAIN_SIGNAL)
+    DRAIN_TOKEN: Optional[str] = None # X-Drain-Token 헤더로 확인. 없으면 엔드포인트로는 시작할 수 없습니다
+    DRAIN_SIGNAL: Optional[str] = "SIGUSR1" # 이 시그널을 받으면 drain을 시작합니다
+    DRAIN_FLUSH_TIMEOUT_SECONDS: float = 10 # 영속화 큐를 비우며 기다리는 최대 시간
+    DRAIN_WAVE_SIZE: int = 200 # 한 번에 닫는 소켓 수
+    DRAIN_WAVE_INTERVAL_MS: int = 250
+    DRAIN_RECONNECT_MIN_MS: int = 1000 # reconnect 프레임에 담는 무작위 재접속 지연 범위
+    DRAIN_RECONNECT_MAX_MS: int = 15000
+
+    # 접속자(presence) 레지스트리
+    PRESENCE_TTL_SECONDS: int = 45 # heartbeat가 끊긴 노드의 항목이 사라지는 시간
+    PRESENCE_HEARTBEAT_SECONDS: int = 15
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
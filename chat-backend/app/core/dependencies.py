@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.core.security import decode_access_token
-from app.crud.users import get_user_by_username
+from app.services.principal_cache import principal_cache
 from app.db.models import User # User 모델 import
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -20,7 +20,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
-    user = await get_user_by_username(db, username=username)
+    # 캐시에 있으면 DB 조회 없이 인증이 끝납니다.
+    user = await principal_cache.get_user(db, username=username)
     if user is None:
         raise credentials_exception
+    # 같은 이름으로 다시 가입한 다른 사용자의 토큰이 아닌지 확인합니다.
+    user_id = payload.get("uid")
+    if user_id is not None and user_id != user.id:
+        raise credentials_exception
     return user
\ No newline at end of file
@@ -0,0 +1,10 @@
+import logging
+from app.core.config import get_settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+def configure_logging():
+    """LOG_LEVEL 설정에 맞춰 앱 로거를 구성합니다. 메시지 단위 로그는 DEBUG에서만 출력됩니다."""
+    settings = get_settings()
+    logging.basicConfig(level=settings.LOG_LEVEL.upper(), format=LOG_FORMAT)
+    logging.getLogger("app").setLevel(settings.LOG_LEVEL.upper())
@@ -0,0 +1,213 @@
+"""
+Prometheus 텍스트 포맷으로 내보내는 최소한의 계측 모듈입니다. (외부 의존성 없음)
+핫 패스에서는 dict 갱신만 하고, 문자열 변환은 /metrics 요청 때만 합니다.
+"""
+import inspect
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+
+LabelKey = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class _Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = tuple(zip(self.labelnames, key)) + extra
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    @abstractmethod
+    async def render(self) -> List[str]:
+        """샘플 줄(HELP/TYPE 제외)을 돌려줍니다."""
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    async def render(self) -> List[str]:
+        return [f"{self.name}{self._labels(key)} {value}" for key, value in self.values.items()]
+
+class Gauge(_Metric):
+    """
+    값을 직접 set/inc/dec 하거나, set_function()으로 수집 시점에 계산하게 할 수 있습니다.
+    함수는 숫자 또는 {라벨 튜플: 값} dict를 돌려주며, 코루틴이어도 됩니다.
+    """
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[LabelKey, float] = {}
+        self.function: Optional[Callable[[], Any]] = None
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], Any]):
+        self.function = function
+
+    async def render(self) -> List[str]:
+        values = self.values
+        if self.function is not None:
+            result = self.function()
+            if inspect.isawaitable(result):
+                result = await result
+            values = result if isinstance(result, dict) else {(): result}
+        return [f"{self.name}{self._labels(key)} {value}" for key, value in values.items()]
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        # 라벨별 [버킷별 개수..., +Inf 개수], 합계
+        self.counts: Dict[LabelKey, List[int]] = {}
+        self.sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    async def render(self) -> List[str]:
+        lines = []
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labels(key, (('le', str(bound)),))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{self._labels(key, (('le', '+Inf'),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {self.sums[key]}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    async def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                samples = await metric.render()
+            except Exception as e: # 수집 함수 하나의 실패가 전체 응답을 막지 않도록
+                samples = []
+                lines.append(f"# {metric.name} collection failed: {_escape(str(e))}")
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- 웹소켓 / 브로드캐스트 ---
+# room_id 같은 값이 무한히 늘어나는 라벨은 시계열 수가 폭증하므로 쓰지 않습니다. (방별 수치는 /rooms의 presence로 봅니다)
+ACTIVE_CONNECTIONS = registry.gauge("chat_active_connections", "Open websocket connections on this process.")
+ACTIVE_ROOMS = registry.gauge("chat_active_rooms", "Rooms with at least one websocket connection on this process.")
+BROADCAST_SECONDS = registry.histogram("chat_broadcast_fanout_seconds", "Time to fan one message out to the local sockets of a room.")
+BROADCAST_RECIPIENTS = registry.histogram("chat_broadcast_recipients", "Local sockets a message was fanned out to.", buckets=(1, 5, 10, 50, 100, 500, 1000, 5000))
+SOCKET_SEND_SECONDS = registry.histogram("chat_socket_send_seconds", "Time spent in a single websocket send.")
+SLOW_CONSUMER_EVICTIONS = registry.counter("chat_slow_consumer_evictions_total", "Sockets disconnected because their send queue overflowed.")
+CONNECTIONS_REJECTED = registry.counter("chat_connections_rejected_total", "Websocket connects refused by admission control.", ("reason",))
+MESSAGES_RATE_LIMITED = registry.counter("chat_messages_rate_limited_total", "Incoming chat messages dropped by a rate limit.", ("scope",))
+EVENT_LOOP_LAG_SECONDS = registry.histogram("chat_event_loop_lag_seconds", "How late the event loop woke up for a scheduled sleep.")
+
+# --- 영속화 큐 ---
+MESSAGE_QUEUE_DEPTH = registry.gauge("chat_message_queue_depth", "Messages waiting to be written to the database.")
+BATCH_COMMIT_SECONDS = registry.histogram("chat_message_batch_commit_seconds", "Time to insert and commit one persistence batch.")
+BATCH_SIZE = registry.histogram("chat_message_batch_size", "Messages per persistence batch.", buckets=(1, 10, 50, 100, 250, 500, 1000))
+MESSAGES_PERSISTED = registry.counter("chat_messages_persisted_total", "Messages written to the database.")
+PERSIST_FAILURES = registry.counter("chat_message_batch_failures_total", "Persistence batches that failed to commit.")
+MESSAGES_DEAD_LETTERED = registry.counter("chat_messages_dead_lettered_total", "Queued messages that could not be saved and were moved to the dead letter queue.")
+
+ROOM_PURGED_MESSAGES = registry.counter("chat_room_purged_messages_total", "Messages deleted by the background room purger.")
+MESSAGES_ARCHIVED = registry.counter("chat_messages_archived_total", "Messages moved from the database into archive segments.")
+
+# --- Redis ---
+REDIS_PUBLISH_SECONDS = registry.histogram("chat_redis_publish_seconds", "Latency of Redis PUBLISH.")
+REDIS_SUBSCRIBE_SECONDS = registry.histogram("chat_redis_subscribe_seconds", "Latency of Redis SUBSCRIBE for a room.")
+
+# --- DB ---
+DB_QUERY_SECONDS = registry.histogram("chat_db_query_seconds", "Database statement execution time.", ("operation",))
+
+# --- 비밀번호 해시 풀 ---
+PASSWORD_HASH_WAIT_SECONDS = registry.histogram("chat_password_hash_wait_seconds", "Time a bcrypt job waited for a pool thread.")
+PASSWORD_HASH_QUEUED = registry.gauge("chat_password_hash_queued", "bcrypt jobs waiting for a pool thread.")
+
+def instrument_engine(engine):
+    """SQLAlchemy 이벤트 훅으로 모든 쿼리의 실행 시간을 DB_QUERY_SECONDS에 기록합니다."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
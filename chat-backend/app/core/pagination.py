@@ -0,0 +1,19 @@
+import base64
+import json
+from typing import Any
+
+# 다음 페이지 커서를 돌려줄 때 사용하는 응답 헤더 (본문은 기존처럼 리스트 그대로 유지)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(value: Any) -> str:
+    """커서 값을 클라이언트에게 내려줄 불투명(opaque) 문자열로 인코딩합니다."""
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Any:
+    """encode_cursor로 만든 문자열을 원래 값으로 되돌립니다. 형식이 잘못되면 ValueError를 던집니다."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,18 +1,79 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Callable, Any
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import get_settings
+from app.core.metrics import PASSWORD_HASH_WAIT_SECONDS, PASSWORD_HASH_QUEUED
 
 settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+class PasswordHashPoolBusy(Exception):
+    """비밀번호 해시 작업 대기열이 가득 찼을 때 발생합니다."""
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+class PasswordHashPool:
+    """
+    bcrypt 해시/검증을 이벤트 루프 밖의 스레드 풀에서 실행합니다.
+    bcrypt는 계산 중 GIL을 놓기 때문에 로그인이 몰려도 웹소켓 전달이 멈추지 않습니다.
+    - 동시에 실행되는 작업 수는 max_workers, 대기열 길이는 max_pending으로 제한합니다.
+    - 대기열 깊이와 대기 시간을 stats()로 확인할 수 있습니다.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self.in_flight = 0 # 제출됐지만 아직 끝나지 않은 작업 (실행 중 + 대기 중)
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        if self.queued >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashPoolBusy()
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            return started, func(*args)
+
+        self.in_flight += 1
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(self.executor, job)
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.total_wait += started - submitted
+        PASSWORD_HASH_WAIT_SECONDS.observe(started - submitted)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": (self.total_wait / self.completed * 1000) if self.completed else 0.0,
+        }
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+PASSWORD_HASH_QUEUED.set_function(lambda: password_hash_pool.queued)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
+    return await password_hash_pool.run(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
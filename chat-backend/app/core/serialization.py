@@ -0,0 +1,44 @@
+"""
+브로드캐스트 프레임 인코딩 유틸리티입니다.
+orjson / msgpack이 설치되어 있으면 사용하고, 없으면 표준 json으로 동작합니다.
+"""
+import json
+from datetime import datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError: # 선택 의존성
+    orjson = None
+
+try:
+    import msgpack
+except ImportError: # 선택 의존성
+    msgpack = None
+
+# 클라이언트가 접속 시 ?format= 으로 고를 수 있는 전송 포맷
+WIRE_FORMATS = ("json", "msgpack") if msgpack else ("json",)
+
+def _isoformat(value: Any) -> str:
+    # orjson처럼 datetime은 ISO 8601 문자열로 씁니다.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(obj: Any) -> str:
+    """객체를 JSON 문자열로 인코딩합니다. (웹소켓 텍스트 프레임/Redis 전송용, datetime은 ISO 8601 문자열)"""
+    if orjson:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_isoformat)
+
+def loads(data: str | bytes) -> Any:
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_to_msgpack(data: str) -> bytes:
+    """JSON으로 인코딩된 프레임을 MessagePack 바이너리 프레임으로 변환합니다."""
+    return msgpack.packb(loads(data), use_bin_type=True)
+
+def msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
@@ -0,0 +1,23 @@
+"""
+기다리지 않고 띄우는 백그라운드 태스크 유틸리티입니다.
+이벤트 루프는 태스크를 약한 참조로만 들고 있으므로, 참조를 잡아 두지 않으면 끝나기 전에 GC될 수 있습니다.
+"""
+import asyncio
+import logging
+from typing import Coroutine, Set
+
+logger = logging.getLogger(__name__)
+
+_background_tasks: Set[asyncio.Task] = set()
+
+def _done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task failed: %s", task.exception(), exc_info=task.exception())
+
+def spawn(coro: Coroutine) -> asyncio.Task:
+    """코루틴을 태스크로 띄우고 끝날 때까지 참조를 유지합니다. 실패하면 로그만 남깁니다."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_done)
+    return task
@@ -0,0 +1,205 @@
+"""
+보관 기간이 지난 메시지의 콜드 저장소입니다.
+방별로 오래된 메시지를 id 순서대로 최대 segment_size개씩 gzip NDJSON 파일(세그먼트)로 옮기고,
+message_segments 테이블에 id 범위를 기록한 뒤 DB에서 지웁니다.
+가져온 메시지는 예전 timestamp에 새(큰) id를 받으므로, 보관된 id 범위는 DB에 남은 메시지와 겹칠 수 있습니다.
+그래서 조회는 id 범위가 페이지와 겹치는 세그먼트를 골라 DB 행과 id 순서대로 합칩니다.
+세그먼트 파일은 모든 노드가 읽으므로 MESSAGE_ARCHIVE_DIR은 공유 저장소여야 합니다.
+파일이 없으면(다른 노드의 로컬 디렉터리 등) 경고만 남기고 그 세그먼트를 빼고 응답합니다.
+"""
+import asyncio
+import gzip
+import heapq
+import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.serialization import dumps, loads
+from app.db.models import ChatMessage, ChatRoom, MessageSegment, User
+from app.crud import search as crud_search
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 최근에 읽은 세그먼트 (같은 세그먼트 안에서 페이지를 넘길 때 파일을 다시 풀지 않도록)
+_segment_cache = TTLCache(settings.MESSAGE_ARCHIVE_CACHE_SEGMENTS, 300)
+
+def _full_path(path: str) -> str:
+    return os.path.join(settings.MESSAGE_ARCHIVE_DIR, path)
+
+def _write_file(path: str, messages: List[dict]):
+    full = _full_path(path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    # 다 쓴 뒤에 이름을 바꾸므로 읽는 쪽이 쓰다 만 파일을 보지 않습니다.
+    with gzip.open(full + ".tmp", "wt", encoding="utf-8") as f:
+        for message in messages:
+            f.write(dumps(message) + "\n")
+    os.replace(full + ".tmp", full)
+
+def _read_file(path: str) -> List[dict]:
+    with gzip.open(_full_path(path), "rt", encoding="utf-8") as f:
+        return [loads(line) for line in f if line.strip()]
+
+async def _load(segment: MessageSegment) -> List[dict]:
+    try:
+        return await asyncio.to_thread(_read_file, segment.path)
+    except FileNotFoundError:
+        logger.warning("Archive segment %s of room %s is missing; skipping it", segment.path, segment.room_id)
+        return []
+
+async def read_segment(segment: MessageSegment) -> List[dict]:
+    """세그먼트의 메시지를 id 오름차순으로 돌려줍니다. (MessageDisplay 형태, timestamp는 ISO 문자열)"""
+    messages = _segment_cache.get(segment.path)
+    if messages is None:
+        messages = await _load(segment)
+        if messages: # 없는 파일은 나중에 생길 수 있으므로 캐시하지 않습니다
+            _segment_cache.set(segment.path, messages)
+    return messages
+
+async def get_segments(
+    db: AsyncSession,
+    room_id: int,
+    below: Optional[int] = None,
+    above: Optional[int] = None,
+    oldest_first: bool = False,
+) -> List[MessageSegment]:
+    """
+    below보다 작은 id와 above보다 큰 id를 (둘 다 주면 모두) 담을 수 있는 세그먼트를 돌려줍니다.
+    기본은 max_id 내림차순, oldest_first면 min_id 오름차순입니다.
+    """
+    query = select(MessageSegment).filter(MessageSegment.room_id == room_id)
+    if below is not None:
+        query = query.filter(MessageSegment.min_id < below)
+    if above is not None:
+        query = query.filter(MessageSegment.max_id > above)
+    order = MessageSegment.min_id if oldest_first else MessageSegment.max_id.desc()
+    result = await db.execute(query.order_by(order))
+    return list(result.scalars().all())
+
+def _by_id(message: dict) -> int:
+    return message["id"]
+
+async def read_before(db: AsyncSession, room_id: int, rows: List[dict], before: Optional[int], limit: int) -> List[dict]:
+    """
+    DB에서 읽은 최신순 페이지(rows)에 before보다 오래된 보관 메시지를 합쳐 최신순 limit개를 돌려줍니다.
+    rows가 가득 찼으면 max_id가 rows의 가장 작은 id보다 큰 세그먼트만 읽으므로, 겹치는 세그먼트가 없으면 파일을 열지 않습니다.
+    """
+    floor = rows[-1]["id"] if len(rows) >= limit else None
+    page = list(rows)
+    for segment in await get_segments(db, room_id, below=before, above=floor):
+        if len(page) >= limit and segment.max_id < page[-1]["id"]:
+            break # 뒤 세그먼트는 max_id가 더 작으므로 페이지에 들어올 메시지가 없습니다
+        seen = {m["id"] for m in page}
+        archived = [m for m in await read_segment(segment) if (before is None or m["id"] < before) and m["id"] not in seen]
+        page = sorted(page + archived, key=_by_id, reverse=True)[:limit]
+    return page
+
+async def read_after(db: AsyncSession, room_id: int, rows: List[dict], after: int, limit: int) -> List[dict]:
+    """after 이후의 최신순 페이지(rows)에 after보다 새로운 보관 메시지를 합쳐 after 바로 다음 limit개를 최신순으로 돌려줍니다."""
+    oldest_first = sorted(rows, key=_by_id)
+    ceiling = oldest_first[-1]["id"] if len(rows) >= limit else None
+    for segment in await get_segments(db, room_id, below=ceiling, above=after, oldest_first=True):
+        if len(oldest_first) >= limit and segment.min_id > oldest_first[-1]["id"]:
+            break # 뒤 세그먼트는 min_id가 더 크므로 페이지에 들어올 메시지가 없습니다
+        seen = {m["id"] for m in oldest_first}
+        archived = [m for m in await read_segment(segment) if m["id"] > after and m["id"] not in seen]
+        oldest_first = sorted(oldest_first + archived, key=_by_id)[:limit]
+    return list(reversed(oldest_first))
+
+async def stream_archived(db: AsyncSession, room_id: int) -> AsyncIterator[dict]:
+    """
+    방의 보관된 메시지를 id 오름차순으로 내보냅니다.
+    세그먼트를 min_id 순으로 읽으며, id 범위가 겹치는 세그먼트만 함께 메모리에 올립니다.
+    """
+    pending: list = [] # (id, message) 힙
+    for segment in await get_segments(db, room_id, oldest_first=True):
+        while pending and pending[0][0] < segment.min_id:
+            yield heapq.heappop(pending)[1]
+        for message in await _load(segment):
+            heapq.heappush(pending, (message["id"], message))
+    while pending:
+        yield heapq.heappop(pending)[1]
+
+async def merge_by_id(left: AsyncIterator[dict], right: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """id 오름차순인 두 스트림을 id 순서대로 합칩니다. left를 먼저 한 번 읽습니다."""
+    a = await anext(left, None)
+    b = await anext(right, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a["id"] <= b["id"]):
+            yield a
+            a = await anext(left, None)
+        else:
+            yield b
+            b = await anext(right, None)
+
+def rooms_with_messages_before(cutoff: datetime):
+    """
+    cutoff 이전 메시지가 있는 방 id를 고르는 쿼리입니다.
+    메시지 테이블 전체를 훑지 않도록 방마다 (room_id, timestamp) 인덱스를 한 번씩만 탐색합니다.
+    (삭제 표시만 된 방도 메시지가 남아 있으면 포함합니다)
+    """
+    older = select(ChatMessage.id).filter(ChatMessage.room_id == ChatRoom.id, ChatMessage.timestamp < cutoff)
+    return select(ChatRoom.id).filter(older.exists()).order_by(ChatRoom.id)
+
+async def get_rooms_with_messages_before(db: AsyncSession, cutoff: datetime) -> List[int]:
+    result = await db.execute(rooms_with_messages_before(cutoff))
+    return list(result.scalars().all())
+
+async def archive_room_batch(db: AsyncSession, room_id: int, cutoff: datetime, limit: int) -> int:
+    """
+    cutoff 이전 메시지 중 가장 오래된 최대 limit개를 세그먼트 파일로 옮기고 DB에서 지운 뒤 커밋합니다.
+    옮긴 개수를 돌려줍니다. 파일을 쓴 뒤 커밋 전에 죽으면 다음 실행이 같은 범위를 같은 파일명으로 다시 씁니다.
+    """
+    result = await db.execute(
+        select(ChatMessage.id, ChatMessage.room_id, ChatMessage.sender_id, User.username,
+               ChatMessage.content, ChatMessage.timestamp)
+        .join(User, ChatMessage.sender_id == User.id)
+        .filter(ChatMessage.room_id == room_id, ChatMessage.timestamp < cutoff)
+        .order_by(ChatMessage.id)
+        .limit(limit)
+    )
+    messages = [
+        {"id": msg_id, "room_id": msg_room_id, "sender_id": sender_id, "sender_username": username,
+         "content": content, "timestamp": timestamp.isoformat()}
+        for msg_id, msg_room_id, sender_id, username, content, timestamp in result.all()
+    ]
+    if not messages:
+        return 0
+    ids = [m["id"] for m in messages]
+    path = os.path.join(f"room_{room_id}", f"{ids[0]}-{ids[-1]}.ndjson.gz")
+    await asyncio.to_thread(_write_file, path, messages)
+
+    timestamps = [datetime.fromisoformat(m["timestamp"]) for m in messages]
+    try:
+        await db.execute(insert(MessageSegment).values(
+            room_id=room_id, min_id=ids[0], max_id=ids[-1], message_count=len(messages),
+            first_timestamp=min(timestamps), last_timestamp=max(timestamps), path=path,
+        ))
+    except IntegrityError:
+        # 다른 프로세스가 같은 범위를 먼저 보관했습니다. (파일 내용은 같으므로 그대로 둡니다)
+        await db.rollback()
+        logger.warning("Segment %s of room %s was already archived by another process", path, room_id)
+        return 0
+    await crud_search.unindex_messages(db, ids)
+    await db.execute(delete(ChatMessage).where(ChatMessage.id.in_(ids)).execution_options(synchronize_session=False))
+    await db.commit()
+    return len(messages)
+
+async def delete_segments(db: AsyncSession, room_id: int) -> int:
+    """방의 세그먼트 파일과 기록을 지우고 커밋합니다. (방 삭제 정리용)"""
+    segments = await get_segments(db, room_id)
+    for segment in segments:
+        _segment_cache.invalidate(segment.path)
+        try:
+            await asyncio.to_thread(os.remove, _full_path(segment.path))
+        except FileNotFoundError:
+            pass
+    await db.execute(delete(MessageSegment).where(MessageSegment.room_id == room_id))
+    await db.commit()
+    return len(segments)
@@ -1,28 +1,146 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc
-from app.db.models import ChatMessage, User
-from app.schemas.message import MessageCreate
+from sqlalchemy import desc, insert, update, delete, func, bindparam, case, or_, text
+from app.db.models import ChatMessage, ChatRoom, User
+from app.crud import search as crud_search
+from app.crud import archive as crud_archive
 
-async def get_messages_for_room(db: AsyncSession, room_id: int, skip: int = 0, limit: int = 100):
-    result = await db.execute(
+# create_all은 이미 있는 테이블에 인덱스를 추가하지 않으므로 기존 DB에는 시작할 때 만듭니다. (이름 -> 컬럼)
+MESSAGE_INDEXES = {
+    "ix_chat_messages_room_id_id": "room_id, id",
+    "ix_chat_messages_room_id_timestamp": "room_id, timestamp",
+}
+
+async def create_message_indexes(conn: AsyncConnection):
+    """chat_messages의 조회용 인덱스가 없으면 만듭니다. 여러 번 실행해도 안전합니다."""
+    for name, columns in MESSAGE_INDEXES.items():
+        await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON chat_messages ({columns})"))
+
+async def get_messages_for_room(
+    db: AsyncSession,
+    room_id: int,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = 100,
+):
+    """
+    방의 메시지를 id 기준 keyset 페이지네이션으로 조회합니다. (최신 메시지가 먼저)
+    - before: 이 id보다 오래된 메시지 (과거 방향으로 스크롤)
+    - after: 이 id보다 새로운 메시지 (최신 방향으로 따라잡기)
+    OFFSET을 쓰지 않으므로 (room_id, id) 인덱스 덕분에 깊이에 관계없이 비용이 같습니다.
+    커서가 보관 기간이 지나 세그먼트 파일로 옮겨진 구간에 닿으면 그 파일에서 이어서 읽습니다.
+    """
+    query = (
         select(ChatMessage, User.username)
         .join(User, ChatMessage.sender_id == User.id)
         .filter(ChatMessage.room_id == room_id)
-        .order_by(desc(ChatMessage.timestamp)) # 최신 메시지가 먼저 오도록
-        .offset(skip)
-        .limit(limit)
     )
+    if after is not None:
+        # 바로 다음 메시지들을 가져온 뒤 최신순으로 뒤집습니다.
+        query = query.filter(ChatMessage.id > after).order_by(ChatMessage.id)
+    else:
+        if before is not None:
+            query = query.filter(ChatMessage.id < before)
+        query = query.order_by(desc(ChatMessage.id))
+    result = await db.execute(query.limit(limit))
+    rows = result.all()
+    if after is not None:
+        rows.reverse()
     # 조인 결과를 MessageDisplay 스키마에 맞게 변환
-    return [
+    messages = [
         {"id": msg.id, "room_id": msg.room_id, "sender_id": msg.sender_id,
          "sender_username": username, "content": msg.content, "timestamp": msg.timestamp}
-        for msg, username in result.all()
+        for msg, username in rows
+    ]
+    if after is not None:
+        return await crud_archive.read_after(db, room_id, messages, after, limit)
+    return await crud_archive.read_before(db, room_id, messages, before, limit)
+
+async def stream_messages_for_room(db: AsyncSession, room_id: int, chunk_size: int = 1000) -> AsyncIterator[dict]:
+    """
+    방의 모든 메시지를 id 오름차순으로 하나씩 내보냅니다. (내보내기용)
+    보관된 세그먼트와 DB의 서버 측 커서(chunk_size개씩)를 id 순서대로 합치므로
+    방 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    query = (
+        select(ChatMessage.id, ChatMessage.room_id, ChatMessage.sender_id, User.username,
+               ChatMessage.content, ChatMessage.timestamp)
+        .join(User, ChatMessage.sender_id == User.id)
+        .filter(ChatMessage.room_id == room_id)
+        .order_by(ChatMessage.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    async def stored() -> AsyncIterator[dict]:
+        result = await db.stream(query)
+        async for msg_id, msg_room_id, sender_id, username, content, timestamp in result:
+            yield {"id": msg_id, "room_id": msg_room_id, "sender_id": sender_id,
+                   "sender_username": username, "content": content, "timestamp": timestamp}
+
+    # 세그먼트 목록 조회가 커서를 열기 전에 끝나도록 보관 스트림을 먼저 읽습니다.
+    async for message in crud_archive.merge_by_id(crud_archive.stream_archived(db, room_id), stored()):
+        yield message
+
+async def get_max_message_id(db: AsyncSession) -> int:
+    """저장된 메시지 중 가장 큰 id를 돌려줍니다. (ID 발급 카운터 초기화용)"""
+    result = await db.execute(select(func.max(ChatMessage.id)))
+    return result.scalar() or 0
+
+async def delete_messages_batch(db: AsyncSession, room_id: int, limit: int) -> int:
+    """
+    방의 메시지를 최대 limit개 지우고 커밋합니다. 지운 개수를 돌려줍니다.
+    (room_id, id) 인덱스로 대상만 골라 짧은 트랜잭션으로 끝내므로 테이블을 오래 잠그지 않습니다.
+    """
+    result = await db.execute(
+        select(ChatMessage.id).filter(ChatMessage.room_id == room_id).order_by(ChatMessage.id).limit(limit)
+    )
+    target_ids = list(result.scalars().all())
+    if not target_ids:
+        return 0
+    await crud_search.unindex_messages(db, target_ids)
+    await db.execute(
+        delete(ChatMessage).where(ChatMessage.id.in_(target_ids)).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return len(target_ids)
+
+async def bulk_create_chat_messages(db: AsyncSession, messages: list[dict]):
+    """
+    여러 메시지를 한 번의 INSERT(executemany)와 한 번의 커밋으로 저장합니다.
+    영속화 파이프라인 전용이며, id와 timestamp는 브로드캐스트 시점에 이미 정해져 있습니다.
+    같은 트랜잭션에서 검색 색인과 방별 message_count / last_message_at도 증분으로 갱신합니다.
+    생성된 객체를 다시 읽어오지(refresh) 않습니다.
+    """
+    if not messages:
+        return
+    rows = [
+        {"id": m["id"], "room_id": m["room_id"], "sender_id": m["sender_id"],
+         "content": m["content"], "timestamp": datetime.fromisoformat(m["timestamp"])}
+        for m in messages
     ]
+    await db.execute(insert(ChatMessage), rows)
+    await crud_search.index_messages(db, rows)
 
-async def create_chat_message(db: AsyncSession, message: MessageCreate, room_id: int, sender_id: int):
-    db_message = ChatMessage(room_id=room_id, sender_id=sender_id, content=message.content)
-    db.add(db_message)
+    # 방별 (건수, 마지막 시각)을 모아서 방마다 UPDATE 한 번씩만 실행합니다.
+    room_stats: dict[int, dict] = {}
+    for row in rows:
+        stats = room_stats.setdefault(row["room_id"], {"b_room_id": row["room_id"], "b_count": 0, "b_last": row["timestamp"]})
+        stats["b_count"] += 1
+        stats["b_last"] = max(stats["b_last"], row["timestamp"])
+    rooms = ChatRoom.__table__
+    stmt = (
+        update(rooms)
+        .where(rooms.c.id == bindparam("b_room_id"))
+        .values(
+            message_count=rooms.c.message_count + bindparam("b_count"),
+            # 워커가 여러 개면 배치 커밋 순서가 뒤바뀔 수 있으므로 더 최신일 때만 덮어씁니다.
+            last_message_at=case(
+                (or_(rooms.c.last_message_at.is_(None), rooms.c.last_message_at < bindparam("b_last")), bindparam("b_last")),
+                else_=rooms.c.last_message_at,
+            ),
+        )
+    )
+    await db.execute(stmt, list(room_stats.values()))
     await db.commit()
-    await db.refresh(db_message)
-    return db_message
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+chat_messages의 월별 파티션을 관리합니다.
+- PostgreSQL: chat_messages는 timestamp RANGE 파티션 테이블입니다. 이번 달부터 몇 달 앞까지 파티션을 미리 만들고,
+  범위 밖(가져온 옛 메시지 등)은 DEFAULT 파티션에 들어갑니다. 보관 기간이 지나 비워진 파티션은 통째로 DROP하므로
+  최근 파티션의 인덱스 크기와 VACUUM 비용이 오래된 데이터와 무관해집니다.
+- SQLite(개발): 파티션이 없으므로 아무것도 하지 않습니다. 보관 처리는 행 단위 DELETE로 동작합니다.
+- 기존에 파티션 없이 만들어진 테이블은 자동으로 바꾸지 않습니다. (수동 마이그레이션 필요)
+"""
+import logging
+from datetime import datetime, timezone
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+PARENT = "chat_messages"
+DEFAULT_PARTITION = "chat_messages_default"
+
+def month_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT}_p{start:%Y%m}"
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(await conn.scalar(text(
+        "SELECT count(*) FROM pg_partitioned_table WHERE partrelid = to_regclass(:name)"
+    ), {"name": PARENT}))
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int, now: datetime | None = None):
+    """이번 달부터 months_ahead달 뒤까지의 파티션과 DEFAULT 파티션을 만듭니다. (이미 있으면 건너뜀)"""
+    if not await is_partitioned(conn):
+        if conn.dialect.name == "postgresql":
+            logger.warning("%s is not a partitioned table; skipping partition maintenance", PARENT)
+        return
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+    start = month_start(now or datetime.now(timezone.utc))
+    for offset in range(months_ahead + 1):
+        lower = add_months(start, offset)
+        upper = add_months(lower, 1)
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(lower)} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+
+async def list_partitions(conn: AsyncConnection) -> List[Tuple[str, datetime]]:
+    """월별 파티션의 (이름, 시작 시각) 목록. DEFAULT 파티션은 빠집니다."""
+    if not await is_partitioned(conn):
+        return []
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": PARENT})
+    partitions = []
+    for (name,) in result:
+        suffix = name[len(PARENT) + 2:]
+        if name.startswith(f"{PARENT}_p") and suffix.isdigit():
+            partitions.append((name, datetime.strptime(suffix, "%Y%m").replace(tzinfo=timezone.utc)))
+    return sorted(partitions, key=lambda p: p[1])
+
+async def drop_partitions_before(conn: AsyncConnection, cutoff: datetime) -> List[str]:
+    """cutoff 이전에 끝나는 월별 파티션 중 비어 있는 것을 떼어내고 지웁니다. 지운 이름 목록을 돌려줍니다."""
+    dropped = []
+    for name, start in await list_partitions(conn):
+        if add_months(start, 1) > cutoff:
+            break
+        if await conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {name})")):
+            continue # 아직 보관 처리되지 않은 행이 있음
+        await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        await conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
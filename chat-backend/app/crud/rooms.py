@@ -1,17 +1,42 @@
 # app/crud/rooms.py
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Union
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy import delete, update, func, inspect, text
 from sqlalchemy.future import select
 from app.db.models import ChatRoom
 from app.schemas.room import RoomCreate
 
+# 처음 만든 뒤에 chat_rooms에 추가된 컬럼. create_all은 기존 테이블을 바꾸지 않으므로 init_db가 직접 추가합니다.
+ADDED_COLUMNS = ("message_count", "last_message_at", "deleted_at")
+
+async def add_missing_columns(conn: AsyncConnection):
+    """
+    기존 DB의 chat_rooms에 없는 컬럼을 추가합니다. (이미 있으면 아무것도 하지 않음)
+    message_count / last_message_at을 새로 추가했다면 저장된 메시지로 한 번 채웁니다.
+    """
+    existing = await conn.run_sync(lambda sync_conn: {c["name"] for c in inspect(sync_conn).get_columns(ChatRoom.__tablename__)})
+    missing = [name for name in ADDED_COLUMNS if name not in existing]
+    for name in missing:
+        column = ChatRoom.__table__.c[name]
+        ddl = f"ALTER TABLE {ChatRoom.__tablename__} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"
+        if column.server_default is not None:
+            ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+        await conn.execute(text(ddl))
+    if "message_count" in missing or "last_message_at" in missing:
+        await conn.execute(text(
+            "UPDATE chat_rooms SET "
+            "message_count = (SELECT count(*) FROM chat_messages m WHERE m.room_id = chat_rooms.id), "
+            "last_message_at = (SELECT max(m.timestamp) FROM chat_messages m WHERE m.room_id = chat_rooms.id)"
+        ))
+
 async def get_room_by_id(db: AsyncSession, room_id: int):
     """ID로 방을 조회합니다."""
-    result = await db.execute(select(ChatRoom).filter(ChatRoom.id == room_id))
+    result = await db.execute(select(ChatRoom).filter(ChatRoom.id == room_id, ChatRoom.deleted_at.is_(None)))
     return result.scalars().first()
 
 async def get_room_by_name(db: AsyncSession, room_name: str):
-    """이름으로 방을 조회합니다."""
+    """이름으로 방을 조회합니다. (이름은 유일하므로 삭제 진행 중인 방도 포함합니다)"""
     result = await db.execute(select(ChatRoom).filter(ChatRoom.name == room_name))
     return result.scalars().first()
 
@@ -28,7 +53,55 @@ async def get_all_rooms(db: AsyncSession):
     result = await db.execute(select(ChatRoom))
     return result.scalars().all()
 
-async def delete_room(db: AsyncSession, room: ChatRoom):
-    """대화방을 삭제합니다."""
-    await db.delete(room)
+async def get_rooms_page(
+    db: AsyncSession,
+    limit: int,
+    after: Union[int, str, None] = None,
+    name_prefix: Optional[str] = None,
+):
+    """
+    방 목록을 keyset 페이지네이션으로 조회합니다.
+    - name_prefix가 없으면 id순, after는 마지막으로 받은 방의 id
+    - name_prefix가 있으면 이름순, after는 마지막으로 받은 방의 이름
+    prefix 검색은 LIKE 대신 범위 조건(name >= prefix AND name < prefix + U+10FFFF)으로 걸어서
+    DB 종류에 관계없이 name 인덱스를 그대로 탑니다.
+    """
+    query = select(ChatRoom).filter(ChatRoom.deleted_at.is_(None))
+    if name_prefix:
+        query = query.filter(ChatRoom.name >= name_prefix, ChatRoom.name < name_prefix + "\U0010ffff")
+        if after is not None:
+            query = query.filter(ChatRoom.name > after)
+        query = query.order_by(ChatRoom.name)
+    else:
+        if after is not None:
+            query = query.filter(ChatRoom.id > after)
+        query = query.order_by(ChatRoom.id)
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
+
+async def soft_delete_room(db: AsyncSession, room_id: int):
+    """대화방을 삭제 상태로 표시합니다. 메시지 정리는 백그라운드 작업(room_purger)이 합니다."""
+    await db.execute(
+        update(ChatRoom).where(ChatRoom.id == room_id, ChatRoom.deleted_at.is_(None)).values(deleted_at=func.now())
+    )
+    await db.commit()
+
+async def get_live_room_ids(db: AsyncSession, room_ids: set[int]) -> set[int]:
+    """room_ids 중 존재하고 삭제 표시되지 않은 방의 ID입니다. (영속화 배치가 삭제된 방의 메시지를 거르는 데 사용)"""
+    if not room_ids:
+        return set()
+    result = await db.execute(select(ChatRoom.id).filter(ChatRoom.id.in_(room_ids), ChatRoom.deleted_at.is_(None)))
+    return set(result.scalars().all())
+
+async def get_deleted_room_ids(db: AsyncSession) -> list[int]:
+    """삭제 표시만 되고 아직 정리되지 않은 방 ID 목록입니다. (재시작 후 정리 재개용)"""
+    result = await db.execute(select(ChatRoom.id).filter(ChatRoom.deleted_at.is_not(None)))
+    return list(result.scalars().all())
+
+async def purge_room(db: AsyncSession, room_id: int):
+    """
+    방 행을 bulk DELETE로 지웁니다. ORM으로 메시지를 불러오지 않으며,
+    남은 메시지가 있으면 DB의 ON DELETE CASCADE가 처리합니다.
+    """
+    await db.execute(delete(ChatRoom).where(ChatRoom.id == room_id))
     await db.commit()
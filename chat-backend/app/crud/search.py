@@ -0,0 +1,114 @@
+"""
+메시지 전문 검색 인덱스입니다. DB 종류에 따라 구현이 다르지만 인터페이스는 하나입니다.
+- SQLite(개발): FTS5 가상 테이블 chat_messages_fts. 영속화 배치가 메시지와 같은 트랜잭션에서 색인합니다.
+- PostgreSQL(운영): to_tsvector(content)에 대한 GIN 표현식 인덱스. INSERT 시 DB가 알아서 갱신하므로
+  배치 경로에서 따로 할 일이 없습니다.
+검색 결과는 관련도(score) 내림차순, 같은 점수면 최신 메시지 순이며 (score, id) 커서로 이어집니다.
+"""
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from app.core.config import get_settings
+
+settings = get_settings()
+
+FTS_TABLE = "chat_messages_fts"
+PG_INDEX = "ix_chat_messages_content_fts"
+
+SearchCursor = Tuple[float, int] # (score, message id)
+
+def _dialect(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+def _fts5_query(q: str) -> str:
+    """사용자 입력을 FTS5 문법 오류가 나지 않도록 단어별 구(phrase)의 AND로 바꿉니다."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+
+async def create_search_index(conn: AsyncConnection):
+    """검색 인덱스를 만듭니다. 새로 만든 경우 기존 메시지를 한 번 색인합니다."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        exists = await conn.scalar(
+            text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        )
+        if exists:
+            return
+        await conn.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(content, room_id UNINDEXED, tokenize = 'unicode61')"
+        ))
+        await conn.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, content, room_id) SELECT id, content, room_id FROM chat_messages"
+        ))
+    elif dialect == "postgresql":
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON chat_messages "
+            f"USING GIN (to_tsvector('{settings.SEARCH_TS_CONFIG}', content))"
+        ))
+
+async def index_messages(db: AsyncSession, rows: Sequence[dict]):
+    """새 메시지를 색인합니다. 커밋은 호출한 쪽(영속화 배치)이 합니다."""
+    if rows and _dialect(db) == "sqlite":
+        await db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, content, room_id) VALUES (:id, :content, :room_id)"),
+            [{"id": r["id"], "content": r["content"], "room_id": r["room_id"]} for r in rows],
+        )
+
+async def unindex_messages(db: AsyncSession, message_ids: Sequence[int]):
+    """삭제할 메시지를 색인에서 뺍니다. 커밋은 호출한 쪽이 합니다."""
+    if message_ids and _dialect(db) == "sqlite":
+        await db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), [{"id": i} for i in message_ids])
+
+async def search_messages(
+    db: AsyncSession,
+    q: str,
+    room_id: Optional[int] = None,
+    after: Optional[SearchCursor] = None,
+    limit: int = 50,
+) -> Tuple[list[dict], Optional[SearchCursor]]:
+    """
+    메시지를 검색합니다. room_id가 없으면 삭제되지 않은 모든 방에서 찾습니다.
+    MessageDisplay 형태의 목록과 다음 페이지 커서(없으면 None)를 돌려줍니다.
+    """
+    params = {"limit": limit}
+    if _dialect(db) == "sqlite":
+        params["q"] = _fts5_query(q)
+        # bm25는 작을수록 관련도가 높으므로 부호를 바꿔 score로 씁니다.
+        matches = (
+            f"SELECT rowid AS id, -bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q"
+            + (" AND room_id = :room_id" if room_id is not None else "")
+        )
+    else:
+        params["q"] = q
+        ts_config = settings.SEARCH_TS_CONFIG
+        matches = (
+            f"SELECT id, ts_rank(to_tsvector('{ts_config}', content), query) AS score "
+            f"FROM chat_messages, websearch_to_tsquery('{ts_config}', :q) AS query "
+            f"WHERE to_tsvector('{ts_config}', content) @@ query"
+            + (" AND room_id = :room_id" if room_id is not None else "")
+        )
+    if room_id is not None:
+        params["room_id"] = room_id
+
+    keyset = ""
+    if after is not None:
+        params["after_score"], params["after_id"] = after
+        keyset = "WHERE s.score < :after_score OR (s.score = :after_score AND s.id < :after_id)"
+
+    query = text(f"""
+        SELECT m.id, m.room_id, m.sender_id, u.username, m.content, m.timestamp, s.score
+        FROM ({matches}) AS s
+        JOIN chat_messages m ON m.id = s.id
+        JOIN users u ON u.id = m.sender_id
+        JOIN chat_rooms r ON r.id = m.room_id AND r.deleted_at IS NULL
+        {keyset}
+        ORDER BY s.score DESC, s.id DESC
+        LIMIT :limit
+    """)
+    rows = (await db.execute(query, params)).all()
+    results = [
+        {"id": row.id, "room_id": row.room_id, "sender_id": row.sender_id,
+         "sender_username": row.username, "content": row.content, "timestamp": row.timestamp}
+        for row in rows
+    ]
+    next_cursor = (float(rows[-1].score), rows[-1].id) if len(rows) == limit else None
+    return results, next_cursor
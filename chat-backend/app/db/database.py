@@ -1,20 +1,71 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from contextlib import asynccontextmanager
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import get_settings
+from app.core.metrics import instrument_engine
 
 settings = get_settings()
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def create_engine_from_settings(url: str, pool_size: int, max_overflow: int) -> AsyncEngine:
+    """
+    설정값으로 엔진을 만듭니다.
+    - SQL 로그(echo)는 기본으로 꺼져 있습니다. (DATABASE_ECHO)
+    - asyncpg에서는 prepared statement 캐시 크기를 지정합니다. (pgbouncer 환경이면 0)
+    - SQLite는 파일 하나에 대한 연결이므로 풀 크기 설정을 적용하지 않습니다.
+    """
+    db_url = make_url(url)
+    options = {"echo": settings.DATABASE_ECHO, "pool_pre_ping": settings.DATABASE_POOL_PRE_PING}
+    if db_url.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        )
+    if db_url.get_driver_name() == "asyncpg":
+        db_url = db_url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DATABASE_STATEMENT_CACHE_SIZE)}
+        )
+    new_engine = create_async_engine(db_url, **options)
+    instrument_engine(new_engine) # 쿼리 실행 시간 계측
+    return new_engine
 
-AsyncSessionLocal = async_sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False # 세션 종료 시 객체 만료 방지
-)
+def _sessionmaker(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False # 세션 종료 시 객체 만료 방지
+    )
+
+# 요청 처리용 기본 엔진
+engine = create_engine_from_settings(DATABASE_URL, settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW)
+
+# 영속화 워커 전용 엔진: 배치 쓰기가 요청 처리용 풀의 연결을 빼앗지 않도록 분리합니다.
+# (SQLite는 동시에 여러 쓰기 연결을 두면 잠금 충돌이 나므로 기본 엔진을 공유합니다.)
+if make_url(DATABASE_URL).get_backend_name() == "sqlite":
+    persistence_engine = engine
+else:
+    persistence_engine = create_engine_from_settings(
+        DATABASE_URL, settings.PERSISTENCE_POOL_SIZE, settings.PERSISTENCE_MAX_OVERFLOW
+    )
+
+# 읽기 전용 복제본: 히스토리/방 목록 조회를 보냅니다. 설정이 없으면 기본 엔진을 씁니다.
+replica_engine: Optional[AsyncEngine] = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine_from_settings(
+        settings.DATABASE_REPLICA_URL, settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW
+    )
+
+AsyncSessionLocal = _sessionmaker(engine)
+PersistenceSessionLocal = _sessionmaker(persistence_engine)
+ReadSessionLocal = _sessionmaker(replica_engine or engine)
 
 Base = declarative_base()
 
@@ -22,6 +73,49 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+async def get_read_db():
+    """읽기 전용 조회용 세션입니다. DATABASE_REPLICA_URL이 있으면 복제본으로 연결됩니다."""
+    async with ReadSessionLocal() as session:
+        yield session
+
+@asynccontextmanager
+async def advisory_lock(*key: int):
+    """
+    PostgreSQL advisory lock을 기다리지 않고 잡아 봅니다. 잡으면 True, 다른 노드가 잡고 있으면 False를 내줍니다.
+    key는 정수 하나 또는 (작업 종류, id) 두 개입니다.
+    세션 단위 잠금이므로 같은 연결에서 풀고 나서 풀에 돌려줍니다. (SQLite는 단일 노드이므로 항상 True)
+    """
+    if persistence_engine.dialect.name != "postgresql":
+        yield True
+        return
+    args = ", ".join(f":k{i}" for i in range(len(key)))
+    params = {f"k{i}": value for i, value in enumerate(key)}
+    async with persistence_engine.connect() as conn:
+        acquired = await conn.scalar(text(f"SELECT pg_try_advisory_lock({args})"), params)
+        await conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text(f"SELECT pg_advisory_unlock({args})"), params)
+                await conn.commit()
+
 async def init_db():
+    from app.crud.search import create_search_index
+    from app.crud.partitions import ensure_partitions
+    from app.crud.rooms import add_missing_columns
+    from app.crud.messages import create_message_indexes
+
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await add_missing_columns(conn)
+        # 파티션 테이블은 파티션이 하나도 없으면 INSERT가 실패하므로 인덱스보다 먼저 만듭니다.
+        await ensure_partitions(conn, settings.MESSAGE_PARTITION_MONTHS_AHEAD)
+        await create_message_indexes(conn)
+        await create_search_index(conn)
+
+async def dispose_engines():
+    """종료 시 모든 풀의 연결을 닫습니다."""
+    for db_engine in {engine, persistence_engine, replica_engine}:
+        if db_engine is not None:
+            await db_engine.dispose()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -18,18 +18,58 @@ class ChatRoom(Base):
     name = Column(String, unique=True, index=True, nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 영속화 배치가 증분으로 갱신하는 비정규화 필드 (목록 조회 시 COUNT(*) 없음)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    # 삭제 요청 시각. 값이 있으면 조회에서 빠지고, 백그라운드 작업이 메시지를 지운 뒤 행도 삭제합니다.
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     creator = relationship("User", back_populates="chat_rooms")
-    messages = relationship("ChatMessage", back_populates="room")
+    # 메시지는 ORM이 불러와 지우지 않고 DB의 ON DELETE CASCADE / 배치 DELETE에 맡깁니다.
+    messages = relationship("ChatMessage", back_populates="room", passive_deletes=True)
 
 class ChatMessage(Base):
+    """
+    PostgreSQL에서는 timestamp 기준 월별 RANGE 파티션 테이블로 만들어집니다. (파티션은 app.crud.partitions가 관리)
+    파티션 키가 기본 키에 포함되어야 하므로 기본 키는 (id, timestamp)이고, id는 항상 발급기가 정합니다.
+    """
     __tablename__ = "chat_messages"
-    id = Column(Integer, primary_key=True, index=True)
-    room_id = Column(Integer, ForeignKey("chat_rooms.id"))
+    id = Column(Integer, primary_key=True, index=True, autoincrement=False)
+    room_id = Column(Integer, ForeignKey("chat_rooms.id", ondelete="CASCADE"))
     sender_id = Column(Integer, ForeignKey("users.id"))
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
     room = relationship("ChatRoom", back_populates="messages")
     sender = relationship("User", back_populates="messages")
 
+    # 방별 히스토리를 id 기준 keyset 페이지네이션으로 조회하기 위한 복합 인덱스와
+    # 보관 작업이 방마다 기준 시각 이전 메시지가 있는지 한 번의 인덱스 탐색으로 확인하기 위한 인덱스
+    __table_args__ = (
+        Index("ix_chat_messages_room_id_id", "room_id", "id"),
+        Index("ix_chat_messages_room_id_timestamp", "room_id", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+class MessageSegment(Base):
+    """
+    보관 기간이 지나 DB에서 빠진 메시지 묶음(gzip NDJSON 파일) 하나입니다.
+    방별로 id 범위를 기록해 두므로 히스토리 커서가 이 범위에 닿으면 파일에서 읽습니다.
+    같은 범위를 두 번 기록하지 않도록 (room_id, min_id)와 path는 유일합니다.
+    """
+    __tablename__ = "message_segments"
+    id = Column(Integer, primary_key=True)
+    room_id = Column(Integer, nullable=False)
+    min_id = Column(Integer, nullable=False)
+    max_id = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    first_timestamp = Column(DateTime(timezone=True), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    path = Column(String, nullable=False, unique=True) # MESSAGE_ARCHIVE_DIR 기준 상대 경로
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_message_segments_room_id_max_id", "room_id", "max_id"),
+        Index("uq_message_segments_room_id_min_id", "room_id", "min_id", unique=True),
+    )
+
@@ -1,22 +1,68 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
+import logging
+import signal
 
-from app.db.database import init_db
+from app.db.database import init_db, dispose_engines, AsyncSessionLocal
+from app.crud.messages import get_max_message_id
 from app.services.redis_manager import redis_manager
-from app.api.v1 import auth, rooms, websockets
+from app.services.message_queue import message_queue
+from app.services.id_allocator import message_id_allocator
+from app.services.presence import presence
+from app.services.admission import admission
+from app.services.room_purger import room_purger
+from app.services.message_archiver import message_archiver
+from app.services.drainer import drainer
+from app.core.config import get_settings
+from app.api.v1 import auth, rooms, search, export, websockets, metrics, admin
+from app.core.logging_config import configure_logging
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+configure_logging()
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def install_drain_signal():
+    """DRAIN_SIGNAL을 받으면 drain을 시작합니다. (배포 도구가 종료 신호보다 먼저 보냄)"""
+    if not settings.DRAIN_SIGNAL:
+        return
+    try:
+        asyncio.get_running_loop().add_signal_handler(getattr(signal, settings.DRAIN_SIGNAL), drainer.start)
+    except (AttributeError, NotImplementedError, ValueError, RuntimeError) as e:
+        logger.warning("Could not install drain signal %s: %s", settings.DRAIN_SIGNAL, e)
 
 # 애플리케이션 시작/종료 시 이벤트 처리
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 시작 시 DB 초기화 및 Redis 연결
-    print("서비스 시작 중...")
+    logger.info("서비스 시작 중...")
     await init_db()
     await redis_manager.connect()
+    # 메시지 ID 카운터가 이미 저장된 ID보다 작지 않도록 맞춥니다.
+    async with AsyncSessionLocal() as db:
+        await message_id_allocator.seed(await get_max_message_id(db))
+    # 재시작 전에 남아 있던 메시지(redis_stream)부터 바로 처리하도록 워커를 미리 띄웁니다.
+    message_queue.start()
+    presence.start()
+    admission.start()
+    # 재시작 전에 끝나지 않은 방 삭제 작업을 이어서 처리합니다.
+    await room_purger.resume()
+    # 다음 달 파티션 생성과 오래된 메시지 보관을 주기적으로 처리합니다.
+    message_archiver.start()
+    install_drain_signal()
     yield
-    # 종료 시 Redis 연결 해제
-    print("서비스 종료 중...")
+    # 종료 시 drain(아직 안 했다면)으로 남은 메시지를 저장한 뒤 워커 정지 및 Redis 연결 해제
+    logger.info("서비스 종료 중...")
+    await drainer.wait()
+    await message_archiver.stop()
+    await room_purger.stop()
+    await admission.stop()
+    await presence.stop()
+    await message_queue.stop()
     await redis_manager.disconnect()
+    await dispose_engines()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -34,9 +80,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER], # 페이지네이션 커서를 프론트엔드에서 읽을 수 있도록
 )
 
 # API 라우터 포함
 app.include_router(auth.router, prefix="", tags=["Auth"]) # '/register', '/login'
 app.include_router(rooms.router, prefix="", tags=["Rooms"]) # '/rooms', '/rooms/{room_id}/messages'
-app.include_router(websockets.router) # '/ws/chat/{room_id}'
\ No newline at end of file
+app.include_router(search.router, prefix="", tags=["Search"]) # '/search', '/rooms/{room_id}/search'
+app.include_router(export.router, prefix="", tags=["Export"]) # '/rooms/{room_id}/export', '/rooms/{room_id}/import'
+app.include_router(websockets.router) # '/ws/chat/{room_id}', '/ws'
+app.include_router(metrics.router, tags=["Metrics"]) # '/metrics'
+app.include_router(admin.router, tags=["Admin"]) # '/admin/drain'
\ No newline at end of file
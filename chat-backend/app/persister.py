@@ -0,0 +1,33 @@
+"""
+웹소켓 노드와 분리해서 메시지 영속화 워커만 실행합니다.
+MESSAGE_QUEUE_BACKEND=redis_stream 일 때 사용하며, 웹소켓 노드는 MESSAGE_QUEUE_CONSUMER=False로 둡니다.
+
+    python -m app.persister
+"""
+import asyncio
+import logging
+from app.core.config import get_settings
+from app.core.logging_config import configure_logging
+from app.services.redis_manager import redis_manager
+from app.services.message_queue import message_queue
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+async def main():
+    if settings.MESSAGE_QUEUE_BACKEND != "redis_stream":
+        logger.error("persister는 MESSAGE_QUEUE_BACKEND=redis_stream 에서만 의미가 있습니다.")
+        return
+    await redis_manager.connect()
+    message_queue.consume = True
+    message_queue.start()
+    logger.info("Persister started stream=%s group=%s", settings.MESSAGE_QUEUE_STREAM, settings.MESSAGE_QUEUE_GROUP)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await message_queue.stop()
+        await redis_manager.disconnect()
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class RoomCreate(BaseModel):
     name: str
@@ -12,10 +13,22 @@ class RoomDisplay(BaseModel): # <-- 이 부분을 확인해주세요. 이름이
     name: str
     created_by: int # User ID
     created_at: datetime
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
+    online_count: int = 0 # presence 레지스트리 기준 현재 접속자 수
 
     class Config:
         from_attributes = True
 
+class PresenceUser(BaseModel):
+    user_id: int
+    username: str
+
+class RoomPresence(BaseModel):
+    room_id: int
+    online_count: int
+    users: List[PresenceUser]
+
 class Room(RoomBase):
     id: int
     created_by: int
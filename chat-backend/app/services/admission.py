@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import NamedTuple, Optional
+from app.core.config import get_settings
+from app.core import metrics
+from app.services.message_queue import message_queue
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class Rejection(NamedTuple):
+    reason: str
+    retry_after: int # 초
+
+class AdmissionController:
+    """
+    새 웹소켓 접속을 받을지 결정합니다. (load shedding)
+    - 노드당 최대 동시 접속 수를 넘으면 거절합니다.
+    - 주기적으로 이벤트 루프 지연과 영속화 큐 깊이를 재서, 임계값을 넘은 동안에는 새 접속을 거절합니다.
+      접속마다 큐 깊이를 조회하지 않도록 마지막 측정값만 봅니다.
+    이미 연결된 소켓은 끊지 않으므로 정상 사용자의 지연을 지키는 쪽을 우선합니다.
+    drain 중(draining)에는 모든 새 접속을 거절합니다.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = settings.MAX_CONNECTIONS_PER_NODE,
+        max_queue_depth: int = settings.ADMISSION_MAX_QUEUE_DEPTH,
+        max_loop_lag_ms: int = settings.ADMISSION_MAX_LOOP_LAG_MS,
+        interval: float = settings.ADMISSION_SAMPLE_INTERVAL_SECONDS,
+        retry_after: int = settings.ADMISSION_RETRY_AFTER_SECONDS,
+    ):
+        self.max_connections = max_connections
+        self.max_queue_depth = max_queue_depth
+        self.max_loop_lag = max_loop_lag_ms / 1000
+        self.interval = interval
+        self.retry_after = retry_after
+        self.connections = 0
+        self.loop_lag = 0.0
+        self.queue_depth = 0
+        self.draining = False
+        self.task: Optional[asyncio.Task] = None
+
+    def check(self) -> Optional[Rejection]:
+        """접속을 받을 수 있으면 None, 아니면 거절 사유와 재시도 힌트."""
+        if self.draining:
+            return self._reject("draining")
+        if self.max_connections > 0 and self.connections >= self.max_connections:
+            return self._reject("node_full")
+        if self.max_loop_lag > 0 and self.loop_lag >= self.max_loop_lag:
+            return self._reject("event_loop_lag")
+        if self.max_queue_depth > 0 and self.queue_depth >= self.max_queue_depth:
+            return self._reject("queue_backlog")
+        return None
+
+    def _reject(self, reason: str) -> Rejection:
+        metrics.CONNECTIONS_REJECTED.inc(reason=reason)
+        return Rejection(reason, self.retry_after)
+
+    def opened(self):
+        self.connections += 1
+
+    def closed(self):
+        self.connections = max(0, self.connections - 1)
+
+    async def sample(self):
+        """이벤트 루프 지연(예정보다 늦게 깨어난 시간)과 큐 깊이를 한 번 잽니다."""
+        started = time.perf_counter()
+        await asyncio.sleep(self.interval)
+        self.loop_lag = max(0.0, time.perf_counter() - started - self.interval)
+        metrics.EVENT_LOOP_LAG_SECONDS.observe(self.loop_lag)
+        try:
+            self.queue_depth = await message_queue.size()
+        except Exception as e:
+            logger.warning("Failed to read message queue depth: %s", e)
+
+    async def _run(self):
+        while True:
+            await self.sample()
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+admission = AdmissionController()
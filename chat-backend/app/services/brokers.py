@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+from app.core.metrics import REDIS_PUBLISH_SECONDS, REDIS_SUBSCRIBE_SECONDS
+
+class InMemorySubscription:
+    """
+    InMemoryBroker의 구독 하나입니다. redis-py PubSub처럼 listen()과 close()를 제공합니다.
+    발행된 문자열 객체를 그대로 큐에 넣으므로 복사나 재인코딩이 없습니다.
+    """
+
+    def __init__(self, broker: "InMemoryBroker"):
+        self.broker = broker
+        self.channels: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def listen(self) -> AsyncIterator[Dict[str, str]]:
+        while True:
+            channel, data = await self.queue.get()
+            yield {"type": "message", "channel": channel, "data": data}
+
+    async def close(self):
+        for channel in list(self.channels):
+            self.broker._remove(self, channel)
+
+class InMemoryBroker:
+    """
+    프로세스 내 pub/sub 브로커입니다. (단일 노드 배포, 벤치마크, 테스트용)
+    Redis 왕복 없이 같은 프로세스의 구독자에게 바로 전달하지만, 다른 노드와는 메시지를 주고받지 못합니다.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set[InMemorySubscription]] = {}
+
+    async def publish(self, channel: str, message: str):
+        for subscription in self.subscribers.get(channel, ()):
+            subscription.queue.put_nowait((channel, message))
+
+    async def subscribe(self, channel: str) -> InMemorySubscription:
+        subscription = InMemorySubscription(self)
+        subscription.channels.add(channel)
+        self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: InMemorySubscription, channel: str):
+        self._remove(subscription, channel)
+
+    def _remove(self, subscription: InMemorySubscription, channel: str):
+        subscription.channels.discard(channel)
+        subscribers = self.subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[channel]
+
+class RedisBroker:
+    """Redis PUBLISH/SUBSCRIBE로 모든 노드에 메시지를 전달합니다. Redis에 연결되어 있지 않으면 아무것도 하지 않습니다."""
+
+    name = "redis"
+
+    def __init__(self, get_client: Callable[[], Optional[object]]):
+        self.get_client = get_client
+
+    async def publish(self, channel: str, message: str):
+        client = self.get_client()
+        if client:
+            started = time.perf_counter()
+            await client.publish(channel, message)
+            REDIS_PUBLISH_SECONDS.observe(time.perf_counter() - started)
+
+    async def subscribe(self, channel: str):
+        client = self.get_client()
+        if client:
+            started = time.perf_counter()
+            pubsub = client.pubsub()
+            await pubsub.subscribe(channel)
+            REDIS_SUBSCRIBE_SECONDS.observe(time.perf_counter() - started)
+            return pubsub
+        return None
+
+    async def unsubscribe(self, pubsub, channel: str):
+        if self.get_client() and pubsub:
+            await pubsub.unsubscribe(channel)
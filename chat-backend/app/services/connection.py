@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+import weakref
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
+from fastapi import WebSocket, status
+from app.core.config import get_settings
+from app.core.metrics import ACTIVE_CONNECTIONS, SOCKET_SEND_SECONDS
+from app.core.tasks import spawn
+from app.core.serialization import dumps, json_to_msgpack, loads, msgpack_loads
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 이 노드에 열려 있는 모든 연결. (방을 하나도 구독하지 않은 /ws 연결 포함, drain에서 사용)
+open_connections: "weakref.WeakSet[Connection]" = weakref.WeakSet()
+ACTIVE_CONNECTIONS.set_function(lambda: len(open_connections))
+
+def frame_message_key(data: Union[str, bytes]) -> Optional[Tuple[int, int]]:
+    """브로드캐스트 프레임이 채팅 메시지면 (room_id, id)를, 아니면 None을 돌려줍니다."""
+    try:
+        frame = msgpack_loads(data) if isinstance(data, bytes) else loads(data)
+    except Exception:
+        return None
+    return (frame.get("room_id"), frame.get("id")) if frame.get("type") == "message" else None
+
+class CloseFrame(NamedTuple):
+    """전송 큐에 넣으면 앞의 프레임을 모두 보낸 뒤 소켓을 닫습니다."""
+    code: int
+    reason: str
+
+class Connection:
+    """
+    웹소켓 하나의 전송 전용 큐와 writer 태스크입니다.
+    큐에는 이미 인코딩된 프레임(str: JSON 텍스트, bytes: MessagePack)만 들어갑니다.
+    - 브로드캐스트는 enqueue()로 큐에 넣기만 하고 기다리지 않습니다.
+    - 실제 send는 소켓마다 하나씩 있는 writer 태스크가 순서대로 처리합니다.
+    - 큐가 가득 차면 policy에 따라 오래된 프레임을 버리거나(drop_oldest),
+      새 프레임을 버리거나(drop_newest), 연결을 끊습니다(disconnect).
+    - paused로 만들거나 pause()를 부르면 go_live() 전까지 writer가 보내지 않고 큐에 모아 둡니다. (catch-up용)
+    - 한 연결이 여러 방을 구독할 수 있습니다. (rooms)
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int = settings.SEND_QUEUE_SIZE,
+        policy: str = settings.SLOW_CONSUMER_POLICY,
+        binary: bool = False,
+        paused: bool = False,
+        multiplexed: bool = False,
+    ):
+        self.websocket = websocket
+        self.binary = binary # True면 MessagePack 바이너리 프레임으로 받습니다
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.policy = policy
+        self.rooms: set[int] = set()
+        self.multiplexed = multiplexed # True면 방 하나가 닫혀도 소켓은 유지합니다 (/ws)
+        self.closed = False
+        self.dropped = 0
+        self.on_dead: Optional[Callable[["Connection"], None]] = None
+        self.live = asyncio.Event()
+        self.skip_through: Dict[int, int] = {} # 방별로 이 id 이하의 메시지 프레임은 이미 보냈으므로 건너뜁니다
+        if not paused:
+            self.live.set()
+        self.writer = asyncio.create_task(self._write())
+        open_connections.add(self)
+
+    def enqueue(self, data: Union[str, bytes]) -> bool:
+        """프레임을 전송 큐에 넣습니다. 연결을 끊어야 하면 False를 돌려줍니다."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(data)
+            self.dropped += 1
+            return True
+        if self.policy == "drop_newest":
+            self.dropped += 1
+            return True
+        return False
+
+    def pause(self):
+        """writer가 큐의 프레임을 보내지 않고 기다리게 합니다. (전송 중인 프레임 하나는 마저 보냅니다)"""
+        self.live.clear()
+
+    def go_live(self, room_id: Optional[int] = None, skip_through: Optional[int] = None):
+        """
+        paused 상태를 풀고 모아 둔 프레임부터 보내기 시작합니다.
+        skip_through: room_id 방에서 catch-up으로 이미 보낸 마지막 메시지 id. 큐에 중복으로 들어온 프레임을 건너뜁니다.
+        """
+        if room_id is not None and skip_through is not None:
+            self.skip_through[room_id] = skip_through
+        self.live.set()
+
+    async def send(self, data: Union[str, bytes]):
+        started = time.perf_counter()
+        if isinstance(data, bytes):
+            await self.websocket.send_bytes(data)
+        else:
+            await self.websocket.send_text(data)
+        SOCKET_SEND_SECONDS.observe(time.perf_counter() - started)
+
+    async def _write(self):
+        try:
+            while True:
+                data = await self.queue.get()
+                await self.live.wait()
+                if isinstance(data, CloseFrame):
+                    await self.close(code=data.code, reason=data.reason)
+                    return
+                if self.skip_through and self._already_sent(data):
+                    continue
+                await self.send(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e: # WebSocket 연결이 이미 닫혔을 경우
+            logger.info("Failed to send to a client, connection likely closed: %s", e)
+            self.closed = True
+            # 죽은 연결은 다음 브로드캐스트를 기다리지 않고 바로 정리합니다.
+            if self.on_dead:
+                self.on_dead(self)
+
+    def _already_sent(self, data: Union[str, bytes]) -> bool:
+        key = frame_message_key(data)
+        if key is None or key[0] not in self.skip_through:
+            return False
+        room_id, message_id = key
+        if message_id <= self.skip_through[room_id]:
+            return True
+        del self.skip_through[room_id] # id는 방 안에서 발행 순서대로 증가하므로 이후로는 중복이 없습니다
+        return False
+
+    def close_after_flush(self, code: int = status.WS_1000_NORMAL_CLOSURE, reason: str = ""):
+        """이미 큐에 들어간 프레임을 모두 보낸 뒤 소켓을 닫습니다. 큐가 가득 차 있으면 바로 닫습니다."""
+        if not self.enqueue(CloseFrame(code, reason)):
+            spawn(self.close(code=code, reason=reason))
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE, reason: str = ""):
+        """writer를 멈추고 소켓을 닫습니다. 여러 번 호출해도 안전합니다."""
+        already_closed = self.closed
+        self.closed = True
+        open_connections.discard(self)
+        if self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        if already_closed:
+            return
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass # 이미 닫힌 소켓
+
+def encode_frame(connection: Connection, frame: dict):
+    """서버가 이 소켓에만 보내는 프레임을 소켓의 전송 포맷으로 인코딩합니다."""
+    data = dumps(frame)
+    return json_to_msgpack(data) if connection.binary else data
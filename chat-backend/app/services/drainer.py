@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import status
+from app.core.config import get_settings
+from app.services.admission import admission
+from app.services.connection import encode_frame, open_connections
+from app.services.message_queue import message_queue
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class Drainer:
+    """
+    배포 전에 노드를 비우는 drain 작업입니다.
+    1. 새 웹소켓 접속을 거절합니다. (admission)
+    2. 영속화 큐를 deadline까지 비웁니다. (프로세스 내 큐일 때만, redis_stream은 다른 노드가 이어서 저장)
+    3. 모든 소켓에 무작위 재접속 지연을 담은 reconnect 프레임을 보내고,
+       wave_size개씩 나눠 닫아서 클라이언트가 한꺼번에 재접속하지 않게 합니다.
+    진행 상황은 progress에 기록되며 GET /admin/drain으로 볼 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        flush_timeout: float = settings.DRAIN_FLUSH_TIMEOUT_SECONDS,
+        wave_size: int = settings.DRAIN_WAVE_SIZE,
+        wave_interval_ms: int = settings.DRAIN_WAVE_INTERVAL_MS,
+        reconnect_min_ms: int = settings.DRAIN_RECONNECT_MIN_MS,
+        reconnect_max_ms: int = settings.DRAIN_RECONNECT_MAX_MS,
+    ):
+        self.flush_timeout = flush_timeout
+        self.wave_size = max(1, wave_size)
+        self.wave_interval = wave_interval_ms / 1000
+        self.reconnect_min_ms = reconnect_min_ms
+        self.reconnect_max_ms = max(reconnect_min_ms, reconnect_max_ms)
+        self.task: Optional[asyncio.Task] = None
+        self.progress: Optional[dict] = None
+
+    def start(self) -> dict:
+        """drain을 시작합니다. 이미 진행 중이거나 끝났으면 현재 진행 상황을 돌려줍니다."""
+        if self.task is None:
+            self.progress = {
+                "status": "pending",
+                "queue_remaining": None,
+                "connections_total": 0,
+                "connections_closed": 0,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "finished_at": None,
+                "error": None,
+            }
+            self.task = asyncio.create_task(self._drain())
+        return self.progress
+
+    async def wait(self):
+        """drain을 시작하고(안 했다면) 끝날 때까지 기다립니다. (종료 시 호출)"""
+        self.start()
+        await asyncio.shield(self.task)
+
+    async def flush_queue(self) -> int:
+        """
+        영속화 큐가 비거나 deadline이 지날 때까지 기다립니다. 남은 개수를 돌려줍니다.
+        redis_stream 큐는 클러스터 전체가 공유하므로(XLEN은 다른 노드의 항목도 셈) 기다리지 않습니다.
+        이미 스트림에 들어간 메시지는 이 노드가 내려가도 다른 consumer가 회수해 저장합니다.
+        """
+        if message_queue.durable:
+            return 0
+        message_queue.start()
+        deadline = time.monotonic() + self.flush_timeout
+        remaining = await message_queue.size()
+        while remaining and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            remaining = await message_queue.size()
+        return remaining
+
+    async def _drain(self):
+        progress = self.progress
+        try:
+            admission.draining = True
+            progress["status"] = "flushing"
+            progress["queue_remaining"] = await self.flush_queue()
+            if progress["queue_remaining"]:
+                logger.warning("Drain flush deadline passed with %d messages still queued", progress["queue_remaining"])
+
+            progress["status"] = "closing"
+            # 방을 구독하지 않은 /ws 연결까지 이 노드의 모든 연결을 한 번씩 닫습니다.
+            connections = [connection for connection in list(open_connections) if not connection.closed]
+            random.shuffle(connections)
+            progress["connections_total"] = len(connections)
+            for start in range(0, len(connections), self.wave_size):
+                for connection in connections[start:start + self.wave_size]:
+                    retry_after_ms = random.randint(self.reconnect_min_ms, self.reconnect_max_ms)
+                    connection.enqueue(encode_frame(connection, {"type": "reconnect", "retry_after_ms": retry_after_ms}))
+                    connection.close_after_flush(code=status.WS_1012_SERVICE_RESTART, reason="Server restarting")
+                progress["connections_closed"] += len(connections[start:start + self.wave_size])
+                await asyncio.sleep(self.wave_interval)
+
+            # 닫히기 전까지 클라이언트가 보낸 메시지도 저장되도록 한 번 더 비웁니다.
+            progress["status"] = "flushing"
+            progress["queue_remaining"] = await self.flush_queue()
+            progress["status"] = "done"
+            logger.info("Drain finished: %d connections closed", progress["connections_closed"])
+        except asyncio.CancelledError:
+            progress["status"] = "interrupted"
+            raise
+        except Exception as e:
+            progress["status"] = "failed"
+            progress["error"] = str(e)
+            logger.exception("Drain failed: %s", e)
+        finally:
+            progress["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+drainer = Drainer()
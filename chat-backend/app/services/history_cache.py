@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional
+import redis.asyncio as redis
+from app.core.config import get_settings
+from app.core.serialization import dumps, loads
+from app.services.redis_manager import redis_manager
+
+settings = get_settings()
+
+class HistoryCache:
+    """
+    방별 최근 메시지 N개를 보관하는 write-through 캐시입니다.
+    - Redis 리스트에 최신 메시지가 앞에 오도록 LPUSH + LTRIM으로 길이를 제한합니다.
+    - 항목은 MessageDisplay 형태의 dict(JSON)입니다. 발행 스크립트와 같은 dumps()로 인코딩합니다. (timestamp는 ISO 문자열)
+    - DB에서 채운 적이 있는 방만 warm 키를 가지며, warm인 방의 첫 페이지는 DB 없이 응답합니다.
+    """
+
+    def __init__(self, size: int = settings.HISTORY_CACHE_SIZE, ttl: int = settings.HISTORY_CACHE_TTL_SECONDS):
+        self.size = size
+        self.ttl = ttl
+
+    @staticmethod
+    def key(room_id: int) -> str:
+        return f"chat_history_{room_id}"
+
+    @staticmethod
+    def warm_key(room_id: int) -> str:
+        return f"chat_history_{room_id}:warm"
+
+    async def push(self, room_id: int, message: Dict[str, Any]):
+        """브로드캐스트된 메시지를 캐시 앞쪽에 추가합니다."""
+        client = redis_manager.redis_client
+        if not client:
+            return
+        key = self.key(room_id)
+        pipe = client.pipeline(transaction=False)
+        pipe.lpush(key, dumps(message))
+        pipe.ltrim(key, 0, self.size - 1)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def get(self, room_id: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """warm 상태인 방의 최근 메시지를 최신순으로 돌려줍니다. 캐시로 응답할 수 없으면 None."""
+        client = redis_manager.redis_client
+        if not client or limit > self.size:
+            return None
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(self.warm_key(room_id))
+        pipe.lrange(self.key(room_id), 0, limit - 1)
+        warm, items = await pipe.execute()
+        if not warm:
+            return None
+        return [loads(item) for item in items]
+
+    async def recent(self, room_id: int) -> List[Dict[str, Any]]:
+        """warm 여부와 관계없이 캐시에 있는 메시지를 최신순으로 돌려줍니다."""
+        client = redis_manager.redis_client
+        if not client:
+            return []
+        return [loads(item) for item in await client.lrange(self.key(room_id), 0, -1)]
+
+    async def get_since(self, room_id: int, since_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        since_id보다 새로운 메시지를 오래된 순으로 돌려줍니다.
+        캐시만으로 빠짐없이 답할 수 없으면(since_id가 캐시 범위보다 오래됨) None.
+        """
+        client = redis_manager.redis_client
+        if not client:
+            return None
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(self.warm_key(room_id))
+        pipe.lrange(self.key(room_id), 0, -1)
+        warm, items = await pipe.execute()
+        messages = [loads(item) for item in items]
+        # 캐시에 since_id 이하의 항목이 있거나, DB에서 채운 뒤로 한 번도 넘치지 않았다면 빈틈이 없습니다.
+        # (리스트가 비어 있으면 만료/축출됐을 수 있으므로 DB로 넘깁니다)
+        covered = messages and (messages[-1]["id"] <= since_id or (warm and len(messages) < self.size))
+        if not covered:
+            return None
+        return [message for message in reversed(messages) if message["id"] > since_id]
+
+    async def fill(self, room_id: int, messages: List[Dict[str, Any]]):
+        """
+        DB에서 읽은 최근 메시지로 캐시를 채웁니다.
+        DB 조회 이후 브로드캐스트되어 아직 저장되지 않은 메시지도 잃지 않도록,
+        이미 리스트에 있던 항목과 합친 뒤 id 역순으로 다시 씁니다.
+        """
+        client = redis_manager.redis_client
+        if not client:
+            return
+        key = self.key(room_id)
+        fresh = {message["id"]: message for message in messages}
+        async with client.pipeline(transaction=True) as pipe:
+            for _ in range(3):
+                try:
+                    await pipe.watch(key)
+                    for item in await pipe.lrange(key, 0, -1):
+                        message = loads(item)
+                        fresh.setdefault(message["id"], message)
+                    merged = sorted(fresh.values(), key=lambda m: m["id"], reverse=True)[: self.size]
+                    pipe.multi()
+                    pipe.delete(key)
+                    if merged:
+                        pipe.rpush(key, *[dumps(m) for m in merged])
+                        pipe.expire(key, self.ttl)
+                    pipe.set(self.warm_key(room_id), 1, ex=self.ttl)
+                    await pipe.execute()
+                    return
+                except redis.WatchError:
+                    continue # 그 사이에 새 메시지가 추가됨. 다시 시도합니다.
+
+    async def invalidate(self, room_id: int):
+        client = redis_manager.redis_client
+        if client:
+            await client.delete(self.key(room_id), self.warm_key(room_id))
+
+history_cache = HistoryCache()
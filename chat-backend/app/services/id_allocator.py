@@ -0,0 +1,75 @@
+from app.services.redis_manager import redis_manager
+
+# 카운터를 floor 이상으로만 올립니다. (여러 노드가 동시에 맞춰도 카운터가 뒤로 가지 않도록)
+RAISE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local floor = tonumber(ARGV[1])
+if current < floor then
+    redis.call('SET', KEYS[1], floor)
+    return floor
+end
+return current
+"""
+
+class IdsUnavailable(Exception):
+    """Redis 없이 발급하면 다른 노드와 ID가 겹칠 수 있어 발급하지 않았습니다."""
+
+class MessageIdAllocator:
+    """
+    메시지 ID를 브로드캐스트 시점에 발급합니다. (DB 저장은 나중에 배치로 이루어지므로)
+    모든 노드가 Redis INCR 카운터 하나를 공유하므로 ID는 발급 순서대로 증가합니다.
+    Redis가 없을 때는 브로커가 프로세스 내(memory, 단일 노드)인 경우에만 로컬 카운터로 발급하고,
+    여러 노드가 쓰는 redis 브로커라면 노드끼리 ID가 겹치지 않도록 IdsUnavailable을 던집니다.
+    """
+
+    KEY = "chat_message_id"
+
+    def __init__(self):
+        self.local_id = 0
+        self.script = None
+
+    def _script(self, client):
+        if self.script is None or self.script.registered_client is not client:
+            self.script = client.register_script(RAISE_SCRIPT)
+        return self.script
+
+    def _check_local(self):
+        if redis_manager.broker.name != "memory":
+            raise IdsUnavailable("Redis is unavailable")
+
+    async def seed(self, floor: int):
+        """카운터가 floor(이미 저장되었거나 발급한 가장 큰 ID)보다 작지 않도록 맞춥니다."""
+        self.local_id = max(self.local_id, floor)
+        client = redis_manager.redis_client
+        if client:
+            await self._script(client)(keys=[self.KEY], args=[self.local_id])
+
+    async def reseed(self):
+        """Redis 재연결 후 DB에 저장된 가장 큰 ID와 이 노드가 발급한 ID 이상으로 카운터를 올립니다. (노드마다 실행)"""
+        from app.db.database import AsyncSessionLocal
+        from app.crud.messages import get_max_message_id
+
+        async with AsyncSessionLocal() as db:
+            await self.seed(await get_max_message_id(db))
+
+    async def next_ids(self, count: int) -> range:
+        """연속된 ID count개를 한 번에 발급합니다. (가져오기 등 대량 저장용)"""
+        client = redis_manager.redis_client
+        if client:
+            self.local_id = await client.incrby(self.KEY, count)
+        else:
+            self._check_local()
+            self.local_id += count
+        return range(self.local_id - count + 1, self.local_id + 1)
+
+    async def next_id(self) -> int:
+        client = redis_manager.redis_client
+        if client:
+            self.local_id = await client.incr(self.KEY)
+            return self.local_id
+        self._check_local()
+        self.local_id += 1
+        return self.local_id
+
+message_id_allocator = MessageIdAllocator()
+redis_manager.on_reconnect(message_id_allocator.reseed)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from app.core.config import get_settings
+from app.core import metrics
+from app.crud import archive as crud_archive
+from app.crud import partitions
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 여러 노드 중 하나만 유지보수를 실행하도록 잡는 PostgreSQL advisory lock 키 (임의의 고정값)
+ARCHIVE_LOCK_KEY = 7_240_001
+
+class MessageArchiver:
+    """
+    메시지 저장소 유지보수 작업입니다. interval마다 다음을 합니다.
+    - 다음 달 파티션을 미리 만듭니다. (PostgreSQL)
+    - retention_days가 지난 메시지를 방별로 segment_size개씩 세그먼트 파일로 옮기고 DB에서 지웁니다.
+      보관 기준은 월 단위로 내림하므로 한 번 비워진 월 파티션은 더 이상 쓰이지 않습니다.
+    - 다 비워진 오래된 월 파티션을 DETACH 후 DROP합니다.
+    배치 사이에는 잠깐 쉬어서 실시간 쓰기와 잠금을 다투지 않게 합니다.
+    모든 노드가 이 작업을 띄우지만 PostgreSQL advisory lock을 잡은 노드 하나만 실행합니다.
+    세그먼트 파일은 다른 노드도 읽으므로 MESSAGE_ARCHIVE_DIR은 모든 노드가 공유하는 저장소여야 합니다.
+    """
+
+    def __init__(
+        self,
+        retention_days: int = settings.MESSAGE_RETENTION_DAYS,
+        segment_size: int = settings.MESSAGE_ARCHIVE_SEGMENT_SIZE,
+        interval: int = settings.MESSAGE_ARCHIVE_INTERVAL_SECONDS,
+        months_ahead: int = settings.MESSAGE_PARTITION_MONTHS_AHEAD,
+        pause_ms: int = settings.ROOM_PURGE_PAUSE_MS,
+    ):
+        self.retention_days = retention_days
+        self.segment_size = segment_size
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.pause = pause_ms / 1000
+        self.task: asyncio.Task | None = None
+
+    def cutoff(self, now: datetime) -> datetime:
+        return partitions.month_start(now - timedelta(days=self.retention_days))
+
+    async def run_once(self) -> int:
+        """유지보수를 한 번 실행하고 보관한 메시지 수를 돌려줍니다. 다른 노드가 실행 중이면 건너뛰고 0."""
+        from app.db.database import advisory_lock
+
+        async with advisory_lock(ARCHIVE_LOCK_KEY) as acquired:
+            if not acquired:
+                logger.debug("Another node holds the archive lock; skipping this run")
+                return 0
+            return await self._maintain()
+
+    async def _maintain(self) -> int:
+        from app.db.database import persistence_engine, PersistenceSessionLocal
+
+        now = datetime.now(timezone.utc)
+        async with persistence_engine.begin() as conn:
+            await partitions.ensure_partitions(conn, self.months_ahead, now)
+        if self.retention_days <= 0:
+            return 0
+
+        cutoff = self.cutoff(now)
+        archived = 0
+        async with PersistenceSessionLocal() as db:
+            room_ids = await crud_archive.get_rooms_with_messages_before(db, cutoff)
+        for room_id in room_ids:
+            while True:
+                async with PersistenceSessionLocal() as db:
+                    count = await crud_archive.archive_room_batch(db, room_id, cutoff, self.segment_size)
+                archived += count
+                metrics.MESSAGES_ARCHIVED.inc(count)
+                if count < self.segment_size:
+                    break
+                await asyncio.sleep(self.pause)
+
+        async with persistence_engine.begin() as conn:
+            dropped = await partitions.drop_partitions_before(conn, cutoff)
+        if archived or dropped:
+            logger.info("Archived %d messages older than %s, dropped partitions: %s", archived, cutoff.date(), dropped)
+        return archived
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Message archive maintenance failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+message_archiver = MessageArchiver()
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict
+from app.core.serialization import dumps
+from app.services.redis_manager import redis_manager
+from app.services.id_allocator import message_id_allocator
+from app.services.history_cache import history_cache
+from app.services.room_hub import room_hub
+from app.services.message_queue import message_queue
+
+# ID 발급(INCR) -> 최근 메시지 캐시 추가 -> 방 채널 발행 -> (redis_stream이면) 영속화 스트림 추가를
+# 한 번의 왕복으로 실행합니다.
+# 스크립트는 원자적으로 실행되므로 한 방 안에서는 ID 순서와 발행 순서가 항상 같고,
+# 발행된 메시지는 반드시 캐시에도 들어 있습니다. (재접속 시 since 이후를 빠짐없이 찾을 수 있음)
+# 본문 JSON은 파이썬에서 한 번 인코딩하고, 스크립트는 앞에 id만 이어 붙입니다.
+PUBLISH_SCRIPT = """
+local id = redis.call('INCR', KEYS[1])
+redis.call('LPUSH', KEYS[2], '{"id":' .. id .. ',' .. ARGV[1])
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[3]) - 1)
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[4]))
+redis.call('PUBLISH', ARGV[5], '{"type":"message","id":' .. id .. ',' .. ARGV[2])
+local depth = -1
+if KEYS[3] then
+    redis.call('XADD', KEYS[3], '*', 'data', '{"id":' .. id .. ',' .. ARGV[6])
+    depth = redis.call('XLEN', KEYS[3])
+end
+return {id, depth}
+"""
+
+def message_frame(message: Dict[str, Any]) -> Dict[str, Any]:
+    """MessageDisplay 형태의 메시지를 웹소켓 브로드캐스트 프레임으로 바꿉니다."""
+    timestamp = message["timestamp"]
+    return {
+        "type": "message",
+        "id": message["id"],
+        "room_id": message["room_id"],
+        "sender_id": message["sender_id"],
+        "username": message["sender_username"],
+        "message": message["content"],
+        "timestamp": timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+    }
+
+def _body(obj: Dict[str, Any]) -> str:
+    # '{"a":1}' -> '"a":1}' : 스크립트가 앞에 '{"id":N,'을 붙일 수 있도록 여는 괄호를 뗍니다.
+    return dumps(obj)[1:]
+
+def _record(message: Dict[str, Any]) -> Dict[str, Any]:
+    """영속화 큐에 넣는 행. (sender_username은 DB에 저장하지 않습니다)"""
+    return {key: message[key] for key in ("id", "room_id", "sender_id", "content", "timestamp")}
+
+class MessagePublisher:
+    """채팅 메시지에 ID와 시각을 정하고 방 채널로 발행한 뒤 영속화 큐에 넣습니다."""
+
+    def __init__(self):
+        self.script = None
+        self.lock = asyncio.Lock()
+
+    def _script(self, client):
+        if self.script is None or self.script.registered_client is not client:
+            self.script = client.register_script(PUBLISH_SCRIPT)
+        return self.script
+
+    async def publish(self, room_id: int, sender_id: int, sender_username: str, content: str) -> Dict[str, Any]:
+        """메시지를 발행하고 영속화 큐에 넣은 뒤 MessageDisplay 형태로 돌려줍니다."""
+        message = {
+            "room_id": room_id,
+            "sender_id": sender_id,
+            "sender_username": sender_username,
+            "content": content,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        if not redis_manager.pubsub_on_redis:
+            # 프로세스 내 브로커: 인코딩한 프레임을 로컬 구독자에게 바로 넘깁니다.
+            # 스크립트 대신 락으로 ID 순서와 발행 순서를 맞춥니다.
+            async with self.lock:
+                message["id"] = await message_id_allocator.next_id()
+                await history_cache.push(room_id, message)
+                await redis_manager.publish(room_hub.channel_name(room_id), dumps(message_frame(message)))
+            await message_queue.add_message(_record(message))
+            return message
+        client = redis_manager.redis_client
+        frame = message_frame({**message, "id": 0})
+        del frame["type"], frame["id"]
+        record = _record({**message, "id": 0})
+        del record["id"]
+        keys = [message_id_allocator.KEY, history_cache.key(room_id)]
+        stream = message_queue.stream
+        if stream:
+            keys.append(stream)
+        message_id, depth = await self._script(client)(
+            keys=keys,
+            args=[
+                _body(message), _body(frame), history_cache.size, history_cache.ttl,
+                room_hub.channel_name(room_id), _body(record),
+            ],
+        )
+        message["id"] = message_id_allocator.local_id = int(message_id)
+        if stream:
+            await message_queue.added(depth)
+        else:
+            await message_queue.add_message(_record(message))
+        return message
+
+message_publisher = MessagePublisher()
@@ -1,42 +1,163 @@
 import asyncio
-from collections import deque
-from typing import Dict, Any
+import logging
+import time
+from typing import Dict, Any, List, Optional
+from sqlalchemy.exc import DataError, IntegrityError
+from app.core.config import get_settings
+from app.core import metrics
+from app.services.queue_backends import create_queue_backend, QueueEntry, RedisStreamQueueBackend
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 특정 행 때문에 나는 오류. 다시 시도해도 같은 결과이므로 한 행씩 넣어 보고 실패한 행만 dead letter로 뺍니다.
+# 그 밖의 오류(연결 끊김 등)는 일시적인 것으로 보고 배치 전체를 나중에 다시 처리합니다.
+ROW_ERRORS = (IntegrityError, DataError, KeyError, TypeError, ValueError)
 
 class MessageQueue:
-    def __init__(self):
-        self.queue: deque[Dict[str, Any]] = deque()
-        self.lock = asyncio.Lock()
-        self.processing = False
+    """
+    채팅 메시지를 모아서 DB에 저장하는 write-behind 큐입니다.
+    - 저장소는 교체 가능한 백엔드가 담당합니다. (memory: 개발용 deque, redis_stream: Redis Streams)
+    - 워커는 큐를 배치 크기 또는 대기 시간 기준으로 한 번에 비웁니다.
+    - 배치마다 bulk INSERT 한 번, 커밋 한 번만 수행하고, 커밋이 끝난 항목만 ack 합니다.
+    - 삭제되었거나 없는 방의 메시지는 저장하지 않고 ack 합니다. (방 정리 작업과 FK 충돌 방지)
+    - 배치가 잘못된 행 때문에 실패하면 한 행씩 다시 넣어서 나머지는 저장하고, 실패한 행만 dead letter로 뺍니다.
+      DB 연결 오류처럼 일시적인 실패면 배치를 큐에 돌려놓고 잠시 쉰 뒤 다시 시도합니다.
+    - 큐가 high_water 이상 쌓이면 add_message는 워커가 따라잡을 때까지 대기합니다.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        batch_size: int = settings.MESSAGE_QUEUE_BATCH_SIZE,
+        batch_interval_ms: int = settings.MESSAGE_QUEUE_BATCH_INTERVAL_MS,
+        workers: int = settings.MESSAGE_QUEUE_WORKERS,
+        high_water: int = settings.MESSAGE_QUEUE_HIGH_WATER,
+        consume: bool = settings.MESSAGE_QUEUE_CONSUMER,
+    ):
+        self.backend = backend or create_queue_backend(settings)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval_ms / 1000
+        self.worker_count = max(1, workers)
+        self.high_water = high_water
+        self.consume = consume
+        self.workers: List[asyncio.Task] = []
+
+    @property
+    def stream(self) -> Optional[str]:
+        """redis_stream 백엔드면 스트림 키. (발행 스크립트가 같은 왕복에서 바로 XADD할 수 있도록)"""
+        return self.backend.stream if isinstance(self.backend, RedisStreamQueueBackend) else None
+
+    @property
+    def durable(self) -> bool:
+        """큐가 노드 밖(Redis 스트림)에 있어 이 노드가 내려가도 다른 consumer가 이어서 저장하는지 여부."""
+        return self.stream is not None
 
     async def add_message(self, message: Dict[str, Any]):
-        async with self.lock:
-            self.queue.append(message)
-            if not self.processing:
-                self.processing = True
-                asyncio.create_task(self._process_queue())
+        await self.added(await self.backend.put(message))
+
+    async def added(self, depth: int):
+        """큐에 항목이 들어간 뒤(직접 XADD한 경우 포함) 워커를 깨우고 backpressure를 적용합니다."""
+        self.start()
+        # backpressure: 큐가 가득 차 있으면 워커가 비울 때까지 기다립니다.
+        if depth >= self.high_water:
+            await self.backend.wait_not_full(self.high_water)
+
+    async def size(self) -> int:
+        return await self.backend.size()
 
-    async def _process_queue(self):
-        from app.db.database import AsyncSessionLocal
-        from app.crud.messages import create_chat_message
-        from app.schemas.message import MessageCreate
+    def start(self):
+        """영속화 워커를 시작합니다. consumer가 아닌 노드(발행 전용)에서는 아무것도 하지 않습니다."""
+        if not self.consume:
+            return
+        self.workers = [task for task in self.workers if not task.done()]
+        while len(self.workers) < self.worker_count:
+            self.workers.append(asyncio.create_task(self._worker()))
 
+    async def stop(self):
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def _worker(self):
         while True:
-            async with self.lock:
-                if not self.queue:
-                    self.processing = False
-                    break
-                message_data = self.queue.popleft()
-            
-            async with AsyncSessionLocal() as db:
+            try:
+                batch = await self.backend.read_batch(self.batch_size, self.batch_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Failed to read from message queue: %s", e)
+                await asyncio.sleep(1)
+                continue
+            if batch:
+                await self._save_batch(batch)
+
+    async def _insert(self, batch: List[QueueEntry]) -> int:
+        """배치를 트랜잭션 하나로 저장하고 저장한 행 수를 돌려줍니다. 삭제되었거나 없는 방의 메시지는 건너뜁니다."""
+        from app.db.database import PersistenceSessionLocal
+        from app.crud.messages import bulk_create_chat_messages
+        from app.crud.rooms import get_live_room_ids
+
+        async with PersistenceSessionLocal() as db:
+            live_rooms = await get_live_room_ids(db, {message["room_id"] for _, message in batch})
+            rows = [message for _, message in batch if message["room_id"] in live_rooms]
+            if len(rows) < len(batch):
+                logger.info("Dropping %d queued messages for deleted rooms", len(batch) - len(rows))
+            await bulk_create_chat_messages(db, rows)
+        return len(rows)
+
+    async def _save_batch(self, batch: List[QueueEntry]):
+        started = time.perf_counter()
+        try:
+            saved = await self._insert(batch)
+        except ROW_ERRORS as e:
+            metrics.PERSIST_FAILURES.inc()
+            logger.warning("Batch of %d messages was rejected (%s); retrying one by one", len(batch), e)
+            await self._save_rows(batch)
+            return
+        except Exception as e:
+            metrics.PERSIST_FAILURES.inc()
+            logger.error("Failed to save %d messages to DB: %s", len(batch), e)
+            await self._retry_later(batch)
+            return
+        metrics.BATCH_COMMIT_SECONDS.observe(time.perf_counter() - started)
+        metrics.BATCH_SIZE.observe(len(batch))
+        metrics.MESSAGES_PERSISTED.inc(saved)
+        logger.debug("Saved %d messages to DB", saved)
+        await self._ack(batch)
+
+    async def _save_rows(self, batch: List[QueueEntry]):
+        """한 행씩 저장합니다. 그 행 때문에 실패하면 dead letter로 빼고, 일시적인 실패면 남은 행을 나중에 다시 처리합니다."""
+        saved: List[QueueEntry] = []
+        for index, entry in enumerate(batch):
+            try:
+                metrics.MESSAGES_PERSISTED.inc(await self._insert([entry]))
+                saved.append(entry)
+            except ROW_ERRORS as e:
+                logger.error("Dead-lettering message %s: %s", entry[1].get("id"), e)
+                metrics.MESSAGES_DEAD_LETTERED.inc()
                 try:
-                    # MessageCreate 스키마에 맞게 데이터 준비
-                    msg_schema = MessageCreate(content=message_data["content"])
-                    await create_chat_message(db, msg_schema, message_data["room_id"], message_data["sender_id"])
-                    print(f"Message saved to DB: {message_data['content']}")
-                except Exception as e:
-                    print(f"Failed to save message to DB: {e}")
-                    # 재시도 로직 추가 가능
+                    await self.backend.dead_letter([entry], str(e))
+                except Exception as dead_letter_error:
+                    logger.error("Failed to dead-letter message %s: %s", entry[1].get("id"), dead_letter_error)
+            except Exception as e:
+                logger.error("Failed to save message %s to DB: %s", entry[1].get("id"), e)
+                await self._ack(saved)
+                await self._retry_later(batch[index:])
+                return
+        await self._ack(saved)
+
+    async def _retry_later(self, batch: List[QueueEntry]):
+        # 인메모리 백엔드는 큐 앞에 돌려놓고, redis_stream은 ack하지 않은 항목을 XAUTOCLAIM으로 다시 읽습니다.
+        await self.backend.requeue(batch)
+        await asyncio.sleep(1) # DB가 복구될 때까지 바로 다시 두드리지 않도록
 
-            await asyncio.sleep(0.1) # 비동기 I/O를 위한 작은 지연
+    async def _ack(self, batch: List[QueueEntry]):
+        try:
+            await self.backend.ack([entry_id for entry_id, _ in batch if entry_id is not None])
+        except Exception as e:
+            logger.error("Failed to ack %d messages: %s", len(batch), e)
 
-message_queue = MessageQueue()
\ No newline at end of file
+message_queue = MessageQueue()
+metrics.MESSAGE_QUEUE_DEPTH.set_function(message_queue.size)
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Tuple
+from app.core.config import get_settings
+from app.services.redis_manager import redis_manager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (room_id, user_id, username)
+PresenceKey = Tuple[int, int, str]
+
+class PresenceTracker:
+    """
+    Redis sorted set 기반의 멀티 노드 접속자 레지스트리입니다.
+    - presence:room:{room_id}  member "{user_id}:{username}", score = 만료 시각
+    - presence:user:{user_id}  member "{room_id}@{node_id}", score = 만료 시각 (사용자 -> 방 -> 노드)
+    입장/퇴장은 해당 항목만 갱신하고, 각 노드는 자기 로컬 접속을 heartbeat로 주기적으로 연장합니다.
+    조회는 만료 시각 점수 범위(ZCOUNT/ZRANGEBYSCORE)로만 하므로 전체 스캔이 없고,
+    죽은 노드의 항목은 TTL이 지나면 자연히 빠집니다.
+    Redis가 없으면 이 프로세스의 로컬 정보만으로 응답합니다.
+    """
+
+    def __init__(
+        self,
+        node_id: str = settings.NODE_ID,
+        ttl: int = settings.PRESENCE_TTL_SECONDS,
+        interval: int = settings.PRESENCE_HEARTBEAT_SECONDS,
+    ):
+        self.node_id = node_id
+        self.ttl = ttl
+        self.interval = interval
+        self.local: Dict[PresenceKey, int] = {} # 이 노드의 (방, 사용자)별 소켓 수
+        self.task: asyncio.Task | None = None
+
+    @staticmethod
+    def room_key(room_id: int) -> str:
+        return f"presence:room:{room_id}"
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return f"presence:user:{user_id}"
+
+    def _expiry(self) -> float:
+        return time.time() + self.ttl
+
+    def _add(self, pipe, key: PresenceKey, expires_at: float):
+        room_id, user_id, username = key
+        pipe.zadd(self.room_key(room_id), {f"{user_id}:{username}": expires_at})
+        pipe.expire(self.room_key(room_id), self.ttl * 2)
+        pipe.zadd(self.user_key(user_id), {f"{room_id}@{self.node_id}": expires_at})
+        pipe.expire(self.user_key(user_id), self.ttl * 2)
+
+    async def join(self, room_id: int, user_id: int, username: str):
+        key = (room_id, user_id, username)
+        self.local[key] = self.local.get(key, 0) + 1
+        client = redis_manager.redis_client
+        if self.local[key] > 1 or not client:
+            return
+        pipe = client.pipeline(transaction=False)
+        self._add(pipe, key, self._expiry())
+        await pipe.execute()
+
+    async def leave(self, room_id: int, user_id: int, username: str):
+        key = (room_id, user_id, username)
+        count = self.local.get(key, 0) - 1
+        if count > 0:
+            self.local[key] = count
+            return
+        self.local.pop(key, None)
+        client = redis_manager.redis_client
+        if not client:
+            return
+        pipe = client.pipeline(transaction=False)
+        pipe.zrem(self.user_key(user_id), f"{room_id}@{self.node_id}")
+        pipe.zrangebyscore(self.user_key(user_id), time.time(), "+inf")
+        _, remaining = await pipe.execute()
+        # 다른 노드에서 같은 방에 접속해 있으면 방 목록에는 남겨둡니다.
+        if not any(member.startswith(f"{room_id}@") for member in remaining):
+            await client.zrem(self.room_key(room_id), f"{user_id}:{username}")
+
+    async def heartbeat(self):
+        """이 노드의 모든 로컬 접속을 한 번의 파이프라인으로 연장하고, 만료된 항목을 정리합니다."""
+        client = redis_manager.redis_client
+        if not client or not self.local:
+            return
+        now = time.time()
+        expires_at = now + self.ttl
+        pipe = client.pipeline(transaction=False)
+        for key in self.local:
+            self._add(pipe, key, expires_at)
+        for room_id in {room_id for room_id, _, _ in self.local}:
+            pipe.zremrangebyscore(self.room_key(room_id), "-inf", now)
+        await pipe.execute()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.warning("Presence heartbeat failed: %s", e)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def online_users(self, room_id: int) -> List[Dict]:
+        client = redis_manager.redis_client
+        if client:
+            members = await client.zrangebyscore(self.room_key(room_id), time.time(), "+inf")
+        else:
+            members = [f"{user_id}:{username}" for (rid, user_id, username) in self.local if rid == room_id]
+        users = []
+        for member in members:
+            user_id, _, username = member.partition(":")
+            users.append({"user_id": int(user_id), "username": username})
+        return users
+
+    async def online_counts(self, room_ids: Iterable[int]) -> Dict[int, int]:
+        """여러 방의 접속자 수를 한 번의 파이프라인(ZCOUNT)으로 조회합니다."""
+        room_ids = list(room_ids)
+        client = redis_manager.redis_client
+        if not client:
+            counts: Dict[int, int] = {}
+            for rid, _, _ in self.local:
+                counts[rid] = counts.get(rid, 0) + 1
+            return {room_id: counts.get(room_id, 0) for room_id in room_ids}
+        if not room_ids:
+            return {}
+        now = time.time()
+        pipe = client.pipeline(transaction=False)
+        for room_id in room_ids:
+            pipe.zcount(self.room_key(room_id), now, "+inf")
+        return dict(zip(room_ids, await pipe.execute()))
+
+presence = PresenceTracker()
@@ -0,0 +1,49 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.crud import users as crud_users
+from app.crud import rooms as crud_rooms
+from app.schemas.user import UserInDB
+from app.schemas.room import RoomDisplay
+
+settings = get_settings()
+
+class PrincipalCache:
+    """
+    인증된 사용자와 채팅방 존재 여부를 짧게 캐시해서
+    REST 요청과 웹소켓 접속마다 같은 SELECT가 반복되지 않도록 합니다.
+    존재하지 않는 사용자/방은 캐시하지 않으므로 새로 생긴 항목은 바로 보입니다.
+    """
+
+    def __init__(self, maxsize: int = settings.PRINCIPAL_CACHE_SIZE, ttl: int = settings.PRINCIPAL_CACHE_TTL_SECONDS):
+        self.users = TTLCache(maxsize, ttl) # username -> UserInDB
+        self.rooms = TTLCache(maxsize, ttl) # room_id -> RoomDisplay
+
+    async def get_user(self, db: AsyncSession, username: str) -> Optional[UserInDB]:
+        user = self.users.get(username)
+        if user is None:
+            db_user = await crud_users.get_user_by_username(db, username=username)
+            if db_user is None:
+                return None
+            user = UserInDB.model_validate(db_user)
+            self.users.set(username, user)
+        return user
+
+    async def get_room(self, db: AsyncSession, room_id: int) -> Optional[RoomDisplay]:
+        room = self.rooms.get(room_id)
+        if room is None:
+            db_room = await crud_rooms.get_room_by_id(db, room_id=room_id)
+            if db_room is None:
+                return None
+            room = RoomDisplay.model_validate(db_room)
+            self.rooms.set(room_id, room)
+        return room
+
+    def invalidate_user(self, username: str):
+        self.users.invalidate(username)
+
+    def invalidate_room(self, room_id: int):
+        self.rooms.invalidate(room_id)
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+import redis.asyncio as redis
+from app.core.config import get_settings
+from app.core import metrics
+from app.services.redis_manager import redis_manager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (항목 ID, 메시지) 쌍. 인메모리 백엔드는 ack가 필요 없으므로 ID가 None입니다.
+QueueEntry = Tuple[Optional[str], Dict[str, Any]]
+
+class InMemoryQueueBackend:
+    """
+    개발용 기본 백엔드입니다. 프로세스 메모리의 deque에 보관하므로
+    재시작하면 아직 저장되지 않은 메시지는 사라집니다.
+    dead letter는 최근 dead_letter_size개만 메모리에 남깁니다.
+    """
+
+    def __init__(self, dead_letter_size: int = 1000):
+        self.queue: deque[Dict[str, Any]] = deque()
+        self.not_empty = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.dead_letters: deque[Dict[str, Any]] = deque(maxlen=dead_letter_size)
+
+    async def put(self, message: Dict[str, Any]) -> int:
+        self.queue.append(message)
+        self.not_empty.set()
+        return len(self.queue)
+
+    async def size(self) -> int:
+        return len(self.queue)
+
+    async def wait_not_full(self, high_water: int):
+        while len(self.queue) >= high_water:
+            self.drained.clear()
+            await self.drained.wait()
+
+    async def read_batch(self, max_count: int, interval: float) -> List[QueueEntry]:
+        await self.not_empty.wait()
+        # 배치가 아직 다 차지 않았다면 interval 동안 더 모읍니다.
+        if len(self.queue) < max_count:
+            await asyncio.sleep(interval)
+        batch = []
+        while self.queue and len(batch) < max_count:
+            batch.append((None, self.queue.popleft()))
+        if not self.queue:
+            self.not_empty.clear()
+        self.drained.set()
+        return batch
+
+    async def ack(self, entry_ids: List[str]):
+        pass
+
+    async def requeue(self, entries: List[QueueEntry]):
+        """저장하지 못한 항목을 원래 순서대로 큐 앞에 돌려놓습니다."""
+        self.queue.extendleft(reversed([message for _, message in entries]))
+        if self.queue:
+            self.not_empty.set()
+
+    async def dead_letter(self, entries: List[QueueEntry], reason: str):
+        for _, message in entries:
+            self.dead_letters.append({"message": message, "reason": reason})
+
+class RedisStreamQueueBackend:
+    """
+    Redis Streams + consumer group 기반의 내구성 있는 백엔드입니다.
+    - put: XADD로 스트림에 추가하므로 프로세스가 죽어도 메시지가 남습니다.
+    - read_batch: XREADGROUP으로 배치 단위로 읽고, 죽은 consumer가 들고 있던
+      pending 항목은 XAUTOCLAIM으로 회수합니다.
+    - ack: DB 커밋이 끝난 항목만 XACK 후 XDEL 합니다. 따라서 XLEN이 곧 미처리 건수입니다.
+    - dead_letter: 저장할 수 없는 항목은 "{stream}:dead" 스트림에 사유와 함께 옮기고 ack 합니다.
+      회수할 때 이미 max_deliveries번 전달된 항목과 디코딩할 수 없는 항목도 여기로 보냅니다.
+      (그대로 두면 회수 -> 실패 -> 회수를 끝없이 반복합니다)
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        group: str,
+        claim_idle_ms: int,
+        consumer: Optional[str] = None,
+        max_deliveries: int = settings.MESSAGE_QUEUE_MAX_DELIVERIES,
+    ):
+        self.stream = stream
+        self.dead_letter_stream = f"{stream}:dead"
+        self.group = group
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.consumer = consumer or settings.NODE_ID
+        self.group_ready = False
+        self.last_claim = 0.0
+
+    def _client(self):
+        if not redis_manager.redis_client:
+            raise ConnectionError("Redis is not connected")
+        return redis_manager.redis_client
+
+    async def _ensure_group(self):
+        if self.group_ready:
+            return
+        try:
+            await self._client().xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e): # 이미 그룹이 있으면 무시
+                raise
+        self.group_ready = True
+
+    async def put(self, message: Dict[str, Any]) -> int:
+        pipe = self._client().pipeline(transaction=False)
+        pipe.xadd(self.stream, {"data": json.dumps(message)})
+        pipe.xlen(self.stream)
+        _, depth = await pipe.execute()
+        return depth
+
+    async def size(self) -> int:
+        return await self._client().xlen(self.stream)
+
+    async def wait_not_full(self, high_water: int):
+        while await self.size() >= high_water:
+            await asyncio.sleep(0.05)
+
+    async def read_batch(self, max_count: int, interval: float) -> List[QueueEntry]:
+        await self._ensure_group()
+        client = self._client()
+
+        # 1. 죽은 consumer가 ack하지 못한 항목을 주기적으로 회수합니다.
+        now = asyncio.get_running_loop().time()
+        if now - self.last_claim >= self.claim_idle_ms / 1000:
+            self.last_claim = now
+            result = await client.xautoclaim(
+                self.stream, self.group, self.consumer,
+                min_idle_time=self.claim_idle_ms, start_id="0-0", count=max_count
+            )
+            claimed = await self._drop_exhausted(await self._decode(result[1]))
+            if claimed:
+                return claimed
+
+        # 2. 새 항목을 기다립니다. (최대 1초 블록, 바쁜 폴링 없음)
+        response = await client.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=max_count, block=1000)
+        batch = await self._decode_response(response)
+        if batch and len(batch) < max_count:
+            # 배치가 아직 다 차지 않았다면 interval 동안 더 모읍니다.
+            await asyncio.sleep(interval)
+            response = await client.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=max_count - len(batch))
+            batch.extend(await self._decode_response(response))
+        return batch
+
+    async def _drop_exhausted(self, claimed: List[QueueEntry]) -> List[QueueEntry]:
+        """회수한 항목 중 max_deliveries번 넘게 전달된 것은 dead letter로 보내고 나머지를 돌려줍니다."""
+        if not claimed or self.max_deliveries <= 0:
+            return claimed
+        pipe = self._client().pipeline(transaction=False)
+        for entry_id, _ in claimed:
+            pipe.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        pending = await pipe.execute()
+        exhausted = [entry for entry, info in zip(claimed, pending) if info and info[0]["times_delivered"] > self.max_deliveries]
+        if exhausted:
+            logger.error("Dead-lettering %d messages delivered more than %d times", len(exhausted), self.max_deliveries)
+            metrics.MESSAGES_DEAD_LETTERED.inc(len(exhausted))
+            await self.dead_letter(exhausted, f"delivered more than {self.max_deliveries} times")
+        exhausted_ids = {entry_id for entry_id, _ in exhausted}
+        return [entry for entry in claimed if entry[0] not in exhausted_ids]
+
+    async def ack(self, entry_ids: List[str]):
+        if not entry_ids:
+            return
+        pipe = self._client().pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, *entry_ids)
+        pipe.xdel(self.stream, *entry_ids)
+        await pipe.execute()
+
+    async def requeue(self, entries: List[QueueEntry]):
+        pass # ack하지 않은 항목은 claim_idle_ms 뒤에 XAUTOCLAIM으로 다시 읽힙니다
+
+    async def dead_letter(self, entries: List[QueueEntry], reason: str):
+        pipe = self._client().pipeline(transaction=True)
+        for entry_id, message in entries:
+            pipe.xadd(self.dead_letter_stream, {"data": json.dumps(message), "entry_id": entry_id, "reason": reason})
+        entry_ids = [entry_id for entry_id, _ in entries]
+        pipe.xack(self.stream, self.group, *entry_ids)
+        pipe.xdel(self.stream, *entry_ids)
+        await pipe.execute()
+
+    async def _decode_response(self, response) -> List[QueueEntry]:
+        entries = []
+        for _, stream_entries in response or []:
+            entries.extend(await self._decode(stream_entries))
+        return entries
+
+    async def _decode(self, stream_entries) -> List[QueueEntry]:
+        entries, broken = [], []
+        for entry_id, fields in stream_entries:
+            if not fields: # 회수된 항목 중 이미 삭제된 것은 fields가 None으로 옵니다.
+                continue
+            try:
+                entries.append((entry_id, json.loads(fields["data"])))
+            except (KeyError, ValueError):
+                broken.append((entry_id, fields))
+        if broken:
+            logger.error("Dead-lettering %d undecodable stream entries", len(broken))
+            metrics.MESSAGES_DEAD_LETTERED.inc(len(broken))
+            await self.dead_letter(broken, "undecodable entry")
+        return entries
+
+def create_queue_backend(settings=settings):
+    """설정(MESSAGE_QUEUE_BACKEND)에 맞는 큐 백엔드를 생성합니다."""
+    if settings.MESSAGE_QUEUE_BACKEND == "redis_stream":
+        return RedisStreamQueueBackend(
+            stream=settings.MESSAGE_QUEUE_STREAM,
+            group=settings.MESSAGE_QUEUE_GROUP,
+            claim_idle_ms=settings.MESSAGE_QUEUE_CLAIM_IDLE_MS,
+        )
+    if settings.MESSAGE_QUEUE_BACKEND == "memory":
+        return InMemoryQueueBackend()
+    raise ValueError(f"Unknown MESSAGE_QUEUE_BACKEND: {settings.MESSAGE_QUEUE_BACKEND}")
@@ -0,0 +1,133 @@
+import logging
+import time
+from typing import Hashable
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.services.redis_manager import redis_manager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 토큰 버킷 한 번 소비. 해시에 (남은 토큰, 마지막 갱신 시각)을 저장하고,
+# 다 쓰면 다시 토큰 하나가 찰 때까지의 시간(초)을, 통과하면 0을 돌려줍니다.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+# 소비한 토큰 하나를 돌려줍니다. (burst를 넘지 않게, 버킷이 이미 만료됐으면 가득 찬 것이므로 아무것도 하지 않음)
+REFUND_SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + 1))
+end
+return 0
+"""
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 burst개까지 모이는 토큰 버킷입니다."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self) -> float:
+        """토큰 하나를 씁니다. 통과하면 0, 아니면 다음 토큰까지 기다려야 하는 시간(초)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+class RateLimiter:
+    """
+    키(사용자, 방 등)별 토큰 버킷 레이트 리미터입니다.
+    - 기본은 프로세스 내 버킷이라 노드마다 따로 셉니다.
+    - global_mode면 Redis 스크립트로 모든 노드가 같은 버킷을 씁니다.
+      Redis 호출이 실패하면 프로세스 내 버킷으로 대신 판단합니다.
+    - rate가 0 이하면 제한하지 않습니다.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, global_mode: bool = settings.RATE_LIMIT_GLOBAL):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.global_mode = global_mode
+        # 한동안 안 쓴 버킷은 가득 찬 상태와 같으므로 버려도 됩니다.
+        self.buckets = TTLCache(settings.RATE_LIMIT_MAX_KEYS, self.burst / rate + 1 if rate > 0 else 1)
+        self.script = None
+        self.refund_script = None
+
+    def key(self, key: Hashable) -> str:
+        return f"ratelimit:{self.name}:{key}"
+
+    def _script(self, client):
+        if self.script is None or self.script.registered_client is not client:
+            self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return self.script
+
+    def _refund_script(self, client):
+        if self.refund_script is None or self.refund_script.registered_client is not client:
+            self.refund_script = client.register_script(REFUND_SCRIPT)
+        return self.refund_script
+
+    def _local(self, key: Hashable) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+        self.buckets.set(key, bucket) # 쓸 때마다 만료 시각을 연장합니다
+        return bucket.consume()
+
+    async def hit(self, key: Hashable) -> float:
+        """요청 하나를 셉니다. 허용되면 0, 제한되면 재시도까지 기다릴 시간(초)."""
+        if self.rate <= 0:
+            return 0.0
+        client = redis_manager.redis_client
+        if self.global_mode and client:
+            try:
+                wait = await self._script(client)(keys=[self.key(key)], args=[self.rate, self.burst, time.time()])
+                return float(wait)
+            except Exception as e:
+                logger.warning("Global rate limit check failed for %s: %s", self.name, e)
+        return self._local(key)
+
+    async def refund(self, key: Hashable):
+        """hit()으로 통과시킨 요청을 취소하고 토큰을 돌려줍니다. (다른 제한에 걸려 요청이 처리되지 않은 경우)"""
+        if self.rate <= 0:
+            return
+        client = redis_manager.redis_client
+        if self.global_mode and client:
+            try:
+                await self._refund_script(client)(keys=[self.key(key)], args=[self.burst])
+                return
+            except Exception as e:
+                logger.warning("Global rate limit refund failed for %s: %s", self.name, e)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.refund()
+
+user_message_limiter = RateLimiter("user", settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST)
+room_message_limiter = RateLimiter("room", settings.RATE_LIMIT_ROOM_PER_SECOND, settings.RATE_LIMIT_ROOM_BURST)
@@ -1,40 +1,112 @@
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, List
 import redis.asyncio as redis
 from app.core.config import get_settings
+from app.services.brokers import InMemoryBroker, RedisBroker
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 class RedisManager:
-    def __init__(self):
-        self.redis_client = None
+    """
+    Redis 클라이언트(커넥션 풀)와 방 채널 pub/sub 브로커를 관리합니다.
+    브로커는 BROKER_BACKEND로 고릅니다.
+    - redis: Redis PUBLISH/SUBSCRIBE (여러 노드)
+    - memory: 프로세스 내 전달 (단일 노드, 벤치마크, 테스트)
+    - auto: Redis에 연결되면 redis, 아니면 memory
+    redis_client는 Redis가 응답할 때만 설정되고, 끊기면 None이 됩니다. (호출하는 쪽은 None이면 Redis 없이 동작)
+    백그라운드 감시 태스크가 주기적으로 PING하고, 끊기면 지수 백오프로 다시 연결한 뒤
+    on_reconnect()로 등록된 콜백(방 채널 재구독 등)을 실행합니다.
+    """
+
+    def __init__(self, backend: str = settings.BROKER_BACKEND):
+        if backend not in ("redis", "memory", "auto"):
+            raise ValueError(f"Unknown BROKER_BACKEND: {backend}")
+        self.backend = backend
+        self.client = None # 커넥션 풀을 가진 클라이언트 (연결 상태와 관계없이 유지)
+        self.redis_client = None # 정상일 때만 self.client
+        self.broker = InMemoryBroker() if backend == "memory" else RedisBroker(lambda: self.redis_client)
+        self.reconnect_callbacks: List[Callable[[], Awaitable[None]]] = []
+        self.task: asyncio.Task | None = None
+
+    def on_reconnect(self, callback: Callable[[], Awaitable[None]]):
+        """Redis가 끊겼다가 다시 연결될 때 실행할 코루틴 함수를 등록합니다."""
+        self.reconnect_callbacks.append(callback)
+
+    async def _ping(self) -> bool:
+        try:
+            await self.client.ping()
+            return True
+        except (redis.exceptions.RedisError, OSError) as e:
+            logger.error("Redis 연결 실패: %s", e)
+            return False
 
     async def connect(self):
-        if not self.redis_client:
-            self.redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-            try:
-                await self.redis_client.ping()
-                print("Redis 연결 성공!")
-            except redis.exceptions.ConnectionError as e:
-                print(f"Redis 연결 실패: {e}")
-                self.redis_client = None
+        if not self.client:
+            self.client = redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            )
+        if not self.redis_client and await self._ping():
+            self.redis_client = self.client
+            logger.info("Redis 연결 성공!")
+        if self.backend == "auto" and not self.redis_client and self.broker.name != "memory":
+            logger.warning("Redis를 사용할 수 없어 프로세스 내 브로커로 전환합니다. (다른 노드와 메시지를 주고받지 않음)")
+            self.broker = InMemoryBroker()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._supervise())
 
     async def disconnect(self):
-        if self.redis_client:
-            await self.redis_client.close()
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.client:
+            await self.client.close()
+            self.client = None
             self.redis_client = None
 
+    async def _supervise(self):
+        """연결 상태를 감시하다가 끊기면 백오프(지터 포함)로 다시 연결합니다."""
+        backoff = 1.0
+        while True:
+            if self.redis_client:
+                await asyncio.sleep(max(1, settings.REDIS_HEALTH_CHECK_INTERVAL))
+                if not await self._ping():
+                    logger.warning("Redis 연결이 끊겼습니다. 다시 연결을 시도합니다.")
+                    self.redis_client = None
+                continue
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+            if await self._ping():
+                logger.info("Redis 재연결 성공!")
+                self.redis_client = self.client
+                backoff = 1.0
+                for callback in self.reconnect_callbacks:
+                    try:
+                        await callback()
+                    except Exception as e:
+                        logger.error("Redis reconnect callback failed: %s", e)
+            else:
+                backoff = min(backoff * 2, settings.REDIS_RECONNECT_MAX_BACKOFF_SECONDS)
+
+    @property
+    def pubsub_on_redis(self) -> bool:
+        """방 채널이 Redis를 거치는지 여부. (Redis 스크립트 안에서 바로 PUBLISH해도 되는지)"""
+        return self.broker.name == "redis" and self.redis_client is not None
+
     async def publish(self, channel: str, message: str):
-        if self.redis_client:
-            await self.redis_client.publish(channel, message)
+        await self.broker.publish(channel, message)
 
     async def subscribe(self, channel: str):
-        if self.redis_client:
-            pubsub = self.redis_client.pubsub()
-            await pubsub.subscribe(channel)
-            return pubsub
-        return None
+        return await self.broker.subscribe(channel)
 
     async def unsubscribe(self, pubsub, channel: str):
-        if self.redis_client and pubsub:
-            await pubsub.unsubscribe(channel)
+        await self.broker.unsubscribe(pubsub, channel)
 
-redis_manager = RedisManager()
\ No newline at end of file
+redis_manager = RedisManager()
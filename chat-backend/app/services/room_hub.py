@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from fastapi import status
+from app.services.redis_manager import redis_manager
+from app.services.connection import Connection
+from app.services.principal_cache import principal_cache
+from app.core.serialization import dumps, json_to_msgpack
+from app.core import metrics
+from app.core.tasks import spawn
+
+logger = logging.getLogger(__name__)
+
+# 방 삭제 알림(tombstone) 프레임. dumps()는 항상 공백 없이 키 순서대로 인코딩하므로 접두어로 구분합니다.
+ROOM_DELETED_PREFIX = '{"type":"room_deleted"'
+ROOM_DELETED_CLOSE_CODE = 4404
+
+class RoomHub:
+    """
+    프로세스 단위의 채팅방 허브입니다.
+    - 방 하나당 Redis 구독(pubsub)은 프로세스 전체에서 하나만 유지합니다.
+    - 받은 메시지는 이 프로세스에 연결된 소켓마다 정확히 한 번씩 전송 큐에 넣습니다.
+      (실제 전송은 소켓별 writer가 하므로 느린 클라이언트가 다른 소켓을 막지 않습니다.)
+    - 방의 마지막 소켓이 나가면 구독을 해제합니다. (참조 카운트)
+    - Redis가 끊겼다가 다시 연결되면 열려 있는 방 채널을 모두 새로 구독합니다.
+    """
+
+    def __init__(self):
+        self.connections: dict[int, set[Connection]] = {}
+        self.pubsubs: dict[int, object] = {}
+        self.listeners: dict[int, asyncio.Task] = {}
+        self.lock = asyncio.Lock()
+
+    @staticmethod
+    def channel_name(room_id: int) -> str:
+        return f"chat_{room_id}"
+
+    async def join(self, room_id: int, connection: Connection) -> bool:
+        """연결을 방에 등록합니다. 방의 첫 연결이면 Redis 구독을 시작합니다."""
+        async with self.lock:
+            if room_id not in self.connections:
+                pubsub = await redis_manager.subscribe(self.channel_name(room_id))
+                if not pubsub:
+                    return False
+                self.pubsubs[room_id] = pubsub
+                self.connections[room_id] = set()
+                self.listeners[room_id] = asyncio.create_task(self._listen(room_id, pubsub))
+            self.connections[room_id].add(connection)
+            connection.rooms.add(room_id)
+            connection.on_dead = self._discard
+            return True
+
+    async def leave(self, room_id: int, connection: Connection):
+        """연결을 방에서 제거합니다. 마지막 연결이면 구독을 정리합니다."""
+        async with self.lock:
+            connection.rooms.discard(room_id)
+            sockets = self.connections.get(room_id)
+            if sockets is None:
+                return
+            sockets.discard(connection)
+            if sockets:
+                return
+            del self.connections[room_id]
+            listener = self.listeners.pop(room_id)
+            pubsub = self.pubsubs.pop(room_id)
+
+        listener.cancel()
+        await self._close_pubsub(room_id, pubsub)
+
+    async def _close_pubsub(self, room_id: int, pubsub):
+        try:
+            await redis_manager.unsubscribe(pubsub, self.channel_name(room_id))
+            await pubsub.close()
+        except Exception as e:
+            logger.warning("Failed to clean up subscription for room %s: %s", room_id, e)
+
+    async def resubscribe_all(self):
+        """Redis 재연결 후 열려 있는 방 채널을 새 연결로 다시 구독합니다. (끊긴 동안의 메시지는 ?since=로 복구)"""
+        if redis_manager.broker.name != "redis":
+            return
+        async with self.lock:
+            for room_id in list(self.connections):
+                pubsub = await redis_manager.subscribe(self.channel_name(room_id))
+                if not pubsub:
+                    logger.warning("Failed to resubscribe room %s", room_id)
+                    continue
+                self.listeners[room_id].cancel()
+                old = self.pubsubs[room_id]
+                self.pubsubs[room_id] = pubsub
+                self.listeners[room_id] = asyncio.create_task(self._listen(room_id, pubsub))
+                spawn(self._close_pubsub(room_id, old))
+        logger.info("Resubscribed %d room channels", len(self.connections))
+
+    def _discard(self, connection: Connection):
+        # 죽은 연결은 즉시 브로드캐스트 대상에서 뺍니다. 구독 정리는 해당 소켓 핸들러의 leave()에서 합니다.
+        for room_id in connection.rooms:
+            self.connections.get(room_id, set()).discard(connection)
+
+    async def _listen(self, room_id: int, pubsub):
+        """방 채널을 읽어 로컬 소켓들에게 한 번씩 전달합니다. 데이터가 올 때만 깨어납니다."""
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._broadcast(room_id, message["data"])
+                        if message["data"].startswith(ROOM_DELETED_PREFIX):
+                            self._close_room(room_id)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Redis listener error for room %s: %s", room_id, e)
+                await asyncio.sleep(1)
+
+    async def publish_tombstone(self, room_id: int):
+        """모든 노드에 방 삭제를 알립니다. 각 노드의 허브가 알림을 전달한 뒤 해당 방의 소켓을 닫습니다."""
+        await redis_manager.publish(self.channel_name(room_id), dumps({"type": "room_deleted", "room_id": room_id}))
+
+    def _close_room(self, room_id: int):
+        principal_cache.invalidate_room(room_id) # 이 노드에서 재접속을 바로 거절하도록
+        for connection in list(self.connections.get(room_id, set())):
+            if connection.multiplexed:
+                # 다른 방도 구독 중인 소켓은 닫지 않고 이 방에서만 뺍니다. (알림 프레임은 이미 큐에 들어감)
+                spawn(self.leave(room_id, connection))
+            else:
+                connection.close_after_flush(code=ROOM_DELETED_CLOSE_CODE, reason="Chat room deleted")
+
+    def _broadcast(self, room_id: int, data: str):
+        """
+        전송 큐에 넣기만 하므로 기다리지 않습니다. 큐가 넘친 느린 소켓은 끊습니다.
+        JSON 프레임은 발행할 때 한 번 인코딩된 문자열을 모든 소켓이 그대로 공유하고,
+        MessagePack 프레임은 바이너리 소켓이 있을 때만 메시지당 한 번 변환합니다.
+        """
+        started = time.perf_counter()
+        binary_frame = None
+        sockets = self.connections.get(room_id, set())
+        # 순회 중 집합이 바뀔 수 있으므로 복사본을 순회합니다.
+        for connection in list(sockets):
+            frame = data
+            if connection.binary:
+                if binary_frame is None:
+                    binary_frame = json_to_msgpack(data)
+                frame = binary_frame
+            if not connection.enqueue(frame):
+                logger.warning("Disconnecting slow consumer in room %s", room_id)
+                metrics.SLOW_CONSUMER_EVICTIONS.inc()
+                self._discard(connection)
+                spawn(connection.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Slow consumer"))
+        metrics.BROADCAST_SECONDS.observe(time.perf_counter() - started)
+        metrics.BROADCAST_RECIPIENTS.observe(len(sockets))
+
+room_hub = RoomHub()
+redis_manager.on_reconnect(room_hub.resubscribe_all)
+metrics.ACTIVE_ROOMS.set_function(lambda: len(room_hub.connections))
@@ -0,0 +1,42 @@
+from typing import List, Optional, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.crud import rooms as crud_rooms
+from app.schemas.room import RoomDisplay
+
+settings = get_settings()
+
+RoomCursor = Union[int, str, None]
+
+class RoomListCache:
+    """
+    GET /rooms 페이지를 (prefix, cursor, limit) 단위로 짧게 캐시합니다.
+    프론트엔드가 주기적으로 폴링하므로 같은 페이지의 SELECT가 반복되지 않게 하고,
+    방이 생성/삭제되면 이 노드의 캐시 전체를 비웁니다. (다른 노드는 TTL이 지나면 반영)
+    """
+
+    def __init__(self, maxsize: int = settings.ROOM_LIST_CACHE_SIZE, ttl: int = settings.ROOM_LIST_CACHE_TTL_SECONDS):
+        self.pages = TTLCache(maxsize, ttl)
+
+    async def get_page(
+        self, db: AsyncSession, limit: int, after: RoomCursor = None, name_prefix: Optional[str] = None
+    ) -> Tuple[List[RoomDisplay], RoomCursor]:
+        """방 목록 한 페이지와 다음 페이지 커서(없으면 None)를 돌려줍니다."""
+        key = (name_prefix, after, limit)
+        page = self.pages.get(key)
+        if page is None:
+            db_rooms = await crud_rooms.get_rooms_page(db, limit=limit, after=after, name_prefix=name_prefix)
+            rooms = [RoomDisplay.model_validate(room) for room in db_rooms]
+            next_cursor = None
+            if len(rooms) == limit:
+                # prefix 검색은 이름순, 그 외에는 id순으로 이어집니다.
+                next_cursor = rooms[-1].name if name_prefix else rooms[-1].id
+            page = (rooms, next_cursor)
+            self.pages.set(key, page)
+        return page
+
+    def invalidate(self):
+        self.pages.clear()
+
+room_list_cache = RoomListCache()
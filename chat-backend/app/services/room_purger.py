@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from app.core.config import get_settings
+from app.core import metrics
+from app.core.serialization import dumps, loads
+from app.crud import messages as crud_messages
+from app.crud import rooms as crud_rooms
+from app.crud import archive as crud_archive
+from app.services.redis_manager import redis_manager
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 방 하나를 한 노드만 정리하도록 (PURGE_LOCK_KEY, room_id)로 잡는 PostgreSQL advisory lock 키 (임의의 고정값)
+PURGE_LOCK_KEY = 7_240_002
+
+class RoomPurger:
+    """
+    삭제 표시된 방의 메시지를 백그라운드에서 나눠 지우는 작업입니다.
+    - 배치마다 짧은 트랜잭션 하나로 최대 batch_size개씩 지우고, 배치 사이에는 잠깐 쉽니다.
+    - 메시지가 모두 지워지면 방 행을 삭제합니다.
+    - 작업 도중 프로세스가 죽어도 deleted_at이 남아 있으므로 시작 시 resume()이 이어서 처리합니다.
+    - 모든 노드가 resume()을 실행하지만, 방마다 advisory lock을 잡은 노드 하나만 정리합니다.
+    - 진행 상황은 Redis에 progress_ttl 동안 기록되어 어느 노드에서든 GET /rooms/{room_id}/deletion으로 볼 수 있습니다.
+      (Redis가 없으면 이 노드의 기록만 보이며, 끝난 기록은 progress_ttl이 지나면 지웁니다)
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.ROOM_PURGE_BATCH_SIZE,
+        pause_ms: int = settings.ROOM_PURGE_PAUSE_MS,
+        grace_seconds: int = settings.ROOM_PURGE_GRACE_SECONDS,
+        progress_ttl: int = settings.ROOM_PURGE_PROGRESS_TTL_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.pause = pause_ms / 1000
+        self.grace = grace_seconds
+        self.progress_ttl = progress_ttl
+        self.jobs: Dict[int, asyncio.Task] = {}
+        self.progress: Dict[int, dict] = {}
+        self.finished: Dict[int, float] = {} # room_id -> 끝난 시각 (monotonic)
+
+    @staticmethod
+    def key(room_id: int) -> str:
+        return f"room_purge:{room_id}"
+
+    def schedule(self, room_id: int) -> dict:
+        """방 정리 작업을 시작합니다. 이미 진행 중이면 현재 진행 상황을 돌려줍니다."""
+        self._prune()
+        if room_id in self.jobs:
+            return self.progress[room_id]
+        self.finished.pop(room_id, None)
+        self.progress[room_id] = {
+            "room_id": room_id,
+            "status": "pending",
+            "deleted_messages": 0,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "error": None,
+        }
+        self.jobs[room_id] = asyncio.create_task(self._purge(room_id))
+        return self.progress[room_id]
+
+    async def get_progress(self, room_id: int) -> Optional[dict]:
+        """정리하는 노드가 Redis에 남긴 진행 상황을, 없으면 이 노드의 기록을 돌려줍니다."""
+        client = redis_manager.redis_client
+        if client:
+            try:
+                data = await client.get(self.key(room_id))
+                if data:
+                    return loads(data)
+            except Exception as e:
+                logger.warning("Failed to read purge progress of room %s: %s", room_id, e)
+        self._prune()
+        return self.progress.get(room_id)
+
+    def _prune(self):
+        """progress_ttl보다 오래전에 끝난 작업의 진행 상황을 지웁니다."""
+        expired_before = time.monotonic() - self.progress_ttl
+        for room_id, finished in list(self.finished.items()):
+            if finished < expired_before:
+                del self.finished[room_id]
+                self.progress.pop(room_id, None)
+
+    async def _save(self, progress: dict):
+        client = redis_manager.redis_client
+        if not client:
+            return
+        try:
+            await client.set(self.key(progress["room_id"]), dumps(progress), ex=self.progress_ttl)
+        except Exception as e:
+            logger.warning("Failed to save purge progress of room %s: %s", progress["room_id"], e)
+
+    async def resume(self):
+        """재시작 전에 끝나지 않은 방 정리 작업을 다시 시작합니다. (다른 노드가 정리 중인 방은 그 노드에 맡깁니다)"""
+        from app.db.database import PersistenceSessionLocal
+
+        async with PersistenceSessionLocal() as db:
+            room_ids = await crud_rooms.get_deleted_room_ids(db)
+        for room_id in room_ids:
+            logger.info("Resuming purge of deleted room %s", room_id)
+            self.schedule(room_id)
+
+    async def stop(self):
+        for task in self.jobs.values():
+            task.cancel()
+        await asyncio.gather(*self.jobs.values(), return_exceptions=True)
+        self.jobs = {}
+
+    async def _purge(self, room_id: int):
+        from app.db.database import PersistenceSessionLocal, advisory_lock
+
+        progress = self.progress[room_id]
+        try:
+            async with advisory_lock(PURGE_LOCK_KEY, room_id) as acquired:
+                if not acquired:
+                    # 진행 상황은 정리 중인 노드가 Redis에 남기므로 여기서는 덮어쓰지 않습니다.
+                    progress["status"] = "running_elsewhere"
+                    logger.debug("Another node is purging room %s", room_id)
+                    return
+                await self._purge_locked(room_id, progress, PersistenceSessionLocal)
+        except asyncio.CancelledError:
+            progress["status"] = "interrupted" # 다음 시작 시 resume()이 이어서 처리합니다
+            raise
+        except Exception as e:
+            progress["status"] = "failed"
+            progress["error"] = str(e)
+            logger.exception("Failed to purge room %s: %s", room_id, e)
+        finally:
+            progress["finished_at"] = datetime.now(timezone.utc).isoformat()
+            self.finished[room_id] = time.monotonic()
+            self.jobs.pop(room_id, None)
+            if progress["status"] != "running_elsewhere":
+                await asyncio.shield(self._save(progress))
+
+    async def _purge_locked(self, room_id: int, progress: dict, sessions):
+        # 큐에 남은 이 방의 메시지는 영속화 워커가 저장하지 않고 버립니다. (삭제 표시된 방)
+        # 삭제 표시 전에 이미 배치에 들어간 메시지가 커밋될 때까지만 잠깐 기다립니다.
+        await self._save(progress)
+        await asyncio.sleep(self.grace)
+        progress["status"] = "running"
+        while True:
+            async with sessions() as db:
+                deleted = await crud_messages.delete_messages_batch(db, room_id, self.batch_size)
+            progress["deleted_messages"] += deleted
+            metrics.ROOM_PURGED_MESSAGES.inc(deleted)
+            await self._save(progress)
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.pause)
+        async with sessions() as db:
+            await crud_archive.delete_segments(db, room_id) # 보관된 세그먼트 파일도 지웁니다
+            await crud_rooms.purge_room(db, room_id)
+        progress["status"] = "done"
+        logger.info("Purged room %s (%d messages)", room_id, progress["deleted_messages"])
+
+room_purger = RoomPurger()
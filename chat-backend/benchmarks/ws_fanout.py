@@ -0,0 +1,217 @@
+"""
+웹소켓 fan-out / 영속화 경로 부하 테스트입니다.
+
+서버(app.main:app)를 SQLite와 fakeredis(또는 --redis-url의 실제 Redis)로 별도 프로세스에 띄우고,
+(--broker memory면 방 채널은 Redis를 거치지 않고 프로세스 안에서 전달됩니다)
+여러 방에 가상 클라이언트를 접속시킨 뒤 다음 값을 JSON으로 출력합니다.
+- 종단 간 전달 지연 p50 / p99 / max (ms)
+- 초당 전달 메시지 수, 초당 발행 메시지 수
+- message_queue 영속화 지연 (마지막 발행 후 DB에 모두 저장될 때까지)
+- 연결당 서버 메모리 (RSS 증가량 / 연결 수)
+
+실행 (chat-backend 디렉터리에서):
+    python -m benchmarks.ws_fanout --rooms 10 --room-size 200 --messages 20 --output result.json
+
+필요 패키지: uvicorn, httpx, websockets, aiosqlite, fakeredis(--redis-url 미지정 시)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def serve(args):
+    """서버 프로세스: 환경 변수를 맞춘 뒤 uvicorn으로 app을 띄웁니다."""
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{args.db_path}"
+    os.environ["BROKER_BACKEND"] = args.broker
+    # 발신자가 정해진 속도로 보내므로 메시지 레이트 리밋은 끕니다.
+    os.environ["RATE_LIMIT_USER_PER_SECOND"] = "0"
+    os.environ["RATE_LIMIT_ROOM_PER_SECOND"] = "0"
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    else:
+        # 실제 Redis 없이 돌 수 있도록 redis.from_url을 fakeredis로 바꿔치기합니다.
+        import fakeredis
+        import redis.asyncio as redis
+        server = fakeredis.FakeServer()
+        redis.from_url = lambda *a, **kw: fakeredis.FakeAsyncRedis(server=server, decode_responses=kw.get("decode_responses", False))
+
+    import uvicorn
+    from app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", ws_max_queue=1024)
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+async def wait_until_ready(client, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/docs")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def run_clients(args, server_pid: int) -> dict:
+    import httpx
+    import websockets
+
+    base = f"http://127.0.0.1:{args.port}"
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        await wait_until_ready(client)
+        await client.post("/register", json={"username": "bench", "password": "bench"})
+        token = (await client.post("/login", json={"username": "bench", "password": "bench"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        room_ids = []
+        for i in range(args.rooms):
+            response = await client.post("/rooms", json={"name": f"bench-{i}-{time.time_ns()}"}, headers=headers)
+            room_ids.append(response.json()["id"])
+
+    latencies_ms: list[float] = []
+    received = 0
+
+    async def reader(ws):
+        nonlocal received
+        async for frame in ws:
+            data = json.loads(frame)
+            content = data.get("message", "")
+            if content.startswith("bench:"):
+                sent_ns = int(content.split(":")[1])
+                latencies_ms.append((time.time_ns() - sent_ns) / 1e6)
+                received += 1
+
+    rss_before = rss_kb(server_pid)
+    sockets = []
+    for room_id in room_ids:
+        for _ in range(args.room_size):
+            ws = await websockets.connect(f"ws://127.0.0.1:{args.port}/ws/chat/{room_id}?token={token}", max_queue=None)
+            sockets.append((room_id, ws))
+    await asyncio.sleep(1) # 허브 구독이 자리 잡을 때까지 대기
+    rss_after = rss_kb(server_pid)
+    readers = [asyncio.create_task(reader(ws)) for _, ws in sockets]
+
+    # 방마다 senders_per_room개의 소켓이 messages개씩 보냅니다.
+    senders = {}
+    for room_id, ws in sockets:
+        senders.setdefault(room_id, [])
+        if len(senders[room_id]) < args.senders_per_room:
+            senders[room_id].append(ws)
+    interval = 1 / args.rate if args.rate else 0
+
+    async def send_all(ws):
+        for n in range(args.messages):
+            await ws.send(json.dumps({"message": f"bench:{time.time_ns()}:{n}"}))
+            if interval:
+                await asyncio.sleep(interval)
+
+    started = time.monotonic()
+    await asyncio.gather(*(send_all(ws) for wss in senders.values() for ws in wss))
+    publish_done = time.monotonic()
+    sent = sum(len(wss) for wss in senders.values()) * args.messages
+    expected = sent * args.room_size
+
+    deadline = publish_done + args.drain_timeout
+    while received < expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    delivered_at = time.monotonic()
+
+    # 영속화 지연: 마지막 발행 이후 DB에 전부 저장될 때까지 걸린 시간
+    persist_lag = None
+    while time.monotonic() < deadline + args.drain_timeout:
+        with sqlite3.connect(args.db_path) as db:
+            stored = db.execute("SELECT count(*) FROM chat_messages").fetchone()[0]
+        if stored >= sent:
+            persist_lag = time.monotonic() - publish_done
+            break
+        await asyncio.sleep(0.05)
+
+    for task in readers:
+        task.cancel()
+    await asyncio.gather(*(ws.close() for _, ws in sockets), return_exceptions=True)
+
+    return {
+        "config": {
+            "rooms": args.rooms,
+            "room_size": args.room_size,
+            "senders_per_room": args.senders_per_room,
+            "messages_per_sender": args.messages,
+            "rate_per_sender": args.rate,
+            "redis": args.redis_url or "fakeredis",
+            "broker": args.broker,
+        },
+        "connections": len(sockets),
+        "messages_sent": sent,
+        "deliveries_expected": expected,
+        "deliveries_received": received,
+        "latency_ms": {
+            "p50": percentile(latencies_ms, 50),
+            "p99": percentile(latencies_ms, 99),
+            "max": max(latencies_ms) if latencies_ms else None,
+            "mean": statistics.fmean(latencies_ms) if latencies_ms else None,
+        },
+        "publish_rate_msgs_per_s": sent / max(publish_done - started, 1e-9),
+        "delivery_rate_msgs_per_s": received / max(delivered_at - started, 1e-9),
+        "persistence_lag_s": persist_lag,
+        "server_rss_kb": {"before_connect": rss_before, "after_connect": rss_after},
+        "memory_per_connection_kb": (rss_after - rss_before) / len(sockets) if sockets else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="websocket fan-out benchmark")
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--room-size", type=int, default=250, help="방당 접속 클라이언트 수")
+    parser.add_argument("--senders-per-room", type=int, default=1)
+    parser.add_argument("--messages", type=int, default=50, help="발신자당 메시지 수")
+    parser.add_argument("--rate", type=float, default=20, help="발신자당 초당 메시지 수 (0이면 최대한 빠르게)")
+    parser.add_argument("--drain-timeout", type=float, default=30)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--redis-url", default=None, help="지정하지 않으면 fakeredis를 사용합니다")
+    parser.add_argument("--broker", choices=("redis", "memory"), default="redis", help="방 채널 pub/sub 브로커")
+    parser.add_argument("--db-path", default=None)
+    parser.add_argument("--output", default=None, help="결과 JSON 파일 (기본: stdout)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS) # 내부용: 서버 프로세스
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    if args.db_path is None:
+        args.db_path = os.path.join(tempfile.mkdtemp(prefix="chat-bench-"), "bench.db")
+    command = [sys.executable, "-m", "benchmarks.ws_fanout", "--serve", "--port", str(args.port), "--db-path", args.db_path, "--broker", args.broker]
+    if args.redis_url:
+        command += ["--redis-url", args.redis_url]
+    # 서버 로그는 stderr로 나갑니다. 결과 JSON만 stdout에 남도록 서버 프로세스의 stdout은 버립니다.
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    try:
+        result = asyncio.run(run_clients(args, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
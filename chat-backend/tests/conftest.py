@@ -0,0 +1,84 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
+# app.core.config가 읽기 전에 테스트용 설정을 넣습니다. (.env의 PostgreSQL/Redis 대신 SQLite와 프로세스 내 브로커)
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+os.environ.setdefault("BROKER_BACKEND", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """
+    테이블과 검색 인덱스를 만든 임시 SQLite DB의 세션 팩토리를 여는 컨텍스트입니다.
+    테스트는 asyncio.run() 안에서 `async with sqlite_db() as sessions:`로 씁니다. (엔진이 한 이벤트 루프에만 묶이도록)
+    """
+    from app.db.database import Base
+    from app.crud.search import create_search_index
+
+    @asynccontextmanager
+    async def open_db():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await create_search_index(conn)
+        try:
+            yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        finally:
+            await engine.dispose()
+
+    return open_db
+
+class FakeWebSocket:
+    """보낸 프레임과 close 코드를 기록하는 웹소켓 대역입니다. block()을 부르면 release() 전까지 send가 멈춥니다. (느린 클라이언트)"""
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self.unblocked = None
+
+    def block(self):
+        import asyncio
+        self.unblocked = asyncio.Event()
+
+    def release(self):
+        self.unblocked.set()
+
+    async def _send(self, data):
+        if self.unblocked is not None:
+            await self.unblocked.wait()
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        await self._send(data)
+
+    async def send_bytes(self, data):
+        await self._send(data)
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+@pytest.fixture
+def fake_websocket():
+    return FakeWebSocket
+
+@pytest.fixture
+def memory_hub(monkeypatch):
+    """프로세스 내 브로커를 쓰는 새 RoomHub를 만듭니다. (이벤트 루프마다 새 lock/구독을 쓰도록 테스트 안에서 호출)"""
+    from app.services.brokers import InMemoryBroker
+    from app.services.redis_manager import redis_manager
+    from app.services.room_hub import RoomHub
+
+    def create():
+        monkeypatch.setattr(redis_manager, "broker", InMemoryBroker())
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        return RoomHub()
+
+    return create
@@ -0,0 +1,172 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from app.core.config import get_settings
+from app.crud import archive as crud_archive
+from app.crud import messages as crud_messages
+from app.db.models import ChatRoom, MessageSegment, User
+
+CUTOFF = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+@pytest.fixture(autouse=True)
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "MESSAGE_ARCHIVE_DIR", str(tmp_path / "archive"))
+    crud_archive._segment_cache.clear()
+    yield tmp_path / "archive"
+    crud_archive._segment_cache.clear()
+
+async def seed_room(sessions) -> int:
+    """
+    id 1-10은 최근 메시지, id 11-15는 가져온 옛 메시지(2020년 timestamp)인 방을 만듭니다.
+    보관 기준(CUTOFF)을 적용하면 id가 큰 11-15만 세그먼트로 옮겨집니다.
+    """
+    now = datetime.now(timezone.utc)
+    async with sessions() as db:
+        db.add(User(id=1, username="alice", password_hash="x"))
+        db.add(ChatRoom(id=1, name="room", created_by=1))
+        await db.commit()
+        rows = [
+            {"id": i, "room_id": 1, "sender_id": 1, "content": f"m{i}", "timestamp": (now - timedelta(minutes=20 - i)).isoformat()}
+            for i in range(1, 11)
+        ] + [
+            {"id": i, "room_id": 1, "sender_id": 1, "content": f"m{i}", "timestamp": datetime(2020, 1, i, tzinfo=timezone.utc).isoformat()}
+            for i in range(11, 16)
+        ]
+        await crud_messages.bulk_create_chat_messages(db, rows)
+    return 1
+
+async def archive_all(sessions, room_id: int, segment_size: int = 3) -> int:
+    archived = 0
+    while True:
+        async with sessions() as db:
+            count = await crud_archive.archive_room_batch(db, room_id, CUTOFF, segment_size)
+        archived += count
+        if count < segment_size:
+            return archived
+
+async def page_before(sessions, room_id: int, limit: int) -> list[int]:
+    """before 커서로 끝까지 넘기며 받은 id를 차례로 모읍니다."""
+    ids, before = [], None
+    while True:
+        async with sessions() as db:
+            page = await crud_messages.get_messages_for_room(db, room_id=room_id, before=before, limit=limit)
+        ids.extend(m["id"] for m in page)
+        if len(page) < limit:
+            return ids
+        before = page[-1]["id"]
+
+async def page_after(sessions, room_id: int, limit: int) -> list[int]:
+    """after 커서로 0부터 끝까지 따라잡으며 받은 id를 오래된 순으로 모읍니다."""
+    ids, after = [], 0
+    while True:
+        async with sessions() as db:
+            page = await crud_messages.get_messages_for_room(db, room_id=room_id, after=after, limit=limit)
+        ids.extend(m["id"] for m in reversed(page))
+        if len(page) < limit:
+            return ids
+        after = page[0]["id"]
+
+def test_imported_ids_are_archived_ahead_of_older_ids(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            room_id = await seed_room(sessions)
+            assert await archive_all(sessions, room_id) == 5
+            async with sessions() as db:
+                segments = await crud_archive.get_segments(db, room_id, oldest_first=True)
+            assert [(s.min_id, s.max_id) for s in segments] == [(11, 13), (14, 15)]
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 15, 50])
+def test_history_pages_merge_segments_above_db_rows(sqlite_db, limit):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            room_id = await seed_room(sessions)
+            await archive_all(sessions, room_id)
+            assert await page_before(sessions, room_id, limit) == list(range(15, 0, -1))
+            assert await page_after(sessions, room_id, limit) == list(range(1, 16))
+
+    asyncio.run(scenario())
+
+def test_export_stream_is_in_id_order(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            room_id = await seed_room(sessions)
+            await archive_all(sessions, room_id, segment_size=2)
+            async with sessions() as db:
+                return [m["id"] async for m in crud_messages.stream_messages_for_room(db, room_id, chunk_size=3)]
+
+    assert asyncio.run(scenario()) == list(range(1, 16))
+
+def test_overlapping_segments_are_streamed_in_id_order(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            room_id = await seed_room(sessions)
+            async with sessions() as db:
+                # 서로 id 범위가 겹치는 두 세그먼트 (예: 가져오기 후 다른 시점에 보관된 경우)
+                for path, ids in (("room_1/a.ndjson.gz", [20, 22, 24]), ("room_1/b.ndjson.gz", [21, 23])):
+                    messages = [{"id": i, "room_id": room_id, "sender_id": 1, "sender_username": "alice",
+                                 "content": f"m{i}", "timestamp": "2020-01-01T00:00:00+00:00"} for i in ids]
+                    crud_archive._write_file(path, messages)
+                    db.add(MessageSegment(room_id=room_id, min_id=ids[0], max_id=ids[-1], message_count=len(ids),
+                                          first_timestamp=CUTOFF, last_timestamp=CUTOFF, path=path))
+                await db.commit()
+            async with sessions() as db:
+                archived = [m["id"] async for m in crud_archive.stream_archived(db, room_id)]
+            assert archived == [20, 21, 22, 23, 24]
+            assert await page_before(sessions, room_id, 4) == [24, 23, 22, 21, 20, 15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+    asyncio.run(scenario())
+
+def test_missing_segment_file_is_skipped(sqlite_db, archive_dir):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            room_id = await seed_room(sessions)
+            await archive_all(sessions, room_id)
+            os.remove(archive_dir / "room_1" / "11-13.ndjson.gz")
+            assert await page_before(sessions, room_id, 4) == [15, 14] + list(range(10, 0, -1))
+            async with sessions() as db:
+                exported = [m["id"] async for m in crud_messages.stream_messages_for_room(db, room_id)]
+            assert exported == list(range(1, 11)) + [14, 15]
+
+    asyncio.run(scenario())
+
+def test_archiving_the_same_range_twice_keeps_one_segment(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            room_id = await seed_room(sessions)
+            async with sessions() as db:
+                await db.execute(MessageSegment.__table__.insert().values(
+                    room_id=room_id, min_id=11, max_id=13, message_count=3,
+                    first_timestamp=CUTOFF, last_timestamp=CUTOFF, path="room_1/11-13.ndjson.gz",
+                ))
+                await db.commit()
+            # 다른 노드가 먼저 같은 범위를 기록했으면 이 배치는 아무것도 지우지 않습니다.
+            async with sessions() as db:
+                assert await crud_archive.archive_room_batch(db, room_id, CUTOFF, 3) == 0
+            async with sessions() as db:
+                assert len(await crud_archive.get_segments(db, room_id)) == 1
+                assert len(await crud_messages.get_messages_for_room(db, room_id=room_id, limit=100)) == 15
+
+    asyncio.run(scenario())
+
+def test_finding_rooms_to_archive_seeks_the_room_timestamp_index(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            await seed_room(sessions)
+            async with sessions() as db:
+                db.add(ChatRoom(id=2, name="recent only", created_by=1))
+                await db.commit()
+                rooms = await crud_archive.get_rooms_with_messages_before(db, CUTOFF)
+                statement = crud_archive.rooms_with_messages_before(CUTOFF)
+                compiled = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+                plan = (await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+            return rooms, " ".join(str(row[-1]) for row in plan)
+
+    rooms, plan = asyncio.run(scenario())
+    assert rooms == [1]
+    # 메시지 테이블은 인덱스 탐색(SEARCH)만 하고 전체를 훑지(SCAN) 않습니다.
+    assert "SEARCH chat_messages USING INDEX ix_chat_messages_room_id_timestamp" in plan
+    assert "SCAN chat_messages" not in plan
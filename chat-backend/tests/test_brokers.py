@@ -0,0 +1,45 @@
+import asyncio
+from app.services.brokers import InMemoryBroker
+
+async def drain(subscription) -> list[tuple[str, str]]:
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.queue.get_nowait())
+    return received
+
+def test_published_frame_reaches_every_subscriber_of_the_channel_once():
+    async def scenario():
+        broker = InMemoryBroker()
+        first = await broker.subscribe("chat_1")
+        second = await broker.subscribe("chat_1")
+        other = await broker.subscribe("chat_2")
+        frame = '{"type":"message","id":1}'
+        await broker.publish("chat_1", frame)
+        received = await drain(first), await drain(second), await drain(other)
+        # 복사나 재인코딩 없이 같은 문자열 객체를 넘깁니다.
+        return received, received[0][0][1] is frame
+
+    assert asyncio.run(scenario()) == (([("chat_1", '{"type":"message","id":1}')],) * 2 + ([],), True)
+
+def test_unsubscribed_and_closed_subscriptions_stop_receiving():
+    async def scenario():
+        broker = InMemoryBroker()
+        kept = await broker.subscribe("chat_1")
+        dropped = await broker.subscribe("chat_1")
+        closed = await broker.subscribe("chat_2")
+        await broker.unsubscribe(dropped, "chat_1")
+        await closed.close()
+        await broker.publish("chat_1", "a")
+        await broker.publish("chat_2", "b") # 구독자가 없는 채널은 아무 일도 하지 않습니다.
+        return await drain(kept), await drain(dropped), await drain(closed), set(broker.subscribers)
+
+    assert asyncio.run(scenario()) == ([("chat_1", "a")], [], [], {"chat_1"})
+
+def test_listen_yields_redis_style_messages():
+    async def scenario():
+        broker = InMemoryBroker()
+        subscription = await broker.subscribe("chat_1")
+        await broker.publish("chat_1", "hello")
+        return await asyncio.wait_for(subscription.listen().__anext__(), 1)
+
+    assert asyncio.run(scenario()) == {"type": "message", "channel": "chat_1", "data": "hello"}
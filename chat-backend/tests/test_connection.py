@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from app.services.connection import Connection
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def fill(connection: Connection) -> list[bool]:
+    """writer가 첫 프레임을 보내다 멈춘 상태에서 큐(크기 2)가 넘치도록 프레임을 더 넣습니다."""
+    return [connection.enqueue(f"f{i}") for i in range(2, 6)]
+
+@pytest.mark.parametrize("policy, accepted, sent, dropped", [
+    ("drop_oldest", [True, True, True, True], ["f1", "f4", "f5"], 2),
+    ("drop_newest", [True, True, True, True], ["f1", "f2", "f3"], 2),
+    ("disconnect", [True, True, False, False], ["f1", "f2", "f3"], 0),
+])
+def test_slow_consumer_policies(fake_websocket, policy, accepted, sent, dropped):
+    async def scenario():
+        websocket = fake_websocket()
+        websocket.block()
+        connection = Connection(websocket, max_queue=2, policy=policy)
+        connection.enqueue("f1")
+        await settle() # writer가 f1을 꺼내 send에서 멈춤
+        results = fill(connection)
+        websocket.release()
+        await settle()
+        await connection.close()
+        return results, websocket.sent, connection.dropped
+
+    assert asyncio.run(scenario()) == (accepted, sent, dropped)
+
+def test_paused_connection_holds_frames_and_skips_caught_up_messages(fake_websocket):
+    async def scenario():
+        websocket = fake_websocket()
+        connection = Connection(websocket, paused=True)
+        for message_id in (4, 5, 6):
+            connection.enqueue(f'{{"type":"message","id":{message_id},"room_id":1}}')
+        connection.enqueue('{"type":"rate_limited","room_id":1}')
+        await settle()
+        held = list(websocket.sent)
+        connection.go_live(room_id=1, skip_through=5) # catch-up으로 5까지 이미 보냄
+        await settle()
+        await connection.close()
+        return held, websocket.sent
+
+    held, sent = asyncio.run(scenario())
+    assert held == []
+    assert sent == ['{"type":"message","id":6,"room_id":1}', '{"type":"rate_limited","room_id":1}']
+
+def test_close_after_flush_sends_queued_frames_first(fake_websocket):
+    async def scenario():
+        websocket = fake_websocket()
+        connection = Connection(websocket)
+        connection.enqueue("bye")
+        connection.close_after_flush(code=1012, reason="restart")
+        await settle()
+        return websocket.sent, websocket.close_code, connection.closed, connection.enqueue("late")
+
+    assert asyncio.run(scenario()) == (["bye"], 1012, True, False)
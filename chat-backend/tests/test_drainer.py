@@ -0,0 +1,31 @@
+import asyncio
+import json
+from app.services import drainer as drainer_module
+from app.services.admission import admission
+from app.services.connection import Connection
+from app.services.drainer import Drainer
+
+def test_multiplexed_socket_without_rooms_is_closed(monkeypatch, fake_websocket):
+    async def scenario():
+        monkeypatch.setattr(admission, "draining", False)
+        websocket = fake_websocket()
+        Connection(websocket, multiplexed=True) # /ws로 접속만 하고 방은 구독하지 않은 연결
+        drainer = Drainer(flush_timeout=0, wave_interval_ms=0)
+        await drainer.wait()
+        await asyncio.sleep(0) # writer가 reconnect 프레임과 close를 처리할 시간
+        return drainer.progress, [json.loads(data)["type"] for data in websocket.sent], websocket.close_code
+
+    progress, frames, close_code = asyncio.run(scenario())
+    assert (progress["status"], progress["connections_closed"]) == ("done", 1)
+    assert frames == ["reconnect"]
+    assert close_code == 1012
+
+def test_shared_stream_queue_is_not_waited_on(monkeypatch):
+    class SharedQueue:
+        durable = True
+
+        async def size(self):
+            return 5 # 다른 노드의 항목까지 센 XLEN
+
+    monkeypatch.setattr(drainer_module, "message_queue", SharedQueue())
+    assert asyncio.run(Drainer(flush_timeout=60).flush_queue()) == 0
@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+import pytest
+from app.api.v1.export import parse_import_line
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+def line(timestamp=None) -> bytes:
+    message = '{"sender_id": 1, "content": "hi"' + (f', "timestamp": "{timestamp}"' if timestamp else "") + "}"
+    return message.encode()
+
+def test_timestamps_are_normalized_to_utc():
+    row = parse_import_line(line("2024-01-01T09:00:00+09:00"), room_id=7, now=NOW)
+    assert row == {"room_id": 7, "sender_id": 1, "content": "hi", "timestamp": "2024-01-01T00:00:00+00:00"}
+
+def test_missing_timestamp_defaults_to_now():
+    assert parse_import_line(line(), room_id=7, now=NOW)["timestamp"] == NOW.isoformat()
+
+@pytest.mark.parametrize("timestamp, error", [
+    ("2024-01-01T00:00:00", "UTC offset"),
+    ("2024-06-01T12:00:01+00:00", "future"),
+    ("yesterday", "Invalid isoformat"),
+])
+def test_invalid_timestamps_are_rejected(timestamp, error):
+    with pytest.raises(ValueError, match=error):
+        parse_import_line(line(timestamp), room_id=7, now=NOW)
@@ -0,0 +1,36 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+import pytest
+from app.core import serialization
+from app.services.history_cache import HistoryCache
+from app.services.redis_manager import redis_manager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+def message(message_id: int, timestamp) -> dict:
+    return {"id": message_id, "room_id": 1, "sender_id": 1, "sender_username": "alice", "content": f"m{message_id}", "timestamp": timestamp}
+
+def test_db_rows_and_published_messages_are_cached_in_one_format(monkeypatch):
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        monkeypatch.setattr(redis_manager, "redis_client", client)
+        cache = HistoryCache(size=10, ttl=60)
+        stored_at = datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        # DB에서 읽은 행은 timestamp가 datetime, 발행 경로는 이미 ISO 문자열입니다.
+        await cache.fill(1, [message(2, stored_at), message(1, stored_at)])
+        await cache.push(1, message(3, stored_at.isoformat()))
+        return await client.lrange(cache.key(1), 0, -1), await cache.get(1, 10), await cache.get_since(1, 1)
+
+    raw, cached, since = asyncio.run(scenario())
+    assert raw == [serialization.dumps(message(i, "2024-01-01T12:30:15.123456+00:00")) for i in (3, 2, 1)]
+    assert [m["id"] for m in cached] == [3, 2, 1]
+    assert {m["timestamp"] for m in cached} == {"2024-01-01T12:30:15.123456+00:00"}
+    assert [m["id"] for m in since] == [2, 3]
+
+def test_stdlib_fallback_encodes_datetimes_like_orjson(monkeypatch):
+    timestamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    expected = serialization.dumps({"timestamp": timestamp, "content": "안녕"})
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps({"timestamp": timestamp, "content": "안녕"}) == expected
+    assert json.loads(expected) == {"timestamp": timestamp.isoformat(), "content": "안녕"}
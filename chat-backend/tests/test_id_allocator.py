@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from app.services.brokers import InMemoryBroker, RedisBroker
+from app.services.id_allocator import IdsUnavailable, MessageIdAllocator
+from app.services.redis_manager import redis_manager
+
+def test_local_ids_are_only_issued_for_the_in_process_broker(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        allocator = MessageIdAllocator()
+        allocator.local_id = 41
+
+        monkeypatch.setattr(redis_manager, "broker", InMemoryBroker())
+        issued = [await allocator.next_id(), list(await allocator.next_ids(2))]
+
+        # 여러 노드가 공유하는 redis 브로커면 Redis 없이 발급하지 않습니다.
+        monkeypatch.setattr(redis_manager, "broker", RedisBroker(lambda: None))
+        for allocate in (allocator.next_id(), allocator.next_ids(3)):
+            with pytest.raises(IdsUnavailable):
+                await allocate
+        return issued, allocator.local_id
+
+    assert asyncio.run(scenario()) == ([42, [43, 44]], 44)
+
+def test_seed_never_moves_the_shared_counter_backwards(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa") # Lua 스크립트 실행
+
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        monkeypatch.setattr(redis_manager, "redis_client", client)
+        behind, ahead = MessageIdAllocator(), MessageIdAllocator()
+        await ahead.seed(150)
+        await behind.seed(120) # 재연결 후 뒤늦게 맞추는 노드
+        first = await behind.next_id()
+        return int(await client.get(MessageIdAllocator.KEY)), first
+
+    assert asyncio.run(scenario()) == (151, 151)
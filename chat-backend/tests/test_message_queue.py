@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+from app.db import database
+from app.db.models import ChatMessage, ChatRoom, User
+from app.services.message_queue import MessageQueue
+from app.services.queue_backends import InMemoryQueueBackend
+
+def message(message_id: int, room_id: int = 1, sender_id: int = 1) -> dict:
+    return {"id": message_id, "room_id": room_id, "sender_id": sender_id, "content": f"m{message_id}",
+            "timestamp": datetime.now(timezone.utc).isoformat()}
+
+async def seed(sessions):
+    async with sessions() as db:
+        db.add(User(id=1, username="alice", password_hash="x"))
+        db.add(ChatRoom(id=1, name="live", created_by=1))
+        db.add(ChatRoom(id=2, name="deleted", created_by=1))
+        await db.commit()
+        await db.execute(update(ChatRoom).where(ChatRoom.id == 2).values(deleted_at=func.now()))
+        await db.commit()
+
+async def stored_ids(sessions) -> list[int]:
+    async with sessions() as db:
+        result = await db.execute(select(ChatMessage.id).order_by(ChatMessage.id))
+        return list(result.scalars().all())
+
+@pytest.fixture
+def use_sessions(monkeypatch):
+    """영속화 워커가 테스트 DB에 쓰도록 PersistenceSessionLocal을 바꿉니다."""
+    def use(sessions):
+        monkeypatch.setattr(database, "PersistenceSessionLocal", sessions)
+    return use
+
+def test_messages_for_deleted_or_missing_rooms_are_dropped(sqlite_db, use_sessions):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            use_sessions(sessions)
+            await seed(sessions)
+            queue = MessageQueue(backend=InMemoryQueueBackend(), consume=False)
+            await queue._save_batch([(None, message(1)), (None, message(2, room_id=2)), (None, message(3, room_id=3)), (None, message(4))])
+            return await stored_ids(sessions)
+
+    assert asyncio.run(scenario()) == [1, 4]
+
+def test_bad_row_is_dead_lettered_and_the_rest_of_the_batch_is_saved(sqlite_db, use_sessions):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            use_sessions(sessions)
+            await seed(sessions)
+            backend = InMemoryQueueBackend()
+            queue = MessageQueue(backend=backend, consume=False)
+            duplicate = message(2)
+            broken = message(3)
+            broken["timestamp"] = "not a timestamp"
+            # id 2는 이미 저장된 행과 기본 키가 겹치는 행, id 3은 timestamp가 잘못된 행
+            await queue._save_batch([(None, duplicate)])
+            await queue._save_batch([(None, message(1)), (None, duplicate), (None, broken), (None, message(4))])
+            return await stored_ids(sessions), [letter["message"]["id"] for letter in backend.dead_letters], await backend.size()
+
+    assert asyncio.run(scenario()) == ([1, 2, 4], [2, 3], 0)
+
+def test_transient_failure_puts_the_batch_back_in_order(monkeypatch):
+    async def scenario():
+        backend = InMemoryQueueBackend()
+        queue = MessageQueue(backend=backend, consume=False)
+
+        async def unavailable(batch):
+            raise ConnectionError("database is down")
+
+        async def no_sleep(seconds):
+            pass
+
+        monkeypatch.setattr(queue, "_insert", unavailable)
+        monkeypatch.setattr(asyncio, "sleep", no_sleep)
+        await backend.put(message(3))
+        await queue._save_batch([(None, message(1)), (None, message(2))])
+        return [m["id"] for m in backend.queue]
+
+    assert asyncio.run(scenario()) == [1, 2, 3]
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.api.v1 import rooms as rooms_api
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from app.crud import messages as crud_messages
+from app.db.database import Base
+from app.db.models import ChatRoom, User
+from app.services.principal_cache import PrincipalCache
+from app.services.redis_manager import redis_manager
+
+# 방 1의 메시지 id (3의 배수는 방 2의 메시지가 사이에 끼어 있음)
+ROOM_IDS = [1, 2, 4, 5, 7, 8, 10, 11]
+
+async def seed(sessions):
+    now = datetime.now(timezone.utc)
+    async with sessions() as db:
+        db.add(User(id=1, username="alice", password_hash="x"))
+        db.add(ChatRoom(id=1, name="room", created_by=1))
+        db.add(ChatRoom(id=2, name="other", created_by=1))
+        await db.commit()
+        rows = [{"id": i, "room_id": 2 if i % 3 == 0 else 1, "sender_id": 1, "content": f"m{i}",
+                 "timestamp": (now - timedelta(seconds=20 - i)).isoformat()} for i in range(1, 13)]
+        await crud_messages.bulk_create_chat_messages(db, rows)
+
+def test_before_and_after_pages(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            await seed(sessions)
+            async with sessions() as db:
+                async def page(**cursor):
+                    return [m["id"] for m in await crud_messages.get_messages_for_room(db, 1, limit=3, **cursor)]
+                return await page(), await page(before=10), await page(after=2), await page(before=1), await page(after=11)
+
+    assert asyncio.run(scenario()) == ([11, 10, 8], [8, 7, 5], [7, 5, 4], [], [])
+
+@pytest.mark.parametrize("direction", ["before", "after"])
+def test_next_cursor_header_round_trip(sqlite_db, monkeypatch, direction):
+    """X-Next-Cursor를 그대로 다음 요청에 넘기면 빠지거나 겹치는 메시지 없이 끝까지 이어집니다."""
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        monkeypatch.setattr(rooms_api, "principal_cache", PrincipalCache())
+        async with sqlite_db() as sessions:
+            await seed(sessions)
+            ids, cursor = [], encode_cursor(0) if direction == "after" else None
+            async with sessions() as db:
+                for _ in range(10):
+                    response = Response()
+                    page = await rooms_api.get_room_messages(
+                        1, response, before=cursor if direction == "before" else None,
+                        after=cursor if direction == "after" else None, limit=3, db=db, read_db=db, current_user=None,
+                    )
+                    ids.extend(m["id"] for m in (reversed(page) if direction == "after" else page))
+                    cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                    if cursor is None:
+                        return ids
+        raise AssertionError("cursor never ended")
+
+    expected = ROOM_IDS if direction == "after" else ROOM_IDS[::-1]
+    assert asyncio.run(scenario()) == expected
+
+def test_invalid_cursor_is_rejected(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            async with sessions() as db:
+                await rooms_api.get_room_messages(1, Response(), before=encode_cursor("x"), after=None, limit=3, db=db, read_db=db, current_user=None)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 400
+
+def test_message_indexes_are_added_to_existing_tables(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+        async with engine.begin() as conn:
+            # 인덱스가 생기기 전의 스키마
+            await conn.execute(text("CREATE TABLE chat_messages (id INTEGER, room_id INTEGER, timestamp DATETIME)"))
+            await crud_messages.create_message_indexes(conn)
+            await crud_messages.create_message_indexes(conn)
+            indexes = await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'chat_messages'"))
+            names = set(indexes.scalars().all())
+        await engine.dispose()
+        return names
+
+    assert set(crud_messages.MESSAGE_INDEXES) <= asyncio.run(scenario())
+
+def test_room_existence_is_checked_on_the_primary(sqlite_db, tmp_path, monkeypatch):
+    """복제본에 아직 없는 방(복제 지연)도 기본 DB에 있으면 404가 아닙니다."""
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        monkeypatch.setattr(rooms_api, "principal_cache", PrincipalCache())
+        replica_dir = tmp_path / "replica"
+        replica_dir.mkdir()
+        async with sqlite_db() as primary:
+            await seed(primary)
+            engine = create_async_engine(f"sqlite+aiosqlite:///{replica_dir / 'replica.db'}")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            replica = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            try:
+                async with primary() as db, replica() as read_db:
+                    return await rooms_api.get_room_messages(
+                        1, Response(), before=encode_cursor(100), after=None, limit=3, db=db, read_db=read_db, current_user=None,
+                    )
+            finally:
+                await engine.dispose()
+
+    assert asyncio.run(scenario()) == []
@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from app.core import metrics
+from app.core.metrics import MetricsRegistry, _Metric
+from app.services.connection import Connection
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("chat_untyped", "A metric without render().")
+
+def test_registry_renders_counters_gauges_and_histograms():
+    async def scenario():
+        registry = MetricsRegistry()
+        registry.counter("chat_test_total", "Counted things.", ("scope",)).inc(scope="user")
+        registry.gauge("chat_test_gauge", "Computed at scrape time.").set_function(lambda: 3)
+        registry.histogram("chat_test_seconds", "Timed things.", buckets=(0.1, 1.0)).observe(0.5)
+        return await registry.render()
+
+    assert asyncio.run(scenario()).splitlines() == [
+        "# HELP chat_test_total Counted things.",
+        "# TYPE chat_test_total counter",
+        'chat_test_total{scope="user"} 1.0',
+        "# HELP chat_test_gauge Computed at scrape time.",
+        "# TYPE chat_test_gauge gauge",
+        "chat_test_gauge 3",
+        "# HELP chat_test_seconds Timed things.",
+        "# TYPE chat_test_seconds histogram",
+        'chat_test_seconds_bucket{le="0.1"} 0',
+        'chat_test_seconds_bucket{le="1.0"} 1',
+        'chat_test_seconds_bucket{le="+Inf"} 1',
+        "chat_test_seconds_sum 0.5",
+        "chat_test_seconds_count 1",
+    ]
+
+def test_connection_gauge_has_no_per_room_series(fake_websocket):
+    async def scenario():
+        before = await metrics.ACTIVE_CONNECTIONS.render()
+        connection = Connection(fake_websocket())
+        during = await metrics.ACTIVE_CONNECTIONS.render()
+        await connection.close()
+        return before, during, await metrics.ACTIVE_CONNECTIONS.render()
+
+    before, during, after = asyncio.run(scenario())
+    count = int(before[0].split()[-1])
+    assert (during, after) == ([f"chat_active_connections {count + 1}"], [f"chat_active_connections {count}"])
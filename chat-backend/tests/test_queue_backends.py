@@ -0,0 +1,114 @@
+import asyncio
+import json
+import pytest
+from app.services.message_queue import MessageQueue
+from app.services.queue_backends import RedisStreamQueueBackend
+from app.services.redis_manager import redis_manager
+
+fakeredis = pytest.importorskip("fakeredis")
+
+STREAM = "test_messages"
+GROUP = "persisters"
+
+@pytest.fixture
+def use_fake_redis(monkeypatch):
+    """redis_manager가 fakeredis 클라이언트를 쓰게 합니다. 클라이언트는 테스트의 이벤트 루프 안에서 만들어야 합니다."""
+    def use():
+        client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        monkeypatch.setattr(redis_manager, "redis_client", client)
+        return client
+    return use
+
+def backend(consumer: str, claim_idle_ms: int = 60000, max_deliveries: int = 10) -> RedisStreamQueueBackend:
+    return RedisStreamQueueBackend(STREAM, GROUP, claim_idle_ms, consumer=consumer, max_deliveries=max_deliveries)
+
+def message(message_id: int) -> dict:
+    return {"id": message_id, "room_id": 1, "sender_id": 1, "content": f"m{message_id}", "timestamp": "2024-01-01T00:00:00+00:00"}
+
+def ids(batch) -> list[int]:
+    return [m["id"] for _, m in batch]
+
+def test_read_batch_returns_entries_in_order_up_to_max_count(use_fake_redis):
+    async def scenario():
+        use_fake_redis()
+        queue = backend("a")
+        for i in range(1, 6):
+            await queue.put(message(i))
+        return ids(await queue.read_batch(3, 0)), ids(await queue.read_batch(3, 0)), await queue.size()
+
+    # 읽기만 하고 ack하지 않았으므로 XLEN은 그대로입니다.
+    assert asyncio.run(scenario()) == ([1, 2, 3], [4, 5], 5)
+
+def test_entries_are_acked_only_after_the_batch_is_committed(use_fake_redis, monkeypatch):
+    async def scenario():
+        client = use_fake_redis()
+        queue = backend("a")
+        persister = MessageQueue(backend=queue, consume=False)
+        saved = []
+
+        async def insert(batch):
+            saved.extend(ids(batch))
+            return len(batch)
+
+        async def unavailable(batch):
+            raise ConnectionError("database is down")
+
+        async def no_sleep(seconds):
+            pass
+
+        monkeypatch.setattr(asyncio, "sleep", no_sleep)
+        for i in range(1, 4):
+            await queue.put(message(i))
+
+        monkeypatch.setattr(persister, "_insert", unavailable)
+        await persister._save_batch(await queue.read_batch(10, 0))
+        still_pending = (await client.xpending(STREAM, GROUP))["pending"]
+
+        monkeypatch.setattr(persister, "_insert", insert)
+        # 실패한 배치는 pending으로 남아 있다가 회수됩니다.
+        queue.claim_idle_ms = 0
+        await persister._save_batch(await queue.read_batch(10, 0))
+        return still_pending, saved, (await client.xpending(STREAM, GROUP))["pending"], await queue.size()
+
+    assert asyncio.run(scenario()) == (3, [1, 2, 3], 0, 0)
+
+def test_entries_of_a_dead_consumer_are_reclaimed(use_fake_redis):
+    async def scenario():
+        use_fake_redis()
+        dead = backend("dead")
+        await dead.put(message(1))
+        await dead.put(message(2))
+        assert ids(await dead.read_batch(10, 0)) == [1, 2] # 읽은 뒤 ack하지 못하고 죽음
+
+        alive = backend("alive", claim_idle_ms=0)
+        reclaimed = await alive.read_batch(10, 0)
+        await alive.ack([entry_id for entry_id, _ in reclaimed])
+        return ids(reclaimed), await alive.size()
+
+    assert asyncio.run(scenario()) == ([1, 2], 0)
+
+def test_entries_delivered_too_often_are_dead_lettered(use_fake_redis):
+    async def scenario():
+        client = use_fake_redis()
+        first = backend("first", max_deliveries=1)
+        await first.put(message(1))
+        await first.read_batch(10, 0)
+
+        second = backend("second", claim_idle_ms=0, max_deliveries=1)
+        reclaimed = await second.read_batch(10, 0)
+        dead = await client.xrange(first.dead_letter_stream)
+        return reclaimed, await second.size(), [json.loads(fields["data"])["id"] for _, fields in dead], dead[0][1]["reason"]
+
+    assert asyncio.run(scenario()) == ([], 0, [1], "delivered more than 1 times")
+
+def test_undecodable_entries_are_dead_lettered(use_fake_redis):
+    async def scenario():
+        client = use_fake_redis()
+        queue = backend("a")
+        await queue.put(message(1))
+        await client.xadd(STREAM, {"data": "{not json"})
+        await queue.put(message(2))
+        batch = await queue.read_batch(10, 0)
+        return ids(batch), await client.xlen(queue.dead_letter_stream), await queue.size()
+
+    assert asyncio.run(scenario()) == ([1, 2], 1, 2)
@@ -0,0 +1,32 @@
+import asyncio
+from app.api.v1 import websockets
+from app.services.rate_limiter import RateLimiter
+from app.services.redis_manager import redis_manager
+
+def test_room_limit_rejection_refunds_the_user_token(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        users = RateLimiter("user", rate=0.001, burst=2, global_mode=False)
+        rooms = RateLimiter("room", rate=0.001, burst=1, global_mode=False)
+        monkeypatch.setattr(websockets, "user_message_limiter", users)
+        monkeypatch.setattr(websockets, "room_message_limiter", rooms)
+
+        first = await websockets.check_rate_limits(user_id=1, room_id=1)
+        blocked_by_room = await websockets.check_rate_limits(user_id=1, room_id=1)
+        # 방 제한에 걸린 메시지는 사용자 토큰을 쓰지 않았으므로 다른 방에는 아직 보낼 수 있습니다.
+        other_room = await websockets.check_rate_limits(user_id=1, room_id=2)
+        blocked_by_user = await websockets.check_rate_limits(user_id=1, room_id=3)
+        return first, blocked_by_room > 0, other_room, blocked_by_user > 0
+
+    assert asyncio.run(scenario()) == (0, True, 0, True)
+
+def test_refund_never_exceeds_the_burst(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        limiter = RateLimiter("user", rate=0.001, burst=1, global_mode=False)
+        assert await limiter.hit(1) == 0
+        await limiter.refund(1)
+        await limiter.refund(1)
+        return await limiter.hit(1), await limiter.hit(1) > 0
+
+    assert asyncio.run(scenario()) == (0, True)
@@ -0,0 +1,78 @@
+import asyncio
+from app.services.connection import Connection
+from app.services.redis_manager import redis_manager
+from app.services.room_hub import ROOM_DELETED_CLOSE_CODE
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def subscriber_count(channel: str) -> int:
+    return len(redis_manager.broker.subscribers.get(channel, ()))
+
+def test_one_subscription_per_room_until_the_last_socket_leaves(fake_websocket, memory_hub):
+    async def scenario():
+        hub = memory_hub()
+        first, second = fake_websocket(), fake_websocket()
+        a, b = Connection(first), Connection(second)
+        await hub.join(1, a)
+        await hub.join(1, b)
+        counts = [subscriber_count("chat_1")]
+        await redis_manager.broker.publish("chat_1", '{"type":"message","id":1,"room_id":1}')
+        await settle()
+        delivered = [len(first.sent), len(second.sent)]
+        await hub.leave(1, a)
+        counts.append(subscriber_count("chat_1"))
+        listener = hub.listeners[1]
+        await hub.leave(1, b)
+        await settle()
+        counts.append(subscriber_count("chat_1"))
+        await a.close()
+        await b.close()
+        return counts, delivered, hub.connections, listener.cancelled(), a.rooms
+
+    assert asyncio.run(scenario()) == ([1, 1, 0], [1, 1], {}, True, set())
+
+def test_slow_consumer_is_evicted_without_blocking_the_others(fake_websocket, memory_hub):
+    async def scenario():
+        hub = memory_hub()
+        slow_socket, fast_socket = fake_websocket(), fake_websocket()
+        slow_socket.block()
+        slow = Connection(slow_socket, max_queue=1, policy="disconnect")
+        fast = Connection(fast_socket)
+        await hub.join(1, slow)
+        await hub.join(1, fast)
+        for message_id in range(1, 5):
+            hub._broadcast(1, f'{{"type":"message","id":{message_id},"room_id":1}}')
+            await settle()
+        await settle()
+        remaining = set(hub.connections[1])
+        await hub.leave(1, fast)
+        await fast.close()
+        return slow.closed, slow_socket.close_code, len(fast_socket.sent), remaining == {fast}
+
+    assert asyncio.run(scenario()) == (True, 1013, 4, True)
+
+def test_room_deletion_closes_single_room_sockets_and_keeps_multiplexed_ones(fake_websocket, memory_hub):
+    async def scenario():
+        hub = memory_hub()
+        single_socket, multiplexed_socket = fake_websocket(), fake_websocket()
+        single = Connection(single_socket)
+        multiplexed = Connection(multiplexed_socket, multiplexed=True)
+        await hub.join(1, single)
+        await hub.join(1, multiplexed)
+        await hub.join(2, multiplexed)
+        await hub.publish_tombstone(1)
+        await settle()
+        await settle()
+        result = (
+            # 닫힌 단일 방 소켓은 엔드포인트의 leave()가 허브에서 뺍니다.
+            single_socket.close_code, multiplexed.closed, set(multiplexed.rooms), multiplexed in hub.connections[1],
+            [len(single_socket.sent), len(multiplexed_socket.sent)],
+        )
+        await hub.leave(1, single)
+        await hub.leave(2, multiplexed)
+        await multiplexed.close()
+        return result
+
+    assert asyncio.run(scenario()) == (ROOM_DELETED_CLOSE_CODE, False, {2}, False, [1, 1])
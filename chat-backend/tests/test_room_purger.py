@@ -0,0 +1,82 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+from app.crud import messages as crud_messages
+from app.db import database
+from app.db.models import ChatMessage, ChatRoom, User
+from app.services.redis_manager import redis_manager
+from app.services.room_purger import RoomPurger
+
+async def seed(sessions):
+    async with sessions() as db:
+        db.add(User(id=1, username="alice", password_hash="x"))
+        db.add(ChatRoom(id=1, name="deleted", created_by=1))
+        await db.commit()
+        now = datetime.now(timezone.utc).isoformat()
+        await crud_messages.bulk_create_chat_messages(
+            db, [{"id": i, "room_id": 1, "sender_id": 1, "content": f"m{i}", "timestamp": now} for i in range(1, 6)]
+        )
+        await db.execute(update(ChatRoom).where(ChatRoom.id == 1).values(deleted_at=func.now()))
+        await db.commit()
+
+async def remaining(sessions) -> tuple[int, int]:
+    async with sessions() as db:
+        messages = await db.scalar(select(func.count()).select_from(ChatMessage))
+        rooms = await db.scalar(select(func.count()).select_from(ChatRoom))
+        return messages, rooms
+
+def purger(**options) -> RoomPurger:
+    return RoomPurger(**{"batch_size": 2, "pause_ms": 0, "grace_seconds": 0, **options})
+
+def test_progress_is_shared_through_redis(sqlite_db, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", fakeredis.aioredis.FakeRedis(decode_responses=True))
+        async with sqlite_db() as sessions:
+            monkeypatch.setattr(database, "PersistenceSessionLocal", sessions)
+            await seed(sessions)
+            node = purger()
+            await node.resume()
+            await asyncio.gather(*node.jobs.values())
+            # 정리하지 않은 다른 노드도 같은 진행 상황을 봅니다.
+            return await purger().get_progress(1), await remaining(sessions)
+
+    progress, left = asyncio.run(scenario())
+    assert (progress["status"], progress["deleted_messages"]) == ("done", 5)
+    assert left == (0, 0)
+
+def test_room_locked_by_another_node_is_left_alone(sqlite_db, monkeypatch):
+    @asynccontextmanager
+    async def held_elsewhere(*key):
+        yield False
+
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        monkeypatch.setattr(database, "advisory_lock", held_elsewhere)
+        async with sqlite_db() as sessions:
+            monkeypatch.setattr(database, "PersistenceSessionLocal", sessions)
+            await seed(sessions)
+            node = purger()
+            await node.resume()
+            await asyncio.gather(*node.jobs.values())
+            return (await node.get_progress(1))["status"], await remaining(sessions)
+
+    assert asyncio.run(scenario()) == ("running_elsewhere", (5, 1))
+
+def test_finished_progress_is_evicted_after_the_ttl(sqlite_db, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(redis_manager, "redis_client", None)
+        async with sqlite_db() as sessions:
+            monkeypatch.setattr(database, "PersistenceSessionLocal", sessions)
+            await seed(sessions)
+            node = purger(progress_ttl=0)
+            node.schedule(1)
+            await asyncio.gather(*node.jobs.values())
+            await asyncio.sleep(0.01)
+            return await node.get_progress(1), node.progress, node.finished
+
+    assert asyncio.run(scenario()) == (None, {}, {})
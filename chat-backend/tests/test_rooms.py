@@ -0,0 +1,32 @@
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.crud.rooms import add_missing_columns
+from app.db.database import Base
+
+def test_missing_room_columns_are_added_and_backfilled(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+        try:
+            async with engine.begin() as conn:
+                # 컬럼이 추가되기 전의 chat_rooms
+                await conn.execute(text(
+                    "CREATE TABLE chat_rooms (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, created_by INTEGER, created_at DATETIME)"
+                ))
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(text("INSERT INTO chat_rooms (id, name) VALUES (1, 'busy'), (2, 'quiet')"))
+                await conn.execute(text(
+                    "INSERT INTO chat_messages (id, room_id, sender_id, content, timestamp) VALUES "
+                    "(1, 1, 1, 'a', '2024-01-01 00:00:00'), (2, 1, 1, 'b', '2024-01-02 00:00:00')"
+                ))
+            for _ in range(2): # 두 번째 실행은 아무것도 하지 않아야 합니다
+                async with engine.begin() as conn:
+                    await add_missing_columns(conn)
+            async with engine.connect() as conn:
+                result = await conn.execute(text("SELECT id, message_count, last_message_at, deleted_at FROM chat_rooms ORDER BY id"))
+                return [tuple(row) for row in result]
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(scenario()) == [(1, 2, "2024-01-02 00:00:00", None), (2, 0, None, None)]
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import func, update
+from app.crud import messages as crud_messages
+from app.api.v1.search import parse_search_cursor
+from app.core.pagination import encode_cursor
+from app.crud import search as crud_search
+from app.db.models import ChatRoom, User
+
+async def seed_rooms(sessions):
+    async with sessions() as db:
+        db.add(User(id=1, username="alice", password_hash="x"))
+        db.add(ChatRoom(id=1, name="one", created_by=1))
+        db.add(ChatRoom(id=2, name="two", created_by=1))
+        await db.commit()
+
+async def add(sessions, *messages: tuple[int, int, str]):
+    """(id, room_id, content) 메시지를 영속화 배치와 같은 경로로 저장합니다. (색인 포함)"""
+    now = datetime.now(timezone.utc).isoformat()
+    async with sessions() as db:
+        await crud_messages.bulk_create_chat_messages(
+            db, [{"id": i, "room_id": room_id, "sender_id": 1, "content": content, "timestamp": now} for i, room_id, content in messages]
+        )
+
+async def search(sessions, q: str, **options) -> list[int]:
+    async with sessions() as db:
+        results, _ = await crud_search.search_messages(db, q, **options)
+    return [m["id"] for m in results]
+
+def test_new_messages_are_indexed_incrementally(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            await seed_rooms(sessions)
+            before = await search(sessions, "kiwi")
+            await add(sessions, (1, 1, "kiwi smoothie"), (2, 2, "kiwi tart"), (3, 1, "plain toast"))
+            everywhere = sorted(await search(sessions, "kiwi"))
+            in_room = await search(sessions, "kiwi", room_id=1)
+            async with sessions() as db:
+                await crud_messages.delete_messages_batch(db, 1, 10)
+                await db.execute(update(ChatRoom).where(ChatRoom.id == 2).values(deleted_at=func.now()))
+                await db.commit()
+            # 지운 메시지는 색인에서도 빠지고, 삭제된 방의 메시지는 결과에 나오지 않습니다.
+            after_delete = await search(sessions, "kiwi")
+            return before, everywhere, in_room, after_delete
+
+    assert asyncio.run(scenario()) == ([], [1, 2], [1], [])
+
+def test_results_are_ranked_by_relevance(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            await seed_rooms(sessions)
+            await add(
+                sessions,
+                (1, 1, "mango"),
+                (2, 1, "mango mango mango"),
+                (3, 1, "a long message that mentions mango only once among many other words"),
+                (4, 1, "no match here"),
+            )
+            return await search(sessions, "mango")
+
+    assert asyncio.run(scenario()) == [2, 1, 3]
+
+def test_cursor_pages_neither_repeat_nor_skip(sqlite_db):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            await seed_rooms(sessions)
+            # 점수가 같은 메시지(같은 내용)가 많아 (score, id) 동점 처리가 필요한 경우
+            await add(sessions, *[(i, 1 + i % 2, "lime" if i % 3 else "lime lime") for i in range(1, 24)])
+            everything = await search(sessions, "lime", limit=100)
+            pages, cursor = [], None
+            async with sessions() as db:
+                while True:
+                    page, cursor = await crud_search.search_messages(db, "lime", after=cursor, limit=4)
+                    pages.append([m["id"] for m in page])
+                    if cursor is None:
+                        break
+                    # 클라이언트가 받는 X-Next-Cursor 문자열을 거쳐도 같은 위치에서 이어집니다.
+                    cursor = parse_search_cursor(encode_cursor(list(cursor)))
+            return everything, pages
+
+    everything, pages = asyncio.run(scenario())
+    assert sorted(everything) == list(range(1, 24))
+    assert [message_id for page in pages for message_id in page] == everything
+    assert all(len(page) == 4 for page in pages[:-1])
@@ -0,0 +1,33 @@
+import asyncio
+import gc
+from app.core import tasks
+
+def test_spawned_task_is_kept_until_it_finishes():
+    async def scenario():
+        finished = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            finished.set()
+
+        tasks.spawn(work())
+        gc.collect()
+        held = len(tasks._background_tasks)
+        await asyncio.wait_for(finished.wait(), 1)
+        await asyncio.sleep(0)
+        return held, len(tasks._background_tasks)
+
+    assert asyncio.run(scenario()) == (1, 0)
+
+def test_failed_task_is_logged_and_released(caplog):
+    async def scenario():
+        async def fail():
+            raise RuntimeError("boom")
+
+        task = tasks.spawn(fail())
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return len(tasks._background_tasks)
+
+    assert asyncio.run(scenario()) == 0
+    assert "Background task failed: boom" in caplog.text
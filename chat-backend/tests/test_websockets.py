@@ -0,0 +1,70 @@
+import asyncio
+import json
+from app.api.v1 import websockets
+from app.db.models import ChatRoom, User
+from app.services.connection import Connection
+from app.services.message_publisher import message_publisher
+from app.services.principal_cache import PrincipalCache
+
+async def flushed(websocket) -> list[dict]:
+    """writer가 큐의 프레임을 모두 보낼 때까지 양보한 뒤 보낸 프레임을 돌려받습니다."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+    frames = [json.loads(data) for data in websocket.sent]
+    websocket.sent.clear()
+    return frames
+
+def test_multiplexed_frames(sqlite_db, fake_websocket, memory_hub, monkeypatch):
+    async def scenario():
+        async with sqlite_db() as sessions:
+            async with sessions() as db:
+                db.add(User(id=1, username="alice", password_hash="x"))
+                db.add(ChatRoom(id=1, name="room", created_by=1))
+                await db.commit()
+
+            hub = memory_hub()
+            monkeypatch.setattr(websockets, "room_hub", hub)
+            monkeypatch.setattr(websockets, "principal_cache", PrincipalCache())
+            published = []
+
+            async def publish(room_id, sender_id, username, content):
+                published.append((room_id, sender_id, content))
+
+            monkeypatch.setattr(message_publisher, "publish", publish)
+            websocket = fake_websocket()
+            connection = Connection(websocket, multiplexed=True)
+            subscribed: set[int] = set()
+            results = {}
+            async with sessions() as db:
+                user = await websockets.principal_cache.get_user(db, username="alice")
+
+                async def handle(frame) -> list[dict]:
+                    await websockets.handle_multiplex_frame(connection, db, user, subscribed, frame)
+                    return await flushed(websocket)
+
+                results["send_before_subscribe"] = await handle({"type": "send", "room_id": 1, "message": "hi"})
+                results["subscribe_missing"] = await handle({"type": "subscribe", "room_id": 2})
+                results["subscribe"] = await handle({"type": "subscribe", "room_id": 1})
+                results["malformed"] = [await handle(frame) for frame in ([1, 2], None, "text", {"type": "send"}, {"type": "send", "room_id": True})]
+                results["empty_message"] = await handle({"type": "send", "room_id": 1, "message": {"text": "hi"}})
+                results["send"] = await handle({"type": "send", "room_id": 1, "message": "hi"})
+                results["unknown"] = await handle({"type": "ping", "room_id": 1})
+                hub_rooms = set(hub.connections)
+                results["unsubscribe"] = await handle({"type": "unsubscribe", "room_id": 1})
+            await connection.close()
+            return results, published, hub_rooms, set(hub.connections), subscribed, websocket.close_code
+
+    results, published, rooms_while_subscribed, rooms_after, subscribed, close_code = asyncio.run(scenario())
+    assert results["send_before_subscribe"] == [{"type": "error", "room_id": 1, "error": "not_subscribed"}]
+    assert results["subscribe_missing"] == [{"type": "error", "room_id": 2, "error": "room_not_found"}]
+    assert results["subscribe"] == [{"type": "subscribed", "room_id": 1}]
+    # 잘못된 프레임에는 error로 답하고 연결과 구독은 유지합니다.
+    assert [frames[0]["error"] for frames in results["malformed"]] == ["invalid_frame", "invalid_frame", "invalid_frame", "invalid_room_id", "invalid_room_id"]
+    assert results["empty_message"] == [{"type": "error", "room_id": 1, "error": "invalid_message"}]
+    assert results["send"] == []
+    assert published == [(1, 1, "hi")]
+    assert results["unknown"] == [{"type": "error", "room_id": 1, "error": "unknown_type"}]
+    assert results["unsubscribe"] == [{"type": "unsubscribed", "room_id": 1}]
+    assert rooms_while_subscribed == {1}
+    assert rooms_after == set() and subscribed == set()
+    assert close_code == 1000
@@ -68,7 +68,21 @@ const ChatRoomPage: React.FC = () => {
       // **메시지 수신 핸들러: 중요한 부분**
       // `setMessages`에 함수형 업데이트를 사용하여 `messages` 상태의 최신 값을 보장
       ws.current.onmessage = (event) => {
-        const receivedMessage: Message = JSON.parse(event.data);
+        const frame = JSON.parse(event.data);
+        // 채팅 메시지 외의 제어 프레임(rate_limited, unavailable, resync, room_deleted, reconnect 등)은 목록에 넣지 않음
+        if (frame.type !== 'message') {
+          if (frame.type === 'rate_limited' || frame.type === 'unavailable') {
+            setError('메시지를 너무 빨리 보내고 있거나 서버가 바쁩니다. 잠시 후 다시 시도해주세요.');
+          } else if (frame.type === 'room_deleted') {
+            setError('삭제된 채팅방입니다.');
+          }
+          return;
+        }
+        const receivedMessage: Message = {
+          username: frame.username,
+          message: frame.message,
+          timestamp: frame.timestamp,
+        };
         setMessages((prevMessages) => {
           // 중복 메시지 방지 로직 추가 (예: 마지막 메시지와 동일한 경우 무시)
           // 이 부분은 백엔드에서 timestamp를 정확히 내려주거나,
@@ -15,6 +15,8 @@ interface ChatRoom {
 
 const ChatRoomsPage: React.FC = () => {
   const [rooms, setRooms] = useState<ChatRoom[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | undefined>(); // 다음 페이지가 있을 때만 값이 있음
+  const [prefix, setPrefix] = useState(''); // 방 이름 검색어 (서버의 접두어 검색)
   const [newRoomName, setNewRoomName] = useState('');
   const [isMenuOpen, setIsMenuOpen] = useState(false);
   const [isCreateFormVisible, setIsCreateFormVisible] = useState(false);
@@ -24,9 +26,10 @@ const ChatRoomsPage: React.FC = () => {
   // 메뉴 컨테이너의 DOM 요소를 참조하기 위한 ref
   const menuRef = useRef<HTMLDivElement>(null); 
 
+  // 검색어가 바뀌면 첫 페이지부터 다시 가져옵니다.
   useEffect(() => {
     fetchRooms();
-  }, []);
+  }, [prefix]);
 
   useEffect(() => {
     // 메뉴가 열려 있을 때만 이벤트 리스너를 추가
@@ -48,10 +51,12 @@ const ChatRoomsPage: React.FC = () => {
     }
   };
 
-  const fetchRooms = async () => {
+  // cursor가 없으면 첫 페이지로 목록을 바꾸고, 있으면 다음 페이지를 뒤에 붙입니다.
+  const fetchRooms = async (cursor?: string) => {
     try {
-      const response = await roomsApi.getRooms();
-      setRooms(response.data);
+      const response = await roomsApi.getRooms<ChatRoom>({ cursor, prefix: prefix.trim() });
+      setRooms((prevRooms) => (cursor ? [...prevRooms, ...response.data] : response.data));
+      setNextCursor(response.nextCursor);
     } catch (error) {
       // console.error('채팅방 목록을 불러오는데 실패했습니다:', error);
       // alert('채팅방 목록 로드 실패.');
@@ -137,6 +142,14 @@ const ChatRoomsPage: React.FC = () => {
           </form>
         )}
 
+        <Input
+          type="text"
+          placeholder="방 이름으로 검색"
+          value={prefix}
+          onChange={(e) => setPrefix(e.target.value)}
+          className="ch-name"
+        />
+
         <ul className="w-[100vw] p-[20px]">
           {rooms.length === 0 ? (
             <p className="text-gray-600 text-center ">생성된 채팅방이 없습니다.<br />새로운 방을 만들어 보세요!</p>
@@ -152,6 +165,11 @@ const ChatRoomsPage: React.FC = () => {
             ))
           )}
         </ul>
+        {nextCursor && (
+          <Button type="button" onClick={() => fetchRooms(nextCursor)}>
+            더 보기
+          </Button>
+        )}
       </div>
   );
 };
@@ -32,8 +32,23 @@ export const authApi = {
     api.post('/login', { username, password }),      // <-- 그리고 여기 변경 (객체 리터럴 내부도)
 };
 
+// 페이지가 더 있으면 서버가 다음 페이지 커서를 이 헤더로 보냅니다. (axios는 헤더 이름을 소문자로 바꿉니다)
+const NEXT_CURSOR_HEADER = 'x-next-cursor';
+const ROOMS_PAGE_SIZE = 100;
+
+export interface RoomsPageParams {
+  cursor?: string; // 이전 페이지 응답의 nextCursor
+  prefix?: string; // 방 이름 접두어 검색
+}
+
 export const roomsApi = {
-  getRooms: () => api.get('/rooms'),
+  // 방 목록을 한 페이지만 가져옵니다. 다음 페이지가 있으면 nextCursor로 이어서 요청합니다. (더 보기)
+  getRooms: async <T,>({ cursor, prefix }: RoomsPageParams = {}) => {
+    const response = await api.get<T[]>('/rooms', {
+      params: { limit: ROOMS_PAGE_SIZE, cursor, prefix: prefix || undefined },
+    });
+    return { data: response.data, nextCursor: response.headers[NEXT_CURSOR_HEADER] as string | undefined };
+  },
   createRoom: (name: string) => api.post('/rooms', { name }),
   getMessages: (roomId: string) => api.get(`/rooms/${roomId}/messages`),
 };